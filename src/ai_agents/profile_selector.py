@@ -1,37 +1,27 @@
-from sentence_transformers import SentenceTransformer
-import faiss
 import json
-import numpy as np
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
-from dotenv import load_dotenv
 import os
+from utils.model_registry import get_chat_model, get_sentence_transformer
+from utils.vector_index import open_summary_index
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-# Load environment variables from .env file
-load_dotenv()
 
-def create_embeddings(profiles):
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    embeddings = [model.encode(profile['Summary']) for profile in profiles.values()]
-    return embeddings
+def open_summary_search(profiles):
+    """
+    Search over the profile summaries: the persistent index synced at ingestion, with the profiles it lacks
+    embedded in memory; searching never rewrites the index.
+    """
+    return open_summary_index(profiles, 'all-MiniLM-L6-v2')
 
-def vector_search(query, embeddings, profiles):
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+def vector_search(query, summary_search, profiles):
+    model = get_sentence_transformer('all-MiniLM-L6-v2')
     query_embedding = model.encode(query)
-    index = faiss.IndexFlatL2(len(query_embedding))
-    
-    # Convert list of embeddings to a numpy array
-    embeddings_array = np.array(embeddings)
-    index.add(embeddings_array)
-    
-    _, indices = index.search(query_embedding.reshape(1, -1), 3)
-    top_candidates = [list(profiles.keys())[i] for i in indices[0]]
+    top_candidates = [candidate_id for candidate_id, _ in summary_search.search(query_embedding, 3, candidate_ids=profiles)]
     return top_candidates
 
 def refine_with_llm(top_candidates, profiles):
-    # Initialize LLM with API key from environment
-    llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=os.getenv("OPENAI_API_KEY"))
+    # Shared LLM client, keyed from the environment
+    llm = get_chat_model("gpt-4o")
     
     refined_candidates = {}
     for candidate_id in top_candidates:
@@ -52,8 +42,8 @@ def main():
         profiles = json.load(file)
 
     query = "Find a candidate with 4 years of work experience"
-    embeddings = create_embeddings(profiles)
-    top_candidates = vector_search(query, embeddings, profiles)
+    summary_search = open_summary_search(profiles)
+    top_candidates = vector_search(query, summary_search, profiles)
     refined_candidates = refine_with_llm(top_candidates, profiles)
 
     print("Refined Candidates:")
@@ -0,0 +1,95 @@
+import random
+import sys
+import time
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from utils.batch_embedder import embed_texts
+
+# Corpus size, and the per-profile baseline sample its throughput is measured on
+CORPUS_SIZE = 100_000
+BASELINE_SAMPLE = 500
+
+# Simulated remote embedder: round-trip time of a request plus server time per text, in seconds
+REQUEST_LATENCY = 0.05
+PER_TEXT_SECONDS = 0.0002
+
+# Simulated local encoder: fixed cost of an encode call (tokenizer, dispatch), in seconds, and hidden size
+ENCODE_CALL_OVERHEAD = 0.002
+HIDDEN = 64
+
+class SimulatedRemoteEmbeddings(Embeddings):
+    """
+    Remote embedder stand-in whose requests cost a round trip plus a little per text.
+    """
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(REQUEST_LATENCY + PER_TEXT_SECONDS * len(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+class PaddedEncoder:
+    """
+    Local encoder stand-in that, like a transformer, pads each batch to its longest text and does
+    work proportional to batch size x padded length.
+    """
+
+    def __init__(self):
+        self.weights = np.random.default_rng(0).random((HIDDEN, HIDDEN), dtype=np.float32)
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size)[0]
+        time.sleep(ENCODE_CALL_OVERHEAD)
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            tokens = max(len(text.split()) for text in batch)
+            hidden = np.ones((len(batch), tokens, HIDDEN), dtype=np.float32) @ self.weights
+            vectors.append(hidden.mean(axis=1))
+        return np.concatenate(vectors)
+
+def corpus(size):
+    rng = random.Random(0)
+    words = ["python", "data", "engineer", "led", "team", "models", "cloud", "research", "sql", "agile"]
+    # Profile texts vary a lot in length: a short summary for some, long histories for others
+    return [" ".join(rng.choice(words) for _ in range(int(rng.lognormvariate(4.5, 0.6)))) for _ in range(size)]
+
+def throughput(count, seconds):
+    return f"{count / seconds:10,.0f} profiles/s"
+
+def main(size=CORPUS_SIZE):
+    texts = corpus(size)
+    print(f"{size} profile texts, {min(map(len, texts))}-{max(map(len, texts))} characters")
+
+    remote = SimulatedRemoteEmbeddings()
+    start = time.perf_counter()
+    for text in texts[:BASELINE_SAMPLE]:
+        remote.embed_query(text)
+    baseline = time.perf_counter() - start
+    start = time.perf_counter()
+    vectors = embed_texts(remote, texts)
+    batched = time.perf_counter() - start
+    assert vectors[:, 0].tolist() == [float(len(text)) for text in texts]
+    print(f"remote, one embed_query per profile: {throughput(BASELINE_SAMPLE, baseline)} (sampled on {BASELINE_SAMPLE})")
+    print(f"remote, chunked embed_documents:     {throughput(size, batched)} ({baseline / BASELINE_SAMPLE * size / batched:.0f}x)")
+
+    local = PaddedEncoder()
+    start = time.perf_counter()
+    for text in texts[:BASELINE_SAMPLE * 4]:
+        local.encode(text)
+    baseline = time.perf_counter() - start
+    start = time.perf_counter()
+    local.encode(texts, batch_size=64)
+    unsorted = time.perf_counter() - start
+    start = time.perf_counter()
+    embed_texts(local, texts, batch_size=64)
+    batched = time.perf_counter() - start
+    print(f"local, one encode per profile:       {throughput(BASELINE_SAMPLE * 4, baseline)} (sampled on {BASELINE_SAMPLE * 4})")
+    print(f"local, batches of 64 in input order: {throughput(size, unsorted)}")
+    print(f"local, length-sorted batches of 64:  {throughput(size, batched)} ({baseline / (BASELINE_SAMPLE * 4) * size / batched:.0f}x)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else CORPUS_SIZE)
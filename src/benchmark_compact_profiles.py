@@ -0,0 +1,72 @@
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from utils.compact_profiles import CompactProfiles
+from src import DATA_DIR
+
+# Synthesized profiles the pool is built from, and the default pool size
+PROFILES_JSON_PATH = os.path.join(DATA_DIR, "profiles_candidates2.json")
+POOL_SIZE = 50_000
+
+def synthetic_profiles(templates, size):
+    """
+    Yield `size` (candidate_id, profile) pairs decoded one by one, as they are when loaded from JSON, with a
+    unique name, Summary and descriptions each, so only the fields that really repeat across candidates are shared.
+    """
+    lines = [json.dumps(template) for template in templates]
+    for i in range(size):
+        profile = json.loads(lines[i % len(lines)])
+        profile["name"] = f"{profile.get('name', 'Candidate')} {i}"
+        profile["Summary"] = f"{profile.get('Summary', '')} ({i})"
+        for entry in profile.get("Experience", []):
+            entry["description"] = f"{entry.get('description', '')} ({i})"
+        yield f"candidate_{i}", profile
+
+def compact_pool(profiles):
+    pool = CompactProfiles()
+    for candidate_id, profile in profiles:
+        pool.add(candidate_id, profile)
+    return pool
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+def main(size=POOL_SIZE):
+    with open(PROFILES_JSON_PATH, "r") as file:
+        templates = [profile for profile in json.load(file).values() if "error" not in profile]
+
+    profiles, dict_size, _ = measure(lambda: dict(synthetic_profiles(templates, size)))
+    del profiles
+    # Each profile is compacted as it is decoded, so the pool owns every string it keeps
+    compact, compact_size, elapsed = measure(lambda: compact_pool(synthetic_profiles(templates, size)))
+    assert all(compact[candidate_id] == profile for candidate_id, profile in synthetic_profiles(templates, size))
+
+    start = time.perf_counter()
+    for candidate_id in list(compact)[:1000]:
+        json.dumps(compact[candidate_id])
+    prompt_time = (time.perf_counter() - start) / 1000
+    start = time.perf_counter()
+    for candidate_id in list(compact)[:1000]:
+        compact.field(candidate_id, "Summary")
+        compact.skill_names(candidate_id)
+    field_time = (time.perf_counter() - start) / 1000
+
+    print(f"{size} profiles, {len(compact.skills)} distinct skills")
+    print(f"   dict pool: {dict_size / 1e6:8.1f} MB ({dict_size / size:,.0f} bytes/profile)")
+    print(f"compact pool: {compact_size / 1e6:8.1f} MB ({compact_size / size:,.0f} bytes/profile), "
+          f"{dict_size / compact_size:.1f}x smaller, built in {elapsed:.2f}s")
+    print(f"Rebuilding and serializing one profile for a prompt: {prompt_time * 1e6:.0f} µs")
+    print(f"Reading one profile's Summary and skill names: {field_time * 1e6:.0f} µs")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else POOL_SIZE)
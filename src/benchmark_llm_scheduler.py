@@ -0,0 +1,98 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.messages import HumanMessage
+from utils.llm_scheduler import LLMScheduler, Priority, ScheduledChatOpenAI, set_llm_scheduler
+
+# Share of the stub's answers that are 429s, and the Retry-After it sends with them
+RATE_LIMITED_SHARE = 0.3
+RETRY_AFTER_SECONDS = 0.2
+
+# Simulated round-trip time of a successful request, in seconds
+LATENCY = 0.05
+
+class RateLimitedStub(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the chat completions endpoint that rejects a share of the requests with 429.
+    """
+    requests_seen = 0
+    rejected = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        RateLimitedStub.requests_seen += 1
+        if random.random() < RATE_LIMITED_SHARE:
+            RateLimitedStub.rejected += 1
+            self._reply(429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                        {"retry-after": str(RETRY_AFTER_SECONDS)})
+            return
+        time.sleep(LATENCY)
+        self._reply(200, {
+            "id": "stub", "object": "chat.completion", "created": 0, "model": "gpt-3.5-turbo",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    # Accept the whole burst of connections instead of refusing some
+    request_queue_size = 256
+    daemon_threads = True
+
+async def run(base_url, bulk_requests, interactive_requests):
+    bulk = ScheduledChatOpenAI(base_url=base_url, api_key="stub", priority=Priority.BULK)
+    interactive = ScheduledChatOpenAI(base_url=base_url, api_key="stub", priority=Priority.INTERACTIVE)
+    latencies = {"BULK": [], "INTERACTIVE": []}
+
+    async def timed(llm, name, i):
+        start = time.perf_counter()
+        await llm.ainvoke([HumanMessage(content=f"{name} request {i}")])
+        latencies[name].append(time.perf_counter() - start)
+
+    async def interactive_trickle():
+        # Interactive queries arrive while the bulk backlog is queued
+        await asyncio.sleep(0.5)
+        await asyncio.gather(*(timed(interactive, "INTERACTIVE", i) for i in range(interactive_requests)))
+
+    start = time.perf_counter()
+    await asyncio.gather(interactive_trickle(), *(timed(bulk, "BULK", i) for i in range(bulk_requests)))
+    return latencies, time.perf_counter() - start
+
+def main():
+    server = StubServer(("127.0.0.1", 0), RateLimitedStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    scheduler = LLMScheduler(
+        requests_per_minute=1200, tokens_per_minute=10_000_000, backoff_base=0.1, backoff_max=1.0, burst_seconds=0.5
+    )
+    set_llm_scheduler(scheduler)
+    latencies, elapsed = asyncio.run(run(base_url, bulk_requests=60, interactive_requests=5))
+    server.shutdown()
+
+    stats = scheduler.stats()
+    print(f"Stub: {RateLimitedStub.requests_seen} requests, {RateLimitedStub.rejected} answered with 429")
+    print(f"Scheduler: {sum(stats['granted'].values())} grants, {stats['retries']} retries, {stats['rate_limited']} rate limited, "
+          f"{stats['failures']} failures, max queue depth {stats['max_queue_depth']}, total {elapsed:.2f}s")
+    for name, values in latencies.items():
+        values = sorted(values)
+        print(f"{name:>11}: {len(values)} calls, median {values[len(values) // 2]:.2f}s, max {values[-1]:.2f}s, "
+              f"mean queue wait {stats['mean_wait_seconds'][name]:.2f}s")
+
+if __name__ == "__main__":
+    main()
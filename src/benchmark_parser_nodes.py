@@ -0,0 +1,60 @@
+import asyncio
+import json
+import math
+import time
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph_agents import nodes
+from utils.llm_scheduler import Priority
+from utils.model_registry import set_chat_model
+
+# Simulated round-trip time of a single LLM request, in seconds
+LATENCY = 0.2
+
+class FakeLatencyChatModel(BaseChatModel):
+    """
+    Chat model stand-in that answers every request with an empty profile after a fixed delay.
+    """
+    latency: float = LATENCY
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-latency"
+
+    def _result(self) -> ChatResult:
+        content = json.dumps({"name": "unknown", "Experience": [], "Education": [], "Skills": []})
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+def build_state(n):
+    """Build a raw ingestion state with `n` synthetic CVs."""
+    return {"cv_data": {f"cv_{i + 1}.txt": f"Candidate {i + 1}\nSkills: Python" for i in range(n)}}
+
+def main():
+    set_chat_model(FakeLatencyChatModel(), priority=Priority.BULK)
+
+    print(f"Simulated latency per request: {LATENCY}s")
+    print(f"{'N':>5} {'concurrency':>11} {'sync (s)':>9} {'async (s)':>9} {'ceil(N/c)*lat':>13}")
+    for n, concurrency in [(8, 4), (16, 4), (16, 8), (32, 8), (32, 16)]:
+        start = time.perf_counter()
+        nodes.cv_parser_node(build_state(n))
+        sync_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        asyncio.run(nodes.acv_parser_node(build_state(n), {"max_concurrency": concurrency}))
+        async_time = time.perf_counter() - start
+
+        expected = math.ceil(n / concurrency) * LATENCY
+        print(f"{n:>5} {concurrency:>11} {sync_time:>9.2f} {async_time:>9.2f} {expected:>13.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from numpy.lib.format import open_memmap
+from utils.quantized_embeddings import QuantizedIndex, RERANK_CANDIDATES
+from utils.similarity import SimilarityIndex
+
+# Candidate pool, embedding size (all-mpnet-base-v2), queries and results kept per query
+POOL_SIZE = 100_000
+DIM = 768
+QUERIES = 100
+TOP_K = 10
+
+# Synthetic profiles: topics in a low-dimensional latent space, projected up with some noise, like real embeddings
+TOPICS = 300
+LATENT_DIM = 64
+
+# (mode, PCA dimensions) configurations compared against exact float32 search
+CONFIGURATIONS = (("float16", None), ("int8", None), ("pq", None), ("int8", 256), ("pq", 256))
+
+def embeddings(size, rng, topics, projection):
+    latent = topics[rng.integers(len(topics), size=size)] + 0.5 * rng.standard_normal((size, LATENT_DIM), dtype=np.float32)
+    return (latent @ projection + 0.3 * rng.standard_normal((size, DIM), dtype=np.float32)).astype(np.float32)
+
+def megabytes(count):
+    return f"{count / 2 ** 20:8.1f} MB"
+
+def main(size=POOL_SIZE):
+    rng = np.random.default_rng(0)
+    topics = rng.standard_normal((TOPICS, LATENT_DIM), dtype=np.float32)
+    projection = rng.standard_normal((LATENT_DIM, DIM), dtype=np.float32)
+    queries = embeddings(QUERIES, rng, topics, projection)
+    ids = [f"candidate_{i}" for i in range(size)]
+    print(f"{size} candidates, {DIM}-dim embeddings, {QUERIES} queries, recall@{TOP_K}, exact re-rank of the best {RERANK_CANDIDATES}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Full-precision vectors live on disk, as in an EmbeddingStore, and are only read for the re-rank
+        path = os.path.join(directory, "vectors.npy")
+        matrix = open_memmap(path, mode="w+", dtype=np.float32, shape=(size, DIM))
+        for start in range(0, size, 50_000):
+            matrix[start:start + 50_000] = embeddings(min(50_000, size - start), rng, topics, projection)
+        matrix.flush()
+        matrix = np.load(path, mmap_mode="r")
+
+        exact = SimilarityIndex(ids, matrix)
+        start = time.perf_counter()
+        for query in queries:
+            exact.search(query, TOP_K)
+        latency = (time.perf_counter() - start) / QUERIES
+        print(f"{'float32, exact':<34} {megabytes(size * DIM * 4)}   1.0x   recall 1.000 / 1.000   {latency * 1000:6.2f} ms/query")
+
+        for mode, pca_dim in CONFIGURATIONS:
+            start = time.perf_counter()
+            index = QuantizedIndex(ids, matrix, mode=mode, pca_dim=pca_dim)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            index.search_many(queries, TOP_K)
+            latency = (time.perf_counter() - start) / QUERIES
+            report = index.evaluate(queries, TOP_K)
+            print(f"{index.description:<34} {megabytes(report['bytes'])} {report['compression']:5.0f}x   "
+                  f"recall {report['recall_first_pass']:.3f} / {report['recall_reranked']:.3f}   "
+                  f"{latency * 1000:6.2f} ms/query, built in {build:.1f}s")
+    print("recall: compressed first pass alone / after the exact re-rank")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else POOL_SIZE)
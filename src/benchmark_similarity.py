@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from utils.similarity import SimilarityIndex
+
+# Candidate counts, embedding size (all-MiniLM-L6-v2) and results kept per query
+SIZES = (10_000, 100_000, 1_000_000)
+DIM = 384
+TOP_K = 10
+QUERIES = 20
+# Queries scored together by search_many, as when screening many requisitions at once
+BATCH_QUERIES = 2000
+
+# Candidates scored by the per-candidate baseline, extrapolated to the full size
+BASELINE_SAMPLE = 10_000
+# From this size on, the matrix is written to a memory-mapped file and scored in chunks, as an EmbeddingStore is
+MEMMAP_FROM = 1_000_000
+
+def random_matrix(size, out=None):
+    rng = np.random.default_rng(size)
+    matrix = out if out is not None else np.empty((size, DIM), dtype=np.float32)
+    for start in range(0, size, 100_000):
+        matrix[start:start + 100_000] = rng.standard_normal((min(100_000, size - start), DIM), dtype=np.float32)
+    return matrix
+
+def per_candidate(query, ids, matrix):
+    # The loop every search path used: one dot product and two norms per candidate, then a full sort
+    results = []
+    for candidate_id, embedding in zip(ids, matrix):
+        results.append((candidate_id, np.dot(query, embedding) / (np.linalg.norm(query) * np.linalg.norm(embedding))))
+    return sorted(results, key=lambda x: x[1], reverse=True)[:TOP_K]
+
+def run(size, directory):
+    ids = [f"candidate_{i}" for i in range(size)]
+    if size >= MEMMAP_FROM:
+        matrix = np.lib.format.open_memmap(os.path.join(directory, "vectors.npy"), mode="w+", dtype=np.float32, shape=(size, DIM))
+        random_matrix(size, matrix)
+        matrix.flush()
+        matrix = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+    else:
+        matrix = random_matrix(size)
+    queries = np.random.default_rng(0).standard_normal((QUERIES, DIM), dtype=np.float32)
+
+    sample = min(size, BASELINE_SAMPLE)
+    start = time.perf_counter()
+    expected = per_candidate(queries[0], ids[:sample], matrix[:sample])
+    baseline = (time.perf_counter() - start) * size / sample
+
+    start = time.perf_counter()
+    index = SimilarityIndex(ids, matrix)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, TOP_K)
+    query_seconds = (time.perf_counter() - start) / QUERIES
+
+    batch = np.random.default_rng(1).standard_normal((BATCH_QUERIES, DIM), dtype=np.float32)
+    start = time.perf_counter()
+    batched = index.search_many(batch, TOP_K)
+    batch_seconds = (time.perf_counter() - start) / BATCH_QUERIES
+    assert [candidate_id for candidate_id, _ in batched[0]] == [candidate_id for candidate_id, _ in index.search(batch[0], TOP_K)]
+
+    sampled = SimilarityIndex(ids[:sample], matrix[:sample]).search(queries[0], TOP_K)
+    assert [candidate_id for candidate_id, _ in sampled] == [candidate_id for candidate_id, _ in expected]
+    kind = "memory-mapped, chunked" if size >= MEMMAP_FROM else "in memory"
+    print(f"{size:>9,} candidates ({kind}): per-candidate loop {baseline * 1000:9.1f} ms/query, "
+          f"index {query_seconds * 1000:7.1f} ms/query ({baseline / query_seconds:5.0f}x), built in {build:.2f}s, "
+          f"{BATCH_QUERIES} queries batched {batch_seconds * 1000:7.2f} ms/query ({baseline / batch_seconds:5.0f}x)")
+
+def main(sizes=SIZES):
+    print(f"{DIM}-dim embeddings, top {TOP_K}, mean of {QUERIES} queries")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            run(size, directory)
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or SIZES)
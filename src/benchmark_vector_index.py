@@ -0,0 +1,79 @@
+import sys
+import tempfile
+import time
+import faiss
+import numpy as np
+from utils.vector_index import VectorIndex
+
+# Candidate pool, embedding size (all-MiniLM-L6-v2), queries and results kept per query
+POOL_SIZE = 50_000
+DIM = 384
+QUERIES = 200
+TOP_K = 10
+
+# Topics the synthetic profiles cluster around, like real profile embeddings do
+TOPICS = 200
+
+# Search-time settings swept per approximate index kind
+NPROBES = (1, 4, 16, 64)
+EF_SEARCHES = (16, 64, 256)
+
+def clustered(size, rng, centers):
+    vectors = centers[rng.integers(len(centers), size=size)] + 0.6 * rng.standard_normal((size, DIM), dtype=np.float32)
+    return vectors.astype(np.float32)
+
+def timed_search(index, queries):
+    start = time.perf_counter()
+    results = index.search_many(queries, TOP_K)
+    return results, (time.perf_counter() - start) / len(queries)
+
+def recall(results, expected):
+    return np.mean([len({c for c, _ in got} & {c for c, _ in want}) / TOP_K for got, want in zip(results, expected)])
+
+def report(name, results, expected, latency, build=None):
+    built = f", built in {build:6.1f}s" if build is not None else ""
+    print(f"{name:<28} recall@{TOP_K} {recall(results, expected):.3f}   {latency * 1000:7.3f} ms/query{built}")
+
+def main(size=POOL_SIZE):
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((TOPICS, DIM), dtype=np.float32)
+    vectors, queries = clustered(size, rng, centers), clustered(QUERIES, rng, centers)
+    ids = [f"candidate_{i}" for i in range(size)]
+    print(f"{size} candidates, {DIM}-dim embeddings, {QUERIES} queries, top {TOP_K}")
+
+    # The old query path: a new IndexFlatL2 over the whole pool for every query (embedding the pool not counted)
+    start = time.perf_counter()
+    for query in queries[:10]:
+        per_query = faiss.IndexFlatL2(DIM)
+        per_query.add(vectors)
+        per_query.search(query.reshape(1, -1), TOP_K)
+    print(f"{'index rebuilt per query':<28} {'':<16}{(time.perf_counter() - start) / 10 * 1000:7.3f} ms/query")
+
+    with tempfile.TemporaryDirectory() as directory:
+        expected = None
+        for kind in ("flat", "ivf", "hnsw"):
+            index = VectorIndex(f"{directory}/{kind}", kind=kind)
+            start = time.perf_counter()
+            index.upsert(ids, vectors)
+            index.save()
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            index = VectorIndex(f"{directory}/{kind}", kind=kind)
+            load = time.perf_counter() - start
+            if kind == "flat":
+                expected, latency = timed_search(index, queries)
+                report("flat (exact)", expected, expected, latency, build)
+            elif kind == "ivf":
+                for nprobe in NPROBES:
+                    index.nprobe = nprobe
+                    results, latency = timed_search(index, queries)
+                    report(f"ivf nprobe={nprobe}", results, expected, latency, build if nprobe == NPROBES[0] else None)
+            else:
+                for ef_search in EF_SEARCHES:
+                    index.ef_search = ef_search
+                    results, latency = timed_search(index, queries)
+                    report(f"hnsw efSearch={ef_search}", results, expected, latency, build if ef_search == EF_SEARCHES[0] else None)
+            print(f"{'':<28} reopened from disk in {load:.2f}s")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else POOL_SIZE)
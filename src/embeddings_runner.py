@@ -1,24 +1,21 @@
-import openai
 import numpy as np
 import json
-from sentence_transformers import SentenceTransformer
-from dotenv import load_dotenv
+import logging
 import os
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
+from utils.model_registry import get_chat_model, get_sentence_transformer
+from utils.embeddings_cache import get_profile_embedding_cache
+from utils.similarity import search_embeddings
+from utils.structured_index import get_structured_index
 
-# Load environment variables
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+logger = logging.getLogger(__name__)
 
 # Suppress tokenizer parallelism warnings
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-# Initialize the embedding model
-embedding_model = SentenceTransformer('all-mpnet-base-v2')
-
-# Initialize the LLM
-llm = ChatOpenAI(model="gpt-4o", temperature=0)
+# Models, created on first use through the shared registry
+EMBEDDING_MODEL = 'all-mpnet-base-v2'
+LLM_MODEL = "gpt-4o"
 
 
 # Function to parse the user query dynamically
@@ -53,88 +50,57 @@ def parse_query(query):
 
 # Function to generate candidate embeddings
 def create_candidate_embeddings(data):
-    """Generate embeddings for all candidates."""
-    embeddings = {}
-    for candidate_id, details in data.items():
-        text_to_embed = ""
-        if 'Summary' in details:
-            text_to_embed += f"summary={details['Summary']}; "
-        if 'Skills' in details:
-            skills = ", ".join(details['Skills'])
-            text_to_embed += f"skills={skills}; "
-        if 'Experience' in details:
-            experiences = []
-            for exp in details['Experience']:
-                duration = exp.get('duration_years', 'unknown')
-                experiences.append(
-                    f"title={exp.get('title', 'unknown')}, company={exp.get('company', 'unknown')}, "
-                    f"duration_years={duration}"
-                )
-            text_to_embed += f"experience=[{' | '.join(experiences)}]; "
-        if 'Education' in details:
-            educations = []
-            for edu in details['Education']:
-                degree = edu.get('degree', 'unknown')
-                institution = edu.get('institution', 'unknown')
-                educations.append(f"degree={degree}, institution={institution}")
-            text_to_embed += f"education=[{' | '.join(educations)}]; "
-
-        embeddings[candidate_id] = embedding_model.encode(text_to_embed.strip(), convert_to_numpy=True)
+    """Generate embeddings for all candidates, re-embedding only those whose rendered profile text changed."""
+    cache = get_profile_embedding_cache(EMBEDDING_MODEL, lambda: get_sentence_transformer(EMBEDDING_MODEL))
+    return cache.embed(data)
+
+
+# Function to pre-filter candidates on the parsed query
+def structured_filter(parsed_query, candidate_data):
+    """
+    Boolean mask, in candidate_data order, of the candidates meeting the skills, education and experience criteria.
+    Criteria are applied in that order, and one that no candidate meeting the earlier ones matches is ignored.
+    """
+    # Imported here: the nodes module pulls in the agent stack, which plain imports of this module avoid
+    from langgraph_agents.nodes import normalize_skills
+    structured = get_structured_index(candidate_data, normalize_skills)
+    target_years = parsed_query.get("years_of_experience")
+    years = {
+        "less_than": {"max_years": target_years, "exclusive": True},
+        "greater_than": {"min_years": target_years, "exclusive": True},
+        "exact": {"min_years": target_years, "max_years": target_years},
+    }.get(parsed_query.get("experience_condition"), {})
+    criteria = [(f"skill {skill.strip()!r}", {"skills": [skill]}) for skill in parsed_query.get("skills", []) if skill and skill.strip()]
+    if parsed_query.get("education"):
+        criteria.append((f"degree {parsed_query['education']!r}", {"degree": parsed_query["education"]}))
+    if years:
+        criteria.append((f"experience {parsed_query['experience_condition']} {target_years} years", years))
 
-    return embeddings
+    allowed = np.ones(len(structured), dtype=bool)
+    for name, criterion in criteria:
+        matching = allowed & structured.filter(**criterion)
+        if matching.any():
+            allowed = matching
+        else:
+            logger.warning(f"No candidate meeting the other criteria has {name}; ignoring it")
+    return allowed
 
 
 # Function to compute candidate scores
 def compute_candidate_scores(query, candidate_data):
-    """Scores candidates based on embeddings and parsed query."""
+    """Scores candidates based on embeddings, among those meeting the parsed query's structured criteria."""
     parsed_query = parse_query(query)
-    query_embedding = embedding_model.encode(query, convert_to_numpy=True)
-    candidate_embeddings = create_candidate_embeddings(candidate_data)
+    query_embedding = get_sentence_transformer(EMBEDDING_MODEL).encode(query, convert_to_numpy=True)
 
-    results = []
-    for candidate_id, candidate_embedding in candidate_embeddings.items():
-        similarity = np.dot(query_embedding, candidate_embedding) / (
-                np.linalg.norm(query_embedding) * np.linalg.norm(candidate_embedding)
-        )
-
-        # Adjust scores based on query-specific conditions
-        candidate_details = candidate_data[candidate_id]
-        bonus = 0
-        for exp in candidate_details.get("Experience", []):
-            duration = exp.get("duration_years", "0")
-            try:
-                duration = int(duration)  # Ensure `duration_years` is an integer
-            except ValueError:
-                duration = 0  # Default to 0 if casting fails
-
-            condition = parsed_query.get("experience_condition")
-            target_years = parsed_query.get("years_of_experience")
-            if condition == "less_than" and duration < target_years:
-                bonus += 0.1
-            elif condition == "greater_than" and duration > target_years:
-                bonus += 0.1
-            elif condition == "exact" and duration == target_years:
-                bonus += 0.1
-
-        if parsed_query.get("education") and parsed_query["education"] in [
-            edu.get("degree", "") for edu in candidate_details.get("Education", [])
-        ]:
-            bonus += 0.3  # Increased weight for education match
-
-        results.append((candidate_id, similarity + bonus))
-
-    # Ensure candidates with exact education matches are included
-    if parsed_query.get("education"):
-        for candidate_id, candidate_details in candidate_data.items():
-            if parsed_query["education"] in [
-                edu.get("degree", "") for edu in candidate_details.get("Education", [])
-            ]:
-                if candidate_id not in [c[0] for c in results]:
-                    results.append((candidate_id, 1.0))  # Add with boosted score
+    # Structured criteria narrow the pool first: only the candidates meeting them are embedded and scored
+    allowed = structured_filter(parsed_query, candidate_data)
+    if not allowed.all():
+        candidate_ids = list(candidate_data)
+        candidate_data = {candidate_ids[position]: candidate_data[candidate_ids[position]] for position in np.flatnonzero(allowed)}
+    candidate_embeddings = create_candidate_embeddings(candidate_data)
 
-    # Sort results by highest adjusted score
-    results = sorted(results, key=lambda x: x[1], reverse=True)
-    return results[:3]
+    # Keep the highest scores
+    return search_embeddings(candidate_embeddings, query_embedding, 3)
 
 
 # Function to refine the selection using LLM
@@ -172,7 +138,7 @@ def refine_selection_with_llm(query, top_candidates, candidate_data):
         SystemMessage(content="You are an assistant that selects the best candidate for a given query."),
         HumanMessage(content=prompt)
     ]
-    response = llm.invoke(messages)
+    response = get_chat_model(LLM_MODEL).invoke(messages)
     return response.content.strip()
 
 
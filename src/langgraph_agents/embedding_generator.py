@@ -1,23 +1,11 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
+from utils.model_registry import get_sentence_transformer
+from utils.embeddings_cache import get_profile_embedding_cache
 
-# Initialize the embedding model
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+# Embedding model, loaded on first use through the shared registry
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
 
 def create_candidate_embeddings(data):
-    """Generates embeddings for all candidates."""
-    embeddings = {}
-    for candidate_id, details in data.items():
-        # Combine Summary, Skills, and Experience descriptions for embedding
-        text_to_embed = details['Summary']
-        if 'Skills' in details and isinstance(details['Skills'], list):
-            text_to_embed += " " + ", ".join(details['Skills'])
-        if 'Experience' in details and isinstance(details['Experience'], list):
-            experiences = [exp['description'] for exp in details['Experience'] if 'description' in exp]
-            text_to_embed += " " + " ".join(experiences)
-
-        # Generate embedding for the candidate
-        embedding = embedding_model.encode(text_to_embed, convert_to_numpy=True)
-        embeddings[candidate_id] = embedding
-
-    return embeddings
\ No newline at end of file
+    """Generates embeddings for all candidates, re-embedding only those whose rendered profile text changed."""
+    cache = get_profile_embedding_cache(EMBEDDING_MODEL, lambda: get_sentence_transformer(EMBEDDING_MODEL))
+    return cache.embed(data)
\ No newline at end of file
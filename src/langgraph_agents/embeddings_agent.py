@@ -1,89 +1,189 @@
 import logging
-from typing import Dict, List
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.vectorstores import FAISS
-from dotenv import load_dotenv
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+import numpy as np
+from utils.model_registry import DEFAULT_OPENAI_EMBEDDING_MODEL, get_openai_embeddings
+from utils.embeddings_preprocessor import render_profile_text, profile_text_hash
+from utils.embeddings_cache import get_profile_embedding_cache
+from src import ROOT_DIR
 
-# Load environment variables from .env file
-load_dotenv()
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
 
 # Initialize Logger
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+
+# Embedding model of the vectorstore, and where it is persisted when no path is given
+EMBEDDING_MODEL = DEFAULT_OPENAI_EMBEDDING_MODEL
+EMBEDDINGS_VECTORSTORE_DIR = os.getenv("EMBEDDINGS_VECTORSTORE_DIR", os.path.join(ROOT_DIR, ".cache", "vectorstore"))
 
 
 class EmbeddingsAgent:
     """
     Agent for generating embeddings and matching profiles to user queries.
+
+    The FAISS vectorstore is persisted at `vectorstore_path` and reused across runs. Each document is stored under
+    its candidate id, with the hash of its profile text in its metadata, so candidates are upserted and deleted
+    individually and only profiles whose text changed are re-embedded.
+
+    `sync` runs at ingestion time. Searches never write the store: they reload it when ingestion saved it
+    since, and embed the profiles it lacks in memory for that search only.
     """
 
-    def __init__(self, vectorstore_path: str = None):
+    def __init__(self, vectorstore_path: Optional[str] = EMBEDDINGS_VECTORSTORE_DIR):
         """
         Initialize the EmbeddingsAgent.
 
-        :param vectorstore_path: Path to an existing FAISS vectorstore. If None, a new store will be created.
+        :param vectorstore_path: Directory of the persisted FAISS vectorstore, loaded if it exists and saved after
+            every update. If None, the store is kept in memory only.
+        """
+        self.vectorstore_path = vectorstore_path
+        self._vectorstore = None
+        # Modification time of the index file the store was loaded from or saved to
+        self._mtime = None
+        self._lock = threading.RLock()
+
+    @property
+    def embeddings(self):
+        # Shared client, created on first use
+        return get_openai_embeddings(EMBEDDING_MODEL)
+
+    @property
+    def vectorstore(self) -> Optional["FAISS"]:
+        """
+        The FAISS vectorstore, loaded from `vectorstore_path` on first use and again once another process saved it.
         """
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
-        self.vectorstore = (
-            FAISS.load_local(vectorstore_path, self.embeddings)
-            if vectorstore_path
-            else None
-        )
+        if not self.vectorstore_path or not os.path.exists(os.path.join(self.vectorstore_path, "index.faiss")):
+            return self._vectorstore
+        with self._lock:
+            mtime = os.stat(os.path.join(self.vectorstore_path, "index.faiss")).st_mtime_ns
+            if self._vectorstore is None or mtime != self._mtime:
+                from langchain_community.vectorstores import FAISS
+                # The docstore is a pickle this agent wrote itself
+                self._vectorstore = FAISS.load_local(self.vectorstore_path, self.embeddings, allow_dangerous_deserialization=True)
+                self._mtime = mtime
+                logger.info(f"Loaded vectorstore {self.vectorstore_path} with {self._vectorstore.index.ntotal} profiles.")
+            return self._vectorstore
+
+    @vectorstore.setter
+    def vectorstore(self, vectorstore):
+        self._vectorstore = vectorstore
 
     def _generate_profile_text(self, profile: Dict) -> str:
         """
         Generate a structured text from a candidate profile for embedding generation.
 
         :param profile: A dictionary representing the candidate's profile.
-        :return: A string summarizing the candidate's profile.
+        :return: The canonical profile text shared by every embedder.
         """
-        try:
-            name = profile.get("name", "Unknown")
-            years_of_experience = sum(
-                float(exp.get("duration_years", 0))
-                for exp in profile.get("Experience", [])
-                if exp.get("duration_years", " ") not in ["unknown", None]
-            )
-            companies = ", ".join(
-                exp.get("company", "Unknown")
-                for exp in profile.get("Experience", [])
-                if "company" in exp
-            )
-            roles = ", ".join(
-                exp.get("title", " ") for exp in profile.get("Experience", [])
-            )
-            degrees = ", ".join(
-                edu.get("degree", " ") for edu in profile.get("Education", [])
-            )
-            skills = ", ".join(profile.get("Skills", []))
+        return render_profile_text(profile)
 
-            return (
-                f"{name} has {years_of_experience:.1f} years of experience, worked at {companies}, "
-                f"held roles such as {roles}, has degrees like {degrees}, and skills including {skills}."
-            )
-        except Exception as e:
-            logger.error(f"Error generating profile text: {e}")
-            return "Unknown profile summary."
+    def _stored_hashes(self) -> Dict[str, str]:
+        """
+        Text hash of every candidate in the vectorstore, from the document metadata.
+        """
+        if self.vectorstore is None:
+            return {}
+        hashes = {}
+        for document_id in self.vectorstore.index_to_docstore_id.values():
+            metadata = self.vectorstore.docstore.search(document_id).metadata
+            hashes[metadata["id"]] = metadata.get("text_hash")
+        return hashes
+
+    def _save(self) -> None:
+        if self.vectorstore_path and self._vectorstore is not None:
+            self._vectorstore.save_local(self.vectorstore_path)
+            self._mtime = os.stat(os.path.join(self.vectorstore_path, "index.faiss")).st_mtime_ns
 
-    def generate_embeddings(self, profiles: Dict) -> FAISS:
+    def sync_status(self, profiles: Dict) -> Dict[str, List[str]]:
         """
-        Generate embeddings for profiles and store them in a FAISS vectorstore.
+        Compare the profiles with the vectorstore.
+
+        :param profiles: A dictionary of candidate profiles.
+        :return: Candidate ids "added" (not in the store), "changed" (text differs from the stored one)
+            and "removed" (in the store but not in the profiles); all empty when in sync.
+        """
+        stored = self._stored_hashes()
+        status = {"added": [], "changed": [], "removed": [cid for cid in stored if cid not in profiles]}
+        for candidate_id, profile in profiles.items():
+            if candidate_id not in stored:
+                status["added"].append(candidate_id)
+            elif stored[candidate_id] != profile_text_hash(self._generate_profile_text(profile)):
+                status["changed"].append(candidate_id)
+        return status
+
+    def upsert(self, profiles: Dict) -> None:
+        """
+        Add new candidates to the vectorstore and replace the documents of known ones.
+
+        :param profiles: A dictionary of the candidate profiles to write.
+        """
+        if not profiles:
+            return
+        candidate_ids = list(profiles)
+        texts = [self._generate_profile_text(profiles[candidate_id]) for candidate_id in candidate_ids]
+        # Profile texts the shared embedding cache already holds are not sent to the API again
+        vectors = get_profile_embedding_cache(EMBEDDING_MODEL).embed(profiles)
+        text_embeddings = [(text, vectors[candidate_id].tolist()) for candidate_id, text in zip(candidate_ids, texts)]
+        metadatas = [{"id": candidate_id, "text_hash": profile_text_hash(text)} for candidate_id, text in zip(candidate_ids, texts)]
+        with self._lock:
+            if self.vectorstore is None:
+                from langchain_community.vectorstores import FAISS
+                self.vectorstore = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas, ids=candidate_ids)
+            else:
+                self._delete(candidate_ids)
+                self.vectorstore.add_embeddings(text_embeddings, metadatas, ids=candidate_ids)
+            self._save()
+
+    def delete(self, candidate_ids: Iterable[str]) -> None:
+        """
+        Remove candidates from the vectorstore; unknown ids are ignored.
+
+        :param candidate_ids: The candidate ids to remove.
+        """
+        with self._lock:
+            if self.vectorstore is not None and self._delete(candidate_ids):
+                self._save()
+
+    def _delete(self, candidate_ids: Iterable[str]) -> bool:
+        stored = set(self.vectorstore.index_to_docstore_id.values())
+        candidate_ids = [candidate_id for candidate_id in candidate_ids if candidate_id in stored]
+        if candidate_ids:
+            self.vectorstore.delete(candidate_ids)
+        return bool(candidate_ids)
+
+    def sync(self, profiles: Dict) -> Dict[str, List[str]]:
+        """
+        Bring the vectorstore in line with the profiles, embedding only added and changed candidates.
+
+        :param profiles: A dictionary of candidate profiles.
+        :return: The sync status found before updating, as returned by `sync_status`.
+        """
+        with self._lock:
+            status = self.sync_status(profiles)
+            if any(status.values()):
+                logger.info(
+                    f"Vectorstore out of sync: {len(status['added'])} added, {len(status['changed'])} changed, "
+                    f"{len(status['removed'])} removed profiles."
+                )
+                pending = status["added"] + status["changed"]
+                if status["removed"]:
+                    self._delete(status["removed"])
+                if pending:
+                    self.upsert(profiles.subset(pending) if hasattr(profiles, "subset") else {cid: profiles[cid] for cid in pending})
+                else:
+                    self._save()
+            return status
+
+    def generate_embeddings(self, profiles: Dict) -> "FAISS":
+        """
+        Generate embeddings for profiles and store them in the FAISS vectorstore.
 
         :param profiles: A dictionary of candidate profiles.
         :return: A FAISS vectorstore containing the embeddings.
         """
-        profile_data = [
-            {
-                "id": candidate_id,
-                "text": self._generate_profile_text(profile),
-            }
-            for candidate_id, profile in profiles.items()
-        ]
-        texts = [entry["text"] for entry in profile_data]
-        metadatas = [{"id": entry["id"]} for entry in profile_data]
-
-        self.vectorstore = FAISS.from_texts(texts, self.embeddings, metadatas)
-        self.vectorstore.save_local("vectorstore")
+        self.sync(profiles)
         logger.info("Embeddings successfully generated and stored in vectorstore.")
         return self.vectorstore
 
@@ -102,16 +202,28 @@ class EmbeddingsAgent:
 
     def find_best_match(self, profiles: Dict, query: str, top_k: int = 1) -> List[Dict]:
         """
-        Find the best matching profiles for a user query using cosine similarity.
+        Find the best matching profiles for a user query, by L2 distance of their embeddings.
+
+        The store is only read: it is synced at ingestion. Profiles it lacks are embedded for this search only
+        (through the shared embedding cache) and ranked with it; stored candidates outside `profiles` are skipped.
+        Profiles edited since the last sync keep their stored embedding until the next one.
 
         :param profiles: A dictionary of candidate profiles.
         :param query: The user query as a string.
         :param top_k: The number of top matches to return.
-        :return: A list of dictionaries containing the best matches and their similarity scores.
+        :return: A list of dictionaries containing the best matches and their distance scores.
         """
-        if not self.vectorstore:
-            logger.info("Generating embeddings as vectorstore is not initialized.")
-            self.generate_embeddings(profiles)
+        vectorstore = self.vectorstore
+        stored = set(vectorstore.index_to_docstore_id.values()) if vectorstore is not None else set()
+        missing = [candidate_id for candidate_id in profiles if candidate_id not in stored]
+        outside = len(stored) - (len(profiles) - len(missing))
+        if missing or outside:
+            logger.info(
+                f"Vectorstore out of sync with the searched profiles: {len(missing)} missing, embedded for this "
+                f"search only, and {outside} others stored; ingestion syncs it."
+            )
+        if not stored and not missing:
+            return []
 
         query_embedding = self.generate_query_embedding(query)
 
@@ -119,11 +231,33 @@ class EmbeddingsAgent:
             logger.error("Failed to generate query embedding.")
             return []
 
-        # Perform similarity search
-        results = self.vectorstore.similarity_search_with_score(query, k=top_k)
-        top_matches = [
-            {"profile": profiles[res.metadata["id"]], "similarity": score}
-            for res, score in results
-        ]
+        matches = []
+        if stored:
+            # Search by the query embedding, so the query is not embedded a second time
+            results = vectorstore.similarity_search_with_score_by_vector(
+                query_embedding, k=top_k,
+                filter=(lambda metadata: metadata["id"] in profiles) if outside else None,
+                fetch_k=top_k + outside,
+            )
+            matches = [(res.metadata["id"], float(score)) for res, score in results]
+        if missing:
+            vectors = get_profile_embedding_cache(EMBEDDING_MODEL).embed(
+                profiles.subset(missing) if hasattr(profiles, "subset") else {cid: profiles[cid] for cid in missing}
+            )
+            # Squared L2 distances, as the FAISS store scores them
+            distances = ((np.asarray([vectors[cid] for cid in missing]) - np.asarray(query_embedding, dtype=np.float32)) ** 2).sum(axis=1)
+            matches += [(candidate_id, float(distance)) for candidate_id, distance in zip(missing, distances)]
+
+        matches = sorted(matches, key=lambda match: match[1])[:top_k]
+        return [{"candidate_id": cid, "profile": profiles[cid], "similarity": score} for cid, score in matches]
 
-        return top_matches
+    def search(self, query: str, profiles: Dict, top_k: int = 5) -> List[Dict]:
+        """
+        Search the profiles for a user query.
+
+        :param query: The user query as a string.
+        :param profiles: A dictionary of candidate profiles.
+        :param top_k: The number of top matches to return.
+        :return: The best matches, as returned by `find_best_match`.
+        """
+        return self.find_best_match(profiles, query, top_k)
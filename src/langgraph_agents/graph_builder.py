@@ -1,22 +1,35 @@
 # graph_builder.py
 
-from langgraph.graph import StateGraph
-from langgraph_agents.nodes import cv_parser_node, linkedin_parser_node, interview_summarizer_node, synthesis_node
+from langgraph.graph import StateGraph, START, END
+from langgraph_agents.nodes import (
+    cv_parser_node, linkedin_parser_node, interview_summarizer_node, synthesis_node,
+    acv_parser_node, alinkedin_parser_node, ainterview_summarizer_node
+)
+from langgraph_agents.types import AgentState
 
 # Function to create the profile graph
-def create_profile_graph() -> StateGraph:
-    builder = StateGraph(dict)
+def create_profile_graph(use_async: bool = False) -> StateGraph:
+    """
+    Build the profile graph: the three parsers read disjoint inputs and write disjoint
+    state keys, so they run as parallel branches from START and join at `synthesis`.
+    With `use_async`, the async parser nodes are used (run the graph with `astream`/`ainvoke`).
+    """
+    builder = StateGraph(AgentState)
 
-    # Add nodes
-    builder.add_node("cv_parser", cv_parser_node)
-    builder.add_node("linkedin_parser", linkedin_parser_node)
-    builder.add_node("interview_summarizer", interview_summarizer_node)
+    parsers = {
+        "cv_parser": acv_parser_node if use_async else cv_parser_node,
+        "linkedin_parser": alinkedin_parser_node if use_async else linkedin_parser_node,
+        "interview_summarizer": ainterview_summarizer_node if use_async else interview_summarizer_node,
+    }
+
+    # Add nodes and fan out from START
+    for name, node in parsers.items():
+        builder.add_node(name, node)
+        builder.add_edge(START, name)
     builder.add_node("synthesis", synthesis_node)
 
-    # Define edges
-    builder.set_entry_point("cv_parser")
-    builder.add_edge("cv_parser", "linkedin_parser")
-    builder.add_edge("linkedin_parser", "interview_summarizer")
-    builder.add_edge("interview_summarizer", "synthesis")
+    # Fan in: synthesis waits for all three parser branches
+    builder.add_edge(list(parsers), "synthesis")
+    builder.add_edge("synthesis", END)
 
     return builder
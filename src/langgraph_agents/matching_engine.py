@@ -1,16 +1,27 @@
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict
+from typing import List, Dict, Sequence, Tuple
+from utils.batch_embedder import embed_texts
+from utils.similarity import search_embeddings, search_embeddings_many
 
 def find_best_matches(query_embedding: List[float], profile_embeddings: Dict[str, List[float]], profiles: Dict, top_k: int = 1):
     """
     Find the top K matches for a query embedding.
     """
-    similarities = {
-        candidate_id: cosine_similarity([query_embedding], [embedding])[0][0]
-        for candidate_id, embedding in profile_embeddings.items()
-    }
+    sorted_candidates = search_embeddings(profile_embeddings, query_embedding, top_k)
+    top_profiles = {candidate_id: profiles[candidate_id] for candidate_id, _ in sorted_candidates}
 
-    sorted_candidates = sorted(similarities.items(), key=lambda x: x[1], reverse=True)
-    top_profiles = {candidate_id: profiles[candidate_id] for candidate_id, _ in sorted_candidates[:top_k]}
+    return top_profiles, sorted_candidates
 
-    return top_profiles, sorted_candidates[:top_k]
+def find_best_matches_many(query_embeddings, profile_embeddings: Dict[str, List[float]], top_k: int = 1) -> List[List[Tuple[str, float]]]:
+    """
+    Find the top K matches for each row of a (queries, dim) matrix of query embeddings, scoring all queries
+    against all candidates in blocks. Returns the (candidate_id, score) pairs of each query, best first;
+    profiles are left for the caller to load, for the matches it keeps.
+    """
+    return search_embeddings_many(profile_embeddings, query_embeddings, top_k)
+
+def match_queries(queries: Sequence[str], embedder, profile_embeddings: Dict[str, List[float]], top_k: int = 1) -> List[List[Tuple[str, float]]]:
+    """
+    Find the top K matches for many query strings: the queries are embedded with `embedder` in batches and
+    scored together with `find_best_matches_many`. `embedder` must be the model `profile_embeddings` come from.
+    """
+    return find_best_matches_many(embed_texts(embedder, queries), profile_embeddings, top_k)
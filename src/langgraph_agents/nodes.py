@@ -1,87 +1,540 @@
+import asyncio
 import json
 import logging
 from typing import List, Dict
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
-from dotenv import load_dotenv
-from langgraph_agents.prompts import CV_PROMPT, LINKEDIN_PROMPT, INTERVIEW_PROMPT, SYNTHESIS_PROMPT
-
-logging.basicConfig(
-    level=logging.INFO,  # Change to DEBUG for detailed logs
-    format="%(asctime)s - %(levelname)s - %(message)s"
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langgraph_agents.prompts import (
+    CV_PROMPT, LINKEDIN_PROMPT, INTERVIEW_PROMPT, SYNTHESIS_PROMPT, BATCH_EXTRACTION_PROMPT,
+    INTERVIEW_CHUNK_PROMPT, INTERVIEW_MERGE_PROMPT, JSON_REPAIR_PROMPT
 )
+from utils.llm_cache import get_llm_cache
+from utils.llm_scheduler import Priority
+from utils.model_registry import get_chat_model, get_or_create
+from utils.preprocessor import candidate_id_from_file_name, candidate_id_from_position
+from utils.ingestion_checkpoint import get_document_checkpoints
+from utils.token_budget import estimate_tokens, pack_by_token_budget
+from utils.cv_rule_parser import parse_cv_rules
+from utils.provenance import ProvenanceIndex
+from utils.interview_chunks import split_transcript, merge_extractions
+from utils.json_repair import decode_json, apply_repair, repair_json, EXTRACTION_SCHEMA, SYNTHESIS_SCHEMA
 
-# Load environment variables
-load_dotenv()
+def _register_prompts():
+    """
+    Record the current system prompts in the persistent LLM response cache, invalidating the cached
+    responses of any prompt whose text changed.
+    """
+    get_llm_cache().register_prompts({
+        "CV_PROMPT": CV_PROMPT,
+        "LINKEDIN_PROMPT": LINKEDIN_PROMPT,
+        "INTERVIEW_PROMPT": INTERVIEW_PROMPT,
+        "SYNTHESIS_PROMPT": SYNTHESIS_PROMPT,
+        "INTERVIEW_CHUNK_PROMPT": INTERVIEW_PROMPT + INTERVIEW_CHUNK_PROMPT,
+        "INTERVIEW_MERGE_PROMPT": INTERVIEW_MERGE_PROMPT,
+        "JSON_REPAIR_PROMPT": JSON_REPAIR_PROMPT,
+    })
+    return True
 
-# Initialize OpenAI model
-model = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+def _model():
+    """
+    Shared chat client of the ingestion nodes, created on first use; ingestion calls yield to interactive ones in the shared scheduler.
+    The prompts are registered with the LLM cache on first use too, so importing the nodes opens nothing.
+    """
+    get_or_create("ingestion_prompts", _register_prompts)
+    return get_chat_model(priority=Priority.BULK)
 
-# CV Parser Node
-def cv_parser_node(state):
-    logging.info(f"Starting CV Parser with {len(state.get('cv_data', {}))} entries.")
-    parsed_cvs = {}
+# Default number of in-flight LLM requests used by the async parser nodes
+MAX_CONCURRENCY = 8
+
+# CVs parsed by rules with at least this confidence skip the LLM
+CV_FAST_PATH_MIN_CONFIDENCE = 0.9
+
+# Also attribute Experience/Education entries whose normalized title/company (degree/institution) match
+PROVENANCE_FUZZY_MATCHING = False
+
+# Transcripts longer than this many estimated tokens are summarized chunk by chunk (map-reduce)
+INTERVIEW_CHUNK_THRESHOLD_TOKENS = 6000
+
+# Size and overlap, in estimated tokens, of the chunks of a long transcript
+INTERVIEW_CHUNK_TOKENS = 3000
+INTERVIEW_CHUNK_OVERLAP_TOKENS = 200
+
+# Schema each stage's answers are validated against; fields still invalid after local repair are re-prompted
+RESPONSE_SCHEMAS = {
+    "cv_parser": EXTRACTION_SCHEMA,
+    "linkedin_parser": EXTRACTION_SCHEMA,
+    "interview_summarizer": EXTRACTION_SCHEMA,
+    "interview_merge": EXTRACTION_SCHEMA,
+    "synthesis": SYNTHESIS_SCHEMA,
+}
+
+def _max_concurrency(config):
+    """
+    Read the concurrency limit from a RunnableConfig, falling back to MAX_CONCURRENCY.
+    """
+    return (config or {}).get("max_concurrency") or MAX_CONCURRENCY
+
+def _is_error(result):
+    return any(key.startswith("error") for key in result)
+
+class _Checkpoints:
+    """
+    Per-document checkpoints of one stage for the thread id of a RunnableConfig; a no-op without a thread id.
+    """
+
+    def __init__(self, stage, config):
+        self.stage = stage
+        self.thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        self.store = get_document_checkpoints() if self.thread_id else None
+
+    def get(self, key, messages):
+        if not self.store:
+            return None
+        return self.store.get(self.thread_id, self.stage, key, self.store.input_hash([m.content for m in messages]))
+
+    def put(self, key, messages, result):
+        if self.store and not _is_error(result):
+            self.store.put(self.thread_id, self.stage, key, self.store.input_hash([m.content for m in messages]), result)
+
+def _token_budget(config):
+    """
+    Read the packing token budget from the config's `configurable` section; None disables packing.
+    """
+    return ((config or {}).get("configurable") or {}).get("token_budget")
+
+def _pack_requests(requests, token_budget):
+    """
+    Group single-document (key, messages) requests into groups whose documents, together with the
+    packed system prompt, fit in `token_budget` estimated tokens. Without a budget each request is its own group.
+    """
+    if not token_budget or len(requests) < 2:
+        return [[request] for request in requests]
+    # Only requests sharing a system prompt can be packed together
+    by_prompt = {}
+    for key, messages in requests:
+        by_prompt.setdefault(messages[0].content, []).append((key, messages))
+    packed = []
+    for system_prompt, prompt_requests in by_prompt.items():
+        system_tokens = estimate_tokens(system_prompt + BATCH_EXTRACTION_PROMPT)
+        by_key = dict(prompt_requests)
+        groups = pack_by_token_budget([(key, messages[1].content) for key, messages in prompt_requests], token_budget - system_tokens)
+        packed.extend([(key, by_key[key]) for key, _ in group] for group in groups)
+    return packed
+
+def _packed_messages(group):
+    """
+    One request for several documents: the shared extraction prompt asks for a JSON object keyed by document id.
+    """
+    documents = {key: json.loads(messages[1].content) for key, messages in group}
+    return [
+        SystemMessage(content=group[0][1][0].content + BATCH_EXTRACTION_PROMPT),
+        HumanMessage(content=json.dumps(documents))
+    ]
+
+def _split_packed(stage, group, response):
+    """
+    Split a packed response into per-document responses. Documents the answer omits or garbles are left out
+    so the caller can fall back to single-document calls for them.
+    """
+    try:
+        answers, repairs = repair_json(response.content)
+    except ValueError:
+        answers, repairs = {}, []
+    if "truncated" in repairs and isinstance(answers, dict) and answers:
+        # The document being written when the answer was cut off may be incomplete
+        answers.pop(list(answers)[-1])
+    results = {}
+    for key, _ in group:
+        answer = answers.get(key) if isinstance(answers, dict) else None
+        if isinstance(answer, dict):
+            results[key] = AIMessage(content=json.dumps(answer))
+    if len(results) < len(group):
+        logging.warning(f"{stage}: packed answer omitted or garbled {len(group) - len(results)} of {len(group)} documents, falling back to single calls.")
+    return results
+
+def _repair_messages(messages, answer, invalid):
+    """
+    Targeted repair request: the original instructions and input, the answer decoded so far and what is wrong with it.
+    """
+    return [
+        SystemMessage(content=JSON_REPAIR_PROMPT),
+        HumanMessage(content=json.dumps({
+            "instructions": messages[0].content,
+            "input": messages[-1].content,
+            "answer": answer,
+            "invalid_fields": invalid
+        }))
+    ]
+
+def _checked(stage, messages, response):
+    """
+    Decode a response locally and re-prompt, with a targeted repair request, only for the fields still invalid.
+    Returns a response holding clean JSON, or the original one when it could not be recovered.
+    """
+    schema = RESPONSE_SCHEMAS.get(stage)
+    answer, invalid = decode_json(stage, response.content, schema)
+    if invalid:
+        repair = _model().invoke(_repair_messages(messages, answer, invalid))
+        answer = apply_repair(stage, answer, invalid, repair.content, schema)
+    return response if answer is None else AIMessage(content=json.dumps(answer))
+
+async def _ainvoke(messages, semaphore=None):
+    if semaphore is None:
+        return await _model().ainvoke(messages)
+    async with semaphore:
+        return await _model().ainvoke(messages)
+
+async def _achecked(stage, messages, response, semaphore=None):
+    """
+    Async counterpart of `_checked`; the repair request takes a `semaphore` slot when one is given.
+    """
+    schema = RESPONSE_SCHEMAS.get(stage)
+    answer, invalid = decode_json(stage, response.content, schema)
+    if invalid:
+        repair = await _ainvoke(_repair_messages(messages, answer, invalid), semaphore)
+        answer = apply_repair(stage, answer, invalid, repair.content, schema)
+    return response if answer is None else AIMessage(content=json.dumps(answer))
+
+def _pending_requests(checkpoints, requests):
+    """
+    Split requests into the results already checkpointed and the requests still to run.
+    """
+    results, pending = {}, []
+    for key, messages in requests:
+        result = checkpoints.get(key, messages)
+        if result is None:
+            pending.append((key, messages))
+        else:
+            results[key] = result
+    return results, pending
+
+def _run_requests(stage, requests, decode, config=None, packable=True, parallel=False):
+    """
+    Invoke the (key, messages) requests one at a time and decode each response.
+    With a `token_budget` in the config's `configurable` section, small documents are packed into shared requests.
+    With `parallel`, the requests are instead sent together through `model.batch`, at most `max_concurrency` in flight;
+    the ones that fail are retried one at a time, as in the sequential path, without losing the others.
+    When the config carries a thread id, finished documents are checkpointed and reused on restart.
+    """
+    checkpoints = _Checkpoints(stage, config)
+    results, pending = _pending_requests(checkpoints, requests)
+
+    if parallel and pending:
+        responses = _model().batch(
+            [messages for _, messages in pending], config={"max_concurrency": _max_concurrency(config)}, return_exceptions=True
+        )
+        failed = []
+        for (key, messages), response in zip(pending, responses):
+            if isinstance(response, Exception):
+                logging.warning(f"{stage} request failed for {key}, retrying it on its own: {response}")
+                failed.append((key, messages))
+                continue
+            results[key] = decode(key, _checked(stage, messages, response))
+            checkpoints.put(key, messages, results[key])
+        pending, packable = failed, False
 
-    for key, content in state.get("cv_data", {}).items():
-        key = key.replace("cv_", "candidate_").split(".txt")[0]
+    for group in _pack_requests(pending, _token_budget(config) if packable else None):
+        packed = {}
+        if len(group) > 1:
+            packed = _split_packed(stage, group, _model().invoke(_packed_messages(group)))
+        for key, messages in group:
+            response = packed.get(key) or _model().invoke(messages)
+            result = decode(key, _checked(stage, messages, response))
+            checkpoints.put(key, messages, result)
+            results[key] = result
+    return {key: results[key] for key, _ in requests}
+
+async def _arun_requests(stage, requests, decode, error_result, config=None):
+    """
+    Run the (key, messages) requests concurrently, at most `max_concurrency` in flight, and decode each response.
+    Results keep the request order; a failed request only yields `error_result` for its own key.
+    With a `token_budget` in the config's `configurable` section, small documents are packed into shared requests.
+    When the config carries a thread id, finished documents are checkpointed and reused on restart.
+    """
+    checkpoints = _Checkpoints(stage, config)
+    semaphore = asyncio.Semaphore(_max_concurrency(config))
+    results, pending = _pending_requests(checkpoints, requests)
+
+    async def run_single(key, messages, response=None):
+        try:
+            if response is None:
+                response = await _ainvoke(messages, semaphore)
+            response = await _achecked(stage, messages, response, semaphore)
+        except Exception as e:
+            logging.error(f"{stage} request failed for {key}: {e}")
+            return dict(error_result)
+        result = decode(key, response)
+        checkpoints.put(key, messages, result)
+        return result
+
+    async def run_group(group):
+        packed = {}
+        if len(group) > 1:
+            try:
+                packed = _split_packed(stage, group, await _ainvoke(_packed_messages(group), semaphore))
+            except Exception as e:
+                logging.error(f"{stage} packed request failed for {len(group)} documents: {e}")
+        # Documents missing from the packed answer fall back to their own request
+        group_results = await asyncio.gather(*(run_single(key, messages, packed.get(key)) for key, messages in group))
+        return dict(zip((key for key, _ in group), group_results))
+
+    groups = _pack_requests(pending, _token_budget(config))
+    for group_results in await asyncio.gather(*(run_group(group) for group in groups)):
+        results.update(group_results)
+    return {key: results[key] for key, _ in requests}
+
+def _cv_requests(cv_data):
+    """
+    Build the (candidate key, messages) pairs for every raw CV.
+    """
+    requests = []
+    for key, content in cv_data.items():
+        key = candidate_id_from_file_name(key, "cv")
         messages = [
             SystemMessage(content=CV_PROMPT),
             HumanMessage(content=json.dumps(content))
         ]
-        response = model.invoke(messages)
-        try:
-            parsed_cvs[key] = json.loads(response.content)
-        except json.JSONDecodeError:
-            logging.error(f"Failed to parse CV data for {key}. Response: {response.content}")
-            parsed_cvs[key] = {"error": "Failed to parse on cv_parser_node"}
+        requests.append((key, messages))
+    return requests
+
+def _decode_cv(key, response):
+    try:
+        return json.loads(response.content)
+    except json.JSONDecodeError:
+        logging.error(f"Failed to parse CV data for {key}. Response: {response.content}")
+        return {"error": "Failed to parse on cv_parser_node"}
+
+def _linkedin_requests(linkedin_data):
+    """
+    Build the (candidate key, messages) pairs for every raw LinkedIn profile, plus the profile names by key.
+    Profiles come either as the list from `linkedin_profiles.json` or already keyed by candidate id.
+    """
+    if isinstance(linkedin_data, dict):
+        keyed_profiles = linkedin_data.items()
+    else:
+        keyed_profiles = ((candidate_id_from_position(i), profile) for i, profile in enumerate(linkedin_data))
+    requests, names = [], {}
+    for key, profile in keyed_profiles:
+        names[key] = profile.get("name", "Unknown")
+        messages = [
+            SystemMessage(content=LINKEDIN_PROMPT),
+            HumanMessage(content=json.dumps(profile))
+        ]
+        requests.append((key, messages))
+    return requests, names
+
+def _decode_linkedin(profile_name, response):
+    try:
+        parsed_profile = json.loads(response.content)
+        parsed_profile["name"] = profile_name
+        return parsed_profile
+    except json.JSONDecodeError:
+        logging.error(f"Failed to parse LinkedIn data for {profile_name}. Response: {response.content}")
+        return {"error on linkedin_parser_node": "Failed to parse"}
+
+def _interview_requests(interview_data):
+    """
+    Build the (candidate key, messages) pairs for every raw interview transcript.
+    """
+    requests = []
+    for key, content in interview_data.items():
+        key = candidate_id_from_file_name(key, "interview")
+        messages = [
+            SystemMessage(content=INTERVIEW_PROMPT),
+            HumanMessage(content=json.dumps(content))
+        ]
+        requests.append((key, messages))
+    return requests
+
+def _decode_interview(key, response):
+    try:
+        return json.loads(response.content)
+    except json.JSONDecodeError:
+        logging.error(f"Failed to parse interview data for {key}. Response: {response.content}")
+        return {"error on interview_summarizer_node": "Failed to parse"}
+
+def _interview_chunk_requests(requests):
+    """
+    Split the requests of transcripts longer than INTERVIEW_CHUNK_THRESHOLD_TOKENS into one request per chunk,
+    keyed `<candidate key>#chunk<i>`. Returns the short transcripts' requests, the chunk requests,
+    and the chunk keys of every chunked transcript.
+    """
+    single, chunked, chunk_keys = [], [], {}
+    for key, messages in requests:
+        transcript = json.loads(messages[1].content)
+        if not isinstance(transcript, str) or estimate_tokens(transcript) <= INTERVIEW_CHUNK_THRESHOLD_TOKENS:
+            single.append((key, messages))
+            continue
+        chunks = split_transcript(transcript, INTERVIEW_CHUNK_TOKENS, INTERVIEW_CHUNK_OVERLAP_TOKENS)
+        chunk_keys[key] = [f"{key}#chunk{i}" for i in range(len(chunks))]
+        for chunk_key, chunk in zip(chunk_keys[key], chunks):
+            chunked.append((chunk_key, [
+                SystemMessage(content=INTERVIEW_PROMPT + INTERVIEW_CHUNK_PROMPT),
+                HumanMessage(content=json.dumps(chunk))
+            ]))
+        logging.info(f"Interview {key}: {estimate_tokens(transcript)} tokens split into {len(chunks)} chunks.")
+    return single, chunked, chunk_keys
+
+def _reduce_interview_chunks(chunk_keys, results):
+    """
+    Replace the chunk results of every chunked transcript by their deterministic merge.
+    Returns the (key, messages) requests of the transcripts whose chunks disagree and need a final LLM merge.
+    """
+    merge_requests = []
+    for key, keys in chunk_keys.items():
+        partials = [results.pop(chunk_key) for chunk_key in keys]
+        partials = [partial for partial in partials if not _is_error(partial)]
+        if len(partials) < len(keys):
+            logging.warning(f"Interview {key}: {len(keys) - len(partials)} of {len(keys)} chunks failed to parse.")
+        if not partials:
+            results[key] = {"error on interview_summarizer_node": "Failed to parse"}
+            continue
+        results[key], conflicts = merge_extractions(partials)
+        if conflicts:
+            logging.info(f"Interview {key}: {len(conflicts)} conflicting values across chunks, merging with the LLM.")
+            merge_requests.append((key, [
+                SystemMessage(content=INTERVIEW_MERGE_PROMPT),
+                HumanMessage(content=json.dumps({"partials": partials, "draft": results[key], "conflicts": conflicts}))
+            ]))
+    return merge_requests
+
+def _apply_interview_merges(results, merged):
+    """
+    Take the LLM merges that parsed, keeping the deterministic merge of the others.
+    """
+    for key, result in merged.items():
+        if _is_error(result):
+            logging.warning(f"Interview {key}: LLM merge failed, keeping the deterministic merge.")
+        else:
+            results[key] = result
+
+def _summarize_interviews(interview_data, config=None):
+    """
+    Summarize every transcript: short ones in a single call, long ones by extracting their chunks
+    in parallel and merging the partial extractions.
+    """
+    requests = _interview_requests(interview_data)
+    single, chunked, chunk_keys = _interview_chunk_requests(requests)
+    results = _run_requests("interview_summarizer", single, _decode_interview, config)
+    results.update(_run_requests("interview_summarizer", chunked, _decode_interview, config, parallel=True))
+    merge_requests = _reduce_interview_chunks(chunk_keys, results)
+    _apply_interview_merges(results, _run_requests("interview_merge", merge_requests, _decode_interview, config, packable=False))
+    return {key: results[key] for key, _ in requests}
+
+async def _asummarize_interviews(interview_data, config=None):
+    """
+    Async counterpart of `_summarize_interviews`: transcripts and chunks share the `max_concurrency` limit,
+    so a long transcript takes about as long as its slowest chunk plus, when chunks disagree, one merge call.
+    """
+    requests = _interview_requests(interview_data)
+    single, chunked, chunk_keys = _interview_chunk_requests(requests)
+    error_result = {"error on interview_summarizer_node": "Failed to parse"}
+    results = await _arun_requests("interview_summarizer", single + chunked, _decode_interview, error_result, config)
+    merge_requests = _reduce_interview_chunks(chunk_keys, results)
+    _apply_interview_merges(results, await _arun_requests("interview_merge", merge_requests, _decode_interview, error_result, config))
+    return {key: results[key] for key, _ in requests}
+
+def _route_cvs(cv_data, config=None):
+    """
+    Parse well-structured CVs with the deterministic rule parser and return them keyed by candidate,
+    together with the remaining raw CVs whose rule-parse confidence is too low and need the LLM.
+    Disabled with `cv_fast_path: False` in the config's `configurable` section.
+    """
+    if ((config or {}).get("configurable") or {}).get("cv_fast_path") is False:
+        return {}, cv_data
+    fast_path, remaining = {}, {}
+    for key, content in cv_data.items():
+        parsed, confidence = parse_cv_rules(content) if isinstance(content, str) else (None, 0.0)
+        logging.debug(f"Rule-parse confidence of {key}: {confidence}.")
+        if confidence >= CV_FAST_PATH_MIN_CONFIDENCE:
+            fast_path[candidate_id_from_file_name(key, "cv")] = parsed
+        else:
+            remaining[key] = content
+    return fast_path, remaining
+
+def _merge_routed_cvs(cv_data, fast_path, parsed_by_llm):
+    """
+    Combine rule-parsed and LLM-parsed CVs in the original document order and log the fast-path share.
+    """
+    if cv_data:
+        logging.info(f"CV fast path: {len(fast_path)} of {len(cv_data)} documents ({len(fast_path) / len(cv_data):.0%}) parsed without the LLM.")
+    parsed_cvs = {**fast_path, **parsed_by_llm}
+    keys = [candidate_id_from_file_name(key, "cv") for key in cv_data]
+    return {key: parsed_cvs[key] for key in keys if key in parsed_cvs}
+
+# CV Parser Node
+def cv_parser_node(state, config=None):
+    cv_data = state.get("cv_data", {})
+    logging.info(f"Starting CV Parser with {len(cv_data)} entries.")
+    fast_path, remaining = _route_cvs(cv_data, config)
+    parsed_by_llm = _run_requests("cv_parser", _cv_requests(remaining), _decode_cv, config)
+    parsed_cvs = _merge_routed_cvs(cv_data, fast_path, parsed_by_llm)
+
+    state["cv_data"] = parsed_cvs
+    logging.info("CV Parsing complete.")
+    return {"cv_data": parsed_cvs}
+
+async def acv_parser_node(state, config=None):
+    """
+    Async CV Parser Node: parses all CVs concurrently, at most `max_concurrency` requests in flight.
+    """
+    cv_data = state.get("cv_data", {})
+    logging.info(f"Starting async CV Parser with {len(cv_data)} entries.")
+    fast_path, remaining = _route_cvs(cv_data, config)
+    parsed_by_llm = await _arun_requests(
+        "cv_parser", _cv_requests(remaining), _decode_cv, {"error": "Failed to parse on cv_parser_node"}, config
+    )
+    parsed_cvs = _merge_routed_cvs(cv_data, fast_path, parsed_by_llm)
 
     state["cv_data"] = parsed_cvs
     logging.info("CV Parsing complete.")
     return {"cv_data": parsed_cvs}
 
 # LinkedIn Parser Node
-def linkedin_parser_node(state):
+def linkedin_parser_node(state, config=None):
     linkedin_data = state.get("linkedin_data", [])
     logging.info(f"Starting LinkedIn Parser with {len(linkedin_data)} profiles.")
-    parsed_linkedin_profiles = {}
 
-    for i, profile in enumerate(linkedin_data):
-        key = f"candidate_{i + 1}"
-        profile_name = profile.get("name", "Unknown")
-        messages = [
-            SystemMessage(content=LINKEDIN_PROMPT),
-            HumanMessage(content=json.dumps(profile))
-        ]
-        response = model.invoke(messages)
-        try:
-            parsed_linkedin_profiles[key] = json.loads(response.content)
-            parsed_linkedin_profiles[key]["name"] = profile_name
-        except json.JSONDecodeError:
-            logging.error(f"Failed to parse LinkedIn data for {profile_name}. Response: {response.content}")
-            parsed_linkedin_profiles[key] = {"error on linkedin_parser_node": "Failed to parse"}
+    requests, names = _linkedin_requests(linkedin_data)
+    parsed_linkedin_profiles = _run_requests(
+        "linkedin_parser", requests, lambda key, response: _decode_linkedin(names[key], response), config
+    )
+
+    state["linkedin_data"] = parsed_linkedin_profiles
+    logging.info("LinkedIn Parsing complete.")
+    return {"linkedin_data": parsed_linkedin_profiles}
+
+async def alinkedin_parser_node(state, config=None):
+    """
+    Async LinkedIn Parser Node: parses all profiles concurrently, at most `max_concurrency` requests in flight.
+    """
+    requests, names = _linkedin_requests(state.get("linkedin_data", []))
+    logging.info(f"Starting async LinkedIn Parser with {len(requests)} profiles.")
+    parsed_linkedin_profiles = await _arun_requests(
+        "linkedin_parser", requests, lambda key, response: _decode_linkedin(names[key], response),
+        {"error on linkedin_parser_node": "Failed to parse"}, config
+    )
 
     state["linkedin_data"] = parsed_linkedin_profiles
     logging.info("LinkedIn Parsing complete.")
     return {"linkedin_data": parsed_linkedin_profiles}
 
 # Interview Summarizer Node
-def interview_summarizer_node(state):
+def interview_summarizer_node(state, config=None):
     interview_data = state.get("interview_data", {})
     logging.info(f"Starting Interview Summarizer with {len(interview_data)} entries.")
-    summarized_interviews = {}
+    summarized_interviews = _summarize_interviews(interview_data, config)
 
-    for key, content in interview_data.items():
-        key = key.replace("interview_", "candidate_").split(".txt")[0]
-        messages = [
-            SystemMessage(content=INTERVIEW_PROMPT),
-            HumanMessage(content=json.dumps(content))
-        ]
-        response = model.invoke(messages)
-        try:
-            summarized_interviews[key] = json.loads(response.content)
-        except json.JSONDecodeError:
-            logging.error(f"Failed to parse interview data for {key}. Response: {response.content}")
-            summarized_interviews[key] = {"error on interview_summarizer_node": "Failed to parse"}
+    state["interview_data"] = summarized_interviews
+    logging.info("Interview Summarization complete.")
+    return {"interview_data": summarized_interviews}
+
+async def ainterview_summarizer_node(state, config=None):
+    """
+    Async Interview Summarizer Node: summarizes all transcripts concurrently, at most `max_concurrency` requests in flight.
+    """
+    interview_data = state.get("interview_data", {})
+    logging.info(f"Starting async Interview Summarizer with {len(interview_data)} entries.")
+    summarized_interviews = await _asummarize_interviews(interview_data, config)
 
     state["interview_data"] = summarized_interviews
     logging.info("Interview Summarization complete.")
@@ -108,102 +561,129 @@ def normalize_skills(skills: List[str]) -> List[str]:
             normalized_skills.add(skill.title())  # Capitalize first letter
     return sorted(normalized_skills)
 
-def add_source_to_field(field_data, cv_entry, linkedin_entry, interview_entry, field_name):
+def _provenance_index(cv_entry, linkedin_entry, interview_entry):
+    """
+    Build the per-candidate index used to attribute synthesized entries to their sources.
+    """
+    return ProvenanceIndex(
+        {"CV": cv_entry, "LinkedIn": linkedin_entry, "Interview": interview_entry},
+        normalize_skills=normalize_skills,
+        fuzzy=PROVENANCE_FUZZY_MATCHING
+    )
+
+def add_source_to_field(field_data, cv_entry, linkedin_entry, interview_entry, field_name, index=None):
     """
     Add source tracking to a field (e.g., Experience or Education).
     """
+    index = index or _provenance_index(cv_entry, linkedin_entry, interview_entry)
     updated_field = []
     for entry in field_data:
-        sources = []
-        # Check if the entry exists in the CV data
-        cv_items = cv_entry.get(field_name, [])
-        if isinstance(cv_items, list):
-            for cv_item in cv_items:
-                if isinstance(cv_item, dict) and isinstance(entry, dict) and entry.items() <= cv_item.items():
-                    sources.append("CV")
-                elif isinstance(cv_item, str) and isinstance(entry, dict) and str(entry) == cv_item:
-                    sources.append("CV")
-                elif isinstance(cv_item, str) and isinstance(entry, str) and entry == cv_item:
-                    sources.append("CV")
-        # Check if the entry exists in the LinkedIn data
-        linkedin_items = linkedin_entry.get(field_name, [])
-        if isinstance(linkedin_items, list):
-            for linkedin_item in linkedin_items:
-                if isinstance(linkedin_item, dict) and isinstance(entry, dict) and entry.items() <= linkedin_item.items():
-                    sources.append("LinkedIn")
-                elif isinstance(linkedin_item, str) and isinstance(entry, dict) and str(entry) == linkedin_item:
-                    sources.append("LinkedIn")
-                elif isinstance(linkedin_item, str) and isinstance(entry, str) and entry == linkedin_item:
-                    sources.append("LinkedIn")
-        # Check if the entry exists in the Interview data
-        interview_items = interview_entry.get(field_name, [])
-        if isinstance(interview_items, list):
-            for interview_item in interview_items:
-                if isinstance(interview_item, dict) and isinstance(entry, dict) and entry.items() <= interview_item.items():
-                    sources.append("Interview")
-                elif isinstance(interview_item, str) and isinstance(entry, dict) and str(entry) == interview_item:
-                    sources.append("Interview")
-                elif isinstance(interview_item, str) and isinstance(entry, str) and entry == interview_item:
-                    sources.append("Interview")
-        entry["source"] = sources
+        entry["source"] = index.field_sources(entry, field_name)
         updated_field.append(entry)
     return updated_field
 
-def add_source_to_skills(skills, cv_entry, linkedin_entry, interview_entry):
+def add_source_to_skills(skills, cv_entry, linkedin_entry, interview_entry, index=None):
     """
     Add source tracking to skills.
     """
-    updated_skills = []
-    for skill in skills:
-        sources = []
-        if skill in cv_entry.get("Skills", []):
-            sources.append("CV")
-        if skill in linkedin_entry.get("Skills", []):
-            sources.append("LinkedIn")
-        if skill in interview_entry.get("Skills", []):
-            sources.append("Interview")
-        updated_skills.append({"skill": skill, "source": sources})
-    return updated_skills
-
-def synthesize_profiles(cv_data, linkedin_data, interview_data):
+    index = index or _provenance_index(cv_entry, linkedin_entry, interview_entry)
+    return [{"skill": skill, "source": index.skill_sources(skill)} for skill in skills]
+
+def _synthesis_messages(cv_entry, linkedin_entry, interview_entry):
+    content = {
+        "cv": cv_entry,
+        "linkedin": linkedin_entry,
+        "interview": interview_entry
+    }
+    return [
+        SystemMessage(content=SYNTHESIS_PROMPT),
+        HumanMessage(content=json.dumps(content))
+    ]
+
+def _decode_synthesis(candidate_id, response, cv_entry, linkedin_entry, interview_entry):
+    try:
+        profile = json.loads(response.content)
+        # Normalize skills
+        if "Skills" in profile:
+            profile["Skills"] = normalize_skills(profile["Skills"])
+        # Ensure Education is a list of dictionaries
+        if "Education" in profile and isinstance(profile["Education"], dict):
+            profile["Education"] = [profile["Education"]]
+        # Add source tracking for each field, from an index of the sources built once per candidate
+        index = _provenance_index(cv_entry, linkedin_entry, interview_entry)
+        profile["Experience"] = add_source_to_field(profile.get("Experience", []), cv_entry, linkedin_entry, interview_entry, "Experience", index)
+        profile["Education"] = add_source_to_field(profile.get("Education", []), cv_entry, linkedin_entry, interview_entry, "Education", index)
+        profile["Skills"] = add_source_to_skills(profile.get("Skills", []), cv_entry, linkedin_entry, interview_entry, index)
+        return profile
+    except json.JSONDecodeError:
+        logging.error(f"Failed to combine the 3 sources for {candidate_id}. Response: {response.content}")
+        return {"error": "Failed to combine the 3 sources on synthesize_profiles"}
+
+def synthesize_profiles(cv_data, linkedin_data, interview_data, config=None):
     """
     Combines CVs, LinkedIn profiles, and interviews into unified profiles.
     """
     logging.info("Starting Profile Synthesis.")
-    synthesized_profiles = {}
+    requests = [
+        (candidate_id, _synthesis_messages(cv_entry, linkedin_data.get(candidate_id, {}), interview_data.get(candidate_id, {})))
+        for candidate_id, cv_entry in cv_data.items()
+    ]
+    synthesized_profiles = _run_requests(
+        "synthesis",
+        requests,
+        lambda candidate_id, response: _decode_synthesis(
+            candidate_id, response, cv_data[candidate_id],
+            linkedin_data.get(candidate_id, {}), interview_data.get(candidate_id, {})
+        ),
+        config,
+        packable=False
+    )
 
-    for candidate_id, cv_entry in cv_data.items():
-        linkedin_entry = linkedin_data.get(candidate_id, {})
-        interview_entry = interview_data.get(candidate_id, {})
+    logging.info("ProfilesSynthesis of 3 sources complete.")
+    return synthesized_profiles
 
-        content = {
-            "cv": cv_entry,
-            "linkedin": linkedin_entry,
-            "interview": interview_entry
-        }
+async def asynthesize_profile(candidate_id, cv_entry, linkedin_entry, interview_entry):
+    """
+    Async synthesis of a single candidate's parsed CV, LinkedIn profile and interview.
+    """
+    messages = _synthesis_messages(cv_entry, linkedin_entry, interview_entry)
+    response = await _achecked("synthesis", messages, await _model().ainvoke(messages))
+    return _decode_synthesis(candidate_id, response, cv_entry, linkedin_entry, interview_entry)
 
-        messages = [
-            SystemMessage(content=SYNTHESIS_PROMPT),
-            HumanMessage(content=json.dumps(content))
-        ]
-        response = model.invoke(messages)
-        try:
-            profile = json.loads(response.content)
-            # Normalize skills
-            if "Skills" in profile:
-                profile["Skills"] = normalize_skills(profile["Skills"])
-            # Ensure Education is a list of dictionaries
-            if "Education" in profile and isinstance(profile["Education"], dict):
-                profile["Education"] = [profile["Education"]]
-            # Add source tracking for each field
-            profile["Experience"] = add_source_to_field(profile.get("Experience", []), cv_entry, linkedin_entry, interview_entry, "Experience")
-            profile["Education"] = add_source_to_field(profile.get("Education", []), cv_entry, linkedin_entry, interview_entry, "Education")
-            profile["Skills"] = add_source_to_skills(profile.get("Skills", []), cv_entry, linkedin_entry, interview_entry)
-            synthesized_profiles[candidate_id] = profile
-        except json.JSONDecodeError:
-            logging.error(f"Failed to combine the 3 sources for {candidate_id}. Response: {response.content}")
-            synthesized_profiles[candidate_id] = {"error": "Failed to combine the 3 sources on synthesize_profiles"}
+async def aparse_candidate(candidate_id, cv_text, linkedin_profile=None, interview_text=None):
+    """
+    Parse one candidate's raw sources concurrently; returns the (cv, linkedin, interview) entries synthesis takes,
+    missing sources as empty entries.
+    """
+    async def parse(stage, requests, decode):
+        if not requests:
+            return {}
+        key, messages = requests[0]
+        return decode(key, await _achecked(stage, messages, await _model().ainvoke(messages)))
 
-    logging.info("ProfilesSynthesis of 3 sources complete.")
-    return synthesized_profiles
+    fast_path, remaining = _route_cvs({candidate_id: cv_text})
+    linkedin_requests, names = _linkedin_requests({candidate_id: linkedin_profile} if linkedin_profile else {})
+    cv_entry, linkedin_entry, interview_entry = await asyncio.gather(
+        parse("cv_parser", _cv_requests(remaining), _decode_cv),
+        parse("linkedin_parser", linkedin_requests, lambda key, response: _decode_linkedin(names[key], response)),
+        _asummarize_interviews({candidate_id: interview_text} if interview_text else {})
+    )
+    return fast_path.get(candidate_id, cv_entry), linkedin_entry, interview_entry.get(candidate_id, {})
+
+async def aingest_candidate(candidate_id, cv_text, linkedin_profile=None, interview_text=None):
+    """
+    Parse one candidate's raw sources concurrently and synthesize its profile as soon as they are parsed.
+    Missing sources are passed to synthesis as empty entries.
+    """
+    return await asynthesize_profile(candidate_id, *await aparse_candidate(candidate_id, cv_text, linkedin_profile, interview_text))
 
+# Synthesis Node
+def synthesis_node(state, config=None):
+    profiles = synthesize_profiles(
+        state.get("cv_data", {}),
+        state.get("linkedin_data", {}),
+        state.get("interview_data", {}),
+        config
+    )
+    state["profiles"] = profiles
+    return {"profiles": profiles}
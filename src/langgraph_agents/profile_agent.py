@@ -1,19 +1,11 @@
 import json
 import logging
 from typing import Dict
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Initialize OpenAI model
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+from utils.model_registry import get_chat_model
 
 # Logger setup
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 def query_profiles(query: str, profiles: Dict) -> Dict:
     """
@@ -28,7 +20,7 @@ def query_profiles(query: str, profiles: Dict) -> Dict:
             SystemMessage(content="Answer True if the profile matches the query, else False."),
             HumanMessage(content=f"Query: {query}\nProfile: {json.dumps(profile)}")
         ]
-        response = llm.invoke(messages)
+        response = get_chat_model().invoke(messages)
         is_match = response.content.strip().lower() == "true"
         if is_match:
             filtered_profiles[candidate_id] = profile
@@ -1,14 +1,7 @@
 import logging
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage
 from typing import Dict
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize OpenAI LLM
-summarizer_llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+from utils.model_registry import get_chat_model
 
 def generate_structured_summary(profile: Dict) -> str:
     """
@@ -22,7 +15,7 @@ def generate_structured_summary(profile: Dict) -> str:
 
     Profile: {profile}
     """
-    response = summarizer_llm.invoke([SystemMessage(content=prompt)])
+    response = get_chat_model().invoke([SystemMessage(content=prompt)])
     return response.content.strip()
 
 
@@ -35,5 +28,5 @@ def generate_query_summary(user_query: str) -> str:
 
     Query: {user_query}
     """
-    response = summarizer_llm.invoke([SystemMessage(content=prompt)])
+    response = get_chat_model().invoke([SystemMessage(content=prompt)])
     return response.content.strip()
@@ -43,3 +43,26 @@ Deduplicate any duplications you may find on any field, such as the lists of ski
 Respond in JSON format with fields: "name", "Summary", "Experience", "Education", "Skills". If you don't have any information, leave the field empty, and you can use unknown value only if the value was unknown on all of the sources.
 """
 
+# Appended to an extraction prompt when several documents are packed into one request
+BATCH_EXTRACTION_PROMPT = """
+You will receive several documents at once, as a JSON object mapping document ids to documents. Apply the instructions above to each document independently, never mixing information between documents.
+Respond with a single JSON object mapping every document id to its own extraction result (a JSON object with the fields described above). Include every document id exactly once, and nothing else.
+"""
+
+# Appended to INTERVIEW_PROMPT when a long transcript is extracted chunk by chunk
+INTERVIEW_CHUNK_PROMPT = """
+The text you receive is only an excerpt of a longer interview transcript. Extract only what this excerpt states; other excerpts are processed separately, so leave fields empty rather than guessing what the rest of the interview says.
+"""
+
+INTERVIEW_MERGE_PROMPT = """
+You're excellent at combining information while being very honest, you never make up information. You will receive a JSON object with the extractions ("partials") made from consecutive excerpts of the same interview transcript, a draft merge of them ("draft"), and the conflicts found while merging ("conflicts"), where two excerpts state different values for the same field.
+Resolve each conflict using the partials (prefer the most specific value, and the later excerpt when the candidate corrects themselves), keep every other entry of the draft unchanged, and do NOT make up any information.
+Make sure the duration_years is not in str format but rather in int or float.
+Respond in JSON format with fields: "name", "Experience", "Education", "Skills".
+"""
+
+JSON_REPAIR_PROMPT = """
+You're fixing an answer that did not match the expected JSON format. You will receive a JSON object with the original "instructions", the original "input", the "answer" decoded so far (null if it could not be parsed at all) and the "invalid_fields" with what is wrong with each of them ("*" means the whole answer).
+Re-do the extraction for the invalid fields only, following the original instructions and using only the original input; never make up information.
+Respond with a single JSON object containing only the invalid fields (or the whole answer when "*" is invalid), with no markdown formatting and no other text.
+"""
@@ -1,4 +1,4 @@
-import numpy as np
+from utils.similarity import search_embeddings
 
 # Function to query candidates based on embeddings
 def query_candidates(query, embeddings, model, top_k=1):
@@ -6,14 +6,5 @@ def query_candidates(query, embeddings, model, top_k=1):
     # Generate embedding for the query
     query_embedding = model.encode(query, convert_to_numpy=True)
 
-    # Compute similarity scores
-    results = []
-    for candidate_id, candidate_embedding in embeddings.items():
-        similarity = np.dot(query_embedding, candidate_embedding) / (
-            np.linalg.norm(query_embedding) * np.linalg.norm(candidate_embedding)
-        )
-        results.append((candidate_id, similarity))
-
-    # Sort results by similarity score
-    results = sorted(results, key=lambda x: x[1], reverse=True)
-    return results[:top_k]
\ No newline at end of file
+    # Score all candidates at once and keep the best top_k
+    return search_embeddings(embeddings, query_embedding, top_k)
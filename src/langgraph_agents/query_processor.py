@@ -1,22 +1,18 @@
 import json
 from typing import Dict, List
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
-from sentence_transformers import SentenceTransformer
-import numpy as np
-import faiss
 from langgraph.graph import Graph
 from typing import Annotated, Dict, List, Tuple
 import operator
-from dotenv import load_dotenv
 import os
+from utils.model_registry import get_chat_model, get_sentence_transformer
+from utils.vector_index import VECTOR_INDEX_KIND, open_summary_index
+from utils.json_repair import decode_json, WHOLE_RESPONSE
+from utils.profile_store import PROFILES_SEED_PATH, open_profile_store
 
-# Load environment variables
-load_dotenv()
-
-# Initialize models
-llm = ChatOpenAI(model="gpt-4o", temperature=0)
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+# Models, created on first use through the shared registry
+LLM_MODEL = "gpt-4o"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
 def parse_query_agent(state):
     """Agent that understands natural language query and converts it to structured format"""
@@ -29,14 +25,15 @@ def parse_query_agent(state):
         Return: {"experience": 3, "skills": ["Python"]}"""),
         HumanMessage(content=f"Convert to JSON: {query}")
     ]
-    response = llm.invoke(messages)
-    try:
-        state['parsed_query'] = json.loads(response.content)
+    response = get_chat_model(LLM_MODEL).invoke(messages)
+    parsed_query, invalid = decode_json("parse_query", response.content)
+    if invalid:
+        state['parsed_query'] = {"raw_query": query}
+    else:
+        state['parsed_query'] = parsed_query
         print("\nParse Query Step:")
         print(f"Input query: {query}")
         print(f"Parsed query: {state['parsed_query']}")
-    except json.JSONDecodeError:
-        state['parsed_query'] = {"raw_query": query}
     return state
 
 def vector_search_agent(state):
@@ -45,17 +42,13 @@ def vector_search_agent(state):
     query = state['query']
     num_candidates = state.get('num_candidates', 5)  # Configurable, default to 5
     
-    # Create embeddings for profiles and query
-    profile_embeddings = [embedding_model.encode(p['Summary']) for p in profiles.values()]
-    query_embedding = embedding_model.encode(query)
-    
-    # Perform vector search
-    index = faiss.IndexFlatL2(len(query_embedding))
-    index.add(np.array(profile_embeddings))
-    D, I = index.search(query_embedding.reshape(1, -1), num_candidates)
+    # The index is synced at ingestion; searching only reads it, restricted to the given profiles, and
+    # embeds in memory the profiles ingestion has not synced
+    index = open_summary_index(profiles, EMBEDDING_MODEL, kind=state.get('index_kind', VECTOR_INDEX_KIND))
+    query_embedding = get_sentence_transformer(EMBEDDING_MODEL).encode(query)
     
     # Get top candidates
-    state['candidates'] = {list(profiles.keys())[i]: profiles[list(profiles.keys())[i]] for i in I[0]}
+    state['candidates'] = {cid: profiles[cid] for cid, _ in index.search(query_embedding, num_candidates, candidate_ids=profiles)}
     return state
 
 def llm_refinement_agent(state):
@@ -86,26 +79,20 @@ def llm_refinement_agent(state):
     print("\nRefinement Step:")
     print(f"Criteria being checked: {parsed_query}")
     
-    response = llm.invoke(messages)
-    response_text = response.content.strip()
-    
-    # Remove any markdown formatting if present
-    if response_text.startswith('```'):
-        response_text = response_text.split('\n', 1)[1]  # Remove first line
-        response_text = response_text.rsplit('\n', 1)[0]  # Remove last line
-        response_text = response_text.replace('```', '').strip()
-    
-    print(f"Cleaned LLM Response: {response_text[:200]}...")
-    
-    try:
-        results = json.loads(response_text)
-        if isinstance(results, dict) and all(isinstance(v, dict) for v in results.values()):
-            state['results'] = results
-        else:
-            print("Response was valid JSON but not in expected format")
-            state['results'] = {}
-    except json.JSONDecodeError as e:
-        print(f"Failed to parse LLM response as JSON: {e}")
+    response = get_chat_model(LLM_MODEL).invoke(messages)
+    
+    # Markdown fences, surrounding prose and other common JSON slips are repaired locally
+    results, invalid = decode_json("llm_refinement", response.content)
+    
+    print(f"Cleaned LLM Response: {json.dumps(results)[:200]}...")
+    
+    if invalid:
+        print(f"Failed to parse LLM response as JSON: {invalid[WHOLE_RESPONSE]}")
+        state['results'] = {}
+    elif isinstance(results, dict) and all(isinstance(v, dict) for v in results.values()):
+        state['results'] = results
+    else:
+        print("Response was valid JSON but not in expected format")
         state['results'] = {}
     
     print(f"Final matches found: {len(state['results'])}")
@@ -151,13 +138,12 @@ def execute_query(query: str, profiles: Dict, num_candidates: int = 5):
     final_state = workflow.invoke(state)
     return final_state['results']
 
-def load_profiles(file_path):
-    """Load candidate profiles from JSON file"""
-    with open(file_path, 'r') as file:
-        return json.load(file)
+def load_profiles(file_path=PROFILES_SEED_PATH):
+    """Open the candidate profile store, seeded from the consolidator's JSON export on first use"""
+    return open_profile_store(json_path=file_path)
 
 def main():
-    profiles = load_profiles('/Users/jproms/projects/job-candidates-ai-agents/data/profiles_candidates2.json')
+    profiles = load_profiles()
     # natural_language_query = "Find a candidate with less than 4 years of work experience"
     natural_language_query = "Find just one candidate with Python skills"
     results = execute_query(natural_language_query, profiles)
@@ -1,7 +1,20 @@
-from typing import TypedDict, Dict, List
+from typing import Annotated, Any, Dict, List, TypedDict, Union
 
-class AgentState(TypedDict):
-    cv_data: Dict[str, Dict[str, str]]
-    linkedin_data: Dict[str, Dict[str, List[str]]]
-    interview_data: Dict[str, Dict[str, Dict[str, str]]]
-    profiles: Dict[str, Dict[str, Dict[str, str]]]
+def merge_dicts(left: Dict, right: Dict) -> Dict:
+    """
+    Reducer that merges a keyed update into the existing dict instead of replacing it.
+    """
+    if not left:
+        return right or {}
+    if not right:
+        return left
+    return {**left, **right}
+
+class AgentState(TypedDict, total=False):
+    # Raw inputs on entry, replaced by the parsed documents keyed by candidate id.
+    # Each key is written by exactly one parser branch, so last-value semantics are enough.
+    cv_data: Dict[str, Any]
+    linkedin_data: Union[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]
+    interview_data: Dict[str, Any]
+    # Synthesized profiles, merged per candidate so partial results can be joined.
+    profiles: Annotated[Dict[str, Dict[str, Any]], merge_dicts]
@@ -1,7 +1,9 @@
 import os
 from dotenv import load_dotenv
-from langgraph_agents.profile_agent import create_profile_graph, synthesis_node
-from langgraph_agents.search_agent import search_profiles
+from langgraph_agents.graph_builder import create_profile_graph
+from langgraph_agents.nodes import synthesis_node
+from langgraph_agents.search_agent import search_candidates
+from utils.ingestion_checkpoint import get_graph_checkpointer, run_resumable
 
 # Load environment variables
 load_dotenv()
@@ -24,7 +26,7 @@ interview_data = {
 
 # Initialize graph and data
 profile_graph = create_profile_graph()
-compiled_graph = profile_graph.compile()
+compiled_graph = profile_graph.compile(checkpointer=get_graph_checkpointer())
 initial_state = {
     "linkedin_data": linkedin_data,
     "cv_data": cv_data,
@@ -47,7 +49,7 @@ def test_query():
         }
     }
     query = "Find profiles with at least 5 years of experience and skills in Python."
-    search_results = search_profiles(profiles_db, query)
+    search_results = search_candidates(query, profiles_db)
     print("Test Query Results:", search_results)
 
 
@@ -113,14 +115,13 @@ def main():
     compiled_graph.get_graph().draw_png('graph_visualization.png')
 
     print("Processing profiles...")
-    thread = {"configurable": {"thread_id": "1"}}
-    global_state = initial_state.copy()
 
-    # Process nodes using stream
-    for state in compiled_graph.stream(initial_state, thread):
-        global_state.update(state)
-        print(f"State After Node Execution: {state}")
-        print(f"Global State: {global_state}")
+    # Process nodes using stream; parser branches run in parallel and each update is keyed by node name.
+    # An interrupted run over the same inputs is resumed from its checkpoint instead of starting over,
+    # and documents already parsed or synthesized within an unfinished node are reused as well
+    global_state = run_resumable(
+        compiled_graph, initial_state, on_update=lambda state: print(f"State After Node Execution: {state}")
+    )
 
     # Debug global state at the end
     print("Final Global State:", global_state)
@@ -135,7 +136,7 @@ def main():
 
         # Example query
         query = "Find profiles with at least 5 years of experience and skills in Python."
-        results = search_profiles(profiles, query)
+        results = search_candidates(query, profiles)
         print("Search Results:", results)
 
 from langgraph.graph import StateGraph
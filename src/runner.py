@@ -2,16 +2,15 @@ import os
 import json
 from langgraph_agents.query_agent import interpret_and_filter_profiles, validate_and_convert_profiles
 from utils.file_loader import export_to_json
+from utils.profile_store import open_profile_store
 from src import DATA_DIR
 
 # Paths
-PROFILES_JSON_PATH = os.path.join(DATA_DIR, "profiles_candidates.json")
 QUERY_RESULTS_PATH = os.path.join(DATA_DIR, "query_results.json")
 
 # Load profiles
-print("Loading profiles from cached JSON...")
-with open(PROFILES_JSON_PATH, "r") as f:
-    profiles_candidates = validate_and_convert_profiles(json.load(f))
+print("Loading profiles from the profile store...")
+profiles_candidates = validate_and_convert_profiles(open_profile_store())
 
 # Run query agent
 print("\n===== Running Query Agent =====")
@@ -0,0 +1,57 @@
+import os
+import json
+import logging
+import time
+from langgraph_agents.matching_engine import match_queries
+from langgraph_agents.search_agent import generate_and_cache_embeddings
+from utils.file_loader import export_to_json
+from utils.llm_scheduler import Priority, llm_priority
+from utils.model_registry import get_openai_embeddings
+from utils.profile_store import open_profile_store
+from src import DATA_DIR
+
+# Paths
+REQUISITIONS_PATH = os.path.join(DATA_DIR, "requisitions.json")
+SCREENING_RESULTS_PATH = os.path.join(DATA_DIR, "screening_results.json")
+
+# Candidates shortlisted per requisition
+TOP_K = int(os.getenv("SCREENING_TOP_K", "10"))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def load_requisitions(path=REQUISITIONS_PATH):
+    """
+    Open requisitions as {requisition_id: query}, from a JSON object of that shape or a list of query strings.
+    """
+    with open(path, "r") as file:
+        requisitions = json.load(file)
+    if isinstance(requisitions, list):
+        return {f"requisition_{i}": query for i, query in enumerate(requisitions)}
+    return requisitions
+
+def screen_requisitions(requisitions, profiles, top_k=TOP_K):
+    """
+    Shortlist the best candidates of every requisition: the profiles are embedded through the shared cache,
+    the requisitions in batches, and all of them are scored against all candidates in blocks.
+    """
+    # Screening is bulk work and yields to interactive queries in the shared scheduler
+    with llm_priority(Priority.BULK):
+        embeddings = generate_and_cache_embeddings(profiles)
+        matches = match_queries(list(requisitions.values()), get_openai_embeddings(), embeddings, top_k)
+    return {
+        requisition_id: [{"candidate_id": candidate_id, "similarity": score} for candidate_id, score in sorted_candidates]
+        for requisition_id, sorted_candidates in zip(requisitions, matches)
+    }
+
+def main():
+    profiles = open_profile_store()
+    requisitions = load_requisitions()
+    logging.info(f"Screening {len(requisitions)} requisitions against {len(profiles)} candidates")
+    start = time.perf_counter()
+    results = screen_requisitions(requisitions, profiles)
+    logging.info(f"Screened {len(requisitions)} requisitions in {time.perf_counter() - start:.1f}s")
+    export_to_json(results, SCREENING_RESULTS_PATH)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,26 @@
 import os
 import json
+import asyncio
 import logging
-from utils.file_loader import load_text_files, load_json
-from langgraph_agents.nodes import cv_parser_node, linkedin_parser_node, interview_summarizer_node, synthesize_profiles
+from utils.file_loader import load_text_files, load_json, NDJSONProfileWriter
+from utils.preprocessor import candidate_id_from_file_name, candidate_id_from_position
+from langgraph_agents.nodes import cv_parser_node, linkedin_parser_node, interview_summarizer_node, synthesize_profiles, aparse_candidate, asynthesize_profile, normalize_skills
 from langgraph_agents.profile_agent import query_profiles, refine_profiles
+from utils.llm_cache import get_llm_cache
+from utils.llm_scheduler import Priority, get_llm_scheduler, llm_priority
+from utils.json_repair import get_decode_stats
+from utils.ingestion_manifest import IngestionManifest
+from utils.profile_store import PROFILES_SEED_PATH, open_profile_store
+from utils.structured_index import get_structured_index
+from utils.embeddings_cache import get_profile_embedding_cache
+from utils.vector_index import sync_summary_index
+from langgraph_agents.embeddings_agent import EmbeddingsAgent
 from src import DATA_DIR
 
+# Paths
+PROFILES_NDJSON_PATH = os.path.join(DATA_DIR, "profiles_candidates2.ndjson")
+MANIFEST_PATH = os.path.join(DATA_DIR, "ingestion_manifest.json")
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -34,10 +49,69 @@ def load_data():
         logging.error(f"Error loading data: {e}")
         return None
 
-def main():
+def load_changed_data(manifest):
+    """
+    Like `load_data`, but only returns the source documents that are new or changed since the last run.
+    """
+    try:
+        return {
+            "cv_data": manifest.scan_text_files(os.path.join(DATA_DIR, "cvs"), "cv"),
+            "linkedin_data": manifest.scan_linkedin(os.path.join(DATA_DIR, "linkedin_profiles.json")),
+            "interview_data": manifest.scan_text_files(os.path.join(DATA_DIR, "interviews"), "interview"),
+        }
+    except Exception as e:
+        logging.error(f"Error loading data: {e}")
+        return None
+
+def ingest_incrementally():
+    """
+    Re-parse only the changed source documents, re-synthesize only the candidates with at least
+    one changed source, and upsert them into the profile store.
+    """
+    manifest = IngestionManifest(MANIFEST_PATH)
+    state = load_changed_data(manifest)
+    if state is None:
+        return None
+
+    affected = manifest.affected_candidates()
+    changed_documents = sum(len(documents) for documents in state.values())
+    logging.info(f"{changed_documents} changed documents, {len(affected)} candidates to re-synthesize.")
+
+    # Run nodes on the changed documents only
+    if state["cv_data"]:
+        logging.info("Running CV Parser Node")
+        manifest.record_parsed("cv", cv_parser_node(state)["cv_data"])
+    if state["linkedin_data"]:
+        logging.info("Running LinkedIn Parser Node")
+        manifest.record_parsed("linkedin", linkedin_parser_node(state)["linkedin_data"])
+    if state["interview_data"]:
+        logging.info("Running Interview Summarizer Node")
+        manifest.record_parsed("interview", interview_summarizer_node(state)["interview_data"])
+
+    synthesized = {}
+    if affected:
+        logging.info("Running Synthesis Node")
+        synthesized = synthesize_profiles(
+            manifest.parsed_sources("cv", affected),
+            manifest.parsed_sources("linkedin", affected),
+            manifest.parsed_sources("interview", affected)
+        )
+
+    # Upsert into the store, seeded from the legacy JSON export; candidates left without a CV are dropped
+    profiles_candidates = open_profile_store()
+    profiles_candidates.delete(affected - synthesized.keys())
+    profiles_candidates.upsert_many(synthesized)
+
+    manifest.save(synthesized)
+    return profiles_candidates
+
+def ingest_all():
+    """
+    Parse every source document, synthesize every candidate from scratch and replace the profile store with them.
+    """
     state = load_data()
     if not state:
-        return
+        return None
 
     # Run nodes
     logging.info("Running CV Parser Node")
@@ -59,7 +133,115 @@ def main():
         interview_results["interview_data"]
     )
 
-    export_to_json(profiles_candidates, f"{DATA_DIR}/profiles_candidates2.json")
+    store = open_profile_store(json_path=None)
+    store.replace_all(profiles_candidates)
+    return store
+
+def iter_candidate_sources():
+    """
+    Yield (candidate_id, documents) one candidate at a time, `documents` mapping each source the candidate has
+    (`cv`, `linkedin`, `interview`) to its manifest document id and content. CV and interview files are read
+    only when their candidate is reached. A candidate is keyed by its CV file.
+    """
+    linkedin_data = load_json(os.path.join(DATA_DIR, "linkedin_profiles.json"))
+    linkedin_by_candidate = {candidate_id_from_position(i): profile for i, profile in enumerate(linkedin_data)}
+    cv_dir = os.path.join(DATA_DIR, "cvs")
+    for filename in sorted(os.listdir(cv_dir)):
+        if not filename.endswith(".txt"):
+            continue
+        candidate_id = candidate_id_from_file_name(filename, "cv")
+        with open(os.path.join(cv_dir, filename), "r") as file:
+            documents = {"cv": (f"cv/{filename}", file.read())}
+        if linkedin_by_candidate.get(candidate_id):
+            documents["linkedin"] = (f"linkedin/{candidate_id}", linkedin_by_candidate[candidate_id])
+        interview_filename = filename.replace("cv_", "interview_", 1)
+        interview_path = os.path.join(DATA_DIR, "interviews", interview_filename)
+        if os.path.exists(interview_path):
+            with open(interview_path, "r") as file:
+                documents["interview"] = (f"interview/{interview_filename}", file.read())
+        yield candidate_id, documents
+
+async def _ingest_one(candidate_id, documents):
+    """
+    Parse and synthesize one candidate. Returns its profile and {doc_id: (content, parsed)} for its sources,
+    empty when ingestion failed.
+    """
+    contents = {kind: content for kind, (_, content) in documents.items()}
+    try:
+        parsed = await aparse_candidate(candidate_id, contents["cv"], contents.get("linkedin"), contents.get("interview"))
+        profile = await asynthesize_profile(candidate_id, *parsed)
+    except Exception as e:
+        logging.error(f"Failed to ingest {candidate_id}: {e}")
+        return candidate_id, {"error": f"Failed to ingest candidate: {e}"}, {}
+    parsed = dict(zip(("cv", "linkedin", "interview"), parsed))
+    return candidate_id, profile, {doc_id: (content, parsed[kind]) for kind, (doc_id, content) in documents.items()}
+
+async def ingest_streaming(output_path=PROFILES_NDJSON_PATH, max_in_flight=8):
+    """
+    Push each candidate through parse -> synthesize -> write as soon as its sources are read. Every finished
+    profile is appended to an NDJSON file and its offset index, upserted into the profile store and recorded,
+    with its parsed sources, in the ingestion manifest, so incremental runs pick up from a streamed one.
+    At most `max_in_flight` candidates are held in memory at a time.
+    """
+    # Every source is re-ingested, so nothing recorded by earlier runs is kept
+    manifest = IngestionManifest(MANIFEST_PATH)
+    manifest.clear()
+    store = open_profile_store(json_path=None)
+    in_flight, written = set(), set()
+
+    def write(task):
+        candidate_id, profile, documents = task.result()
+        output.write(candidate_id, profile)
+        store.upsert(candidate_id, profile)
+        manifest.record_candidate(candidate_id, documents, profile)
+        written.add(candidate_id)
+
+    try:
+        with NDJSONProfileWriter(output_path, truncate=True) as output:
+            for candidate_id, documents in iter_candidate_sources():
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        write(task)
+                in_flight.add(asyncio.create_task(_ingest_one(candidate_id, documents)))
+            while in_flight:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    write(task)
+        # Candidates whose CV is gone
+        store.delete(set(store.ids()) - written)
+    finally:
+        # An interrupted run still records the candidates it wrote
+        manifest.save({})
+    logging.info(f"Streamed {len(written)} profiles to {output_path}")
+    return len(written)
+
+def main(mode="full"):
+    """
+    Ingest the candidate sources (`full`, `incremental` or `streaming`), export the pool as JSON and run an example search.
+    Every mode leaves the pool in the profile store, which the search then reads profiles from lazily.
+    """
+    if mode == "streaming":
+        asyncio.run(ingest_streaming())
+        profiles_candidates = open_profile_store(json_path=None)
+    else:
+        profiles_candidates = ingest_incrementally() if mode == "incremental" else ingest_all()
+    if profiles_candidates is None:
+        return
+    # JSON export of the whole pool, which also seeds fresh profile stores
+    export_to_json(dict(profiles_candidates.items()), PROFILES_SEED_PATH)
+    # Skill, degree and experience indexes for pre-filtering searches, rebuilt for the ingested pool
+    get_structured_index(profiles_candidates, normalize_skills, rebuild=True)
+    # Profile embeddings of the ingested pool; stale texts are dropped here, never on the query path
+    with llm_priority(Priority.BULK):
+        get_profile_embedding_cache().sync(profiles_candidates)
+        # Vectorstore searched by the embeddings agent, which only reads it
+        EmbeddingsAgent().sync(profiles_candidates)
+    # Summary vectors searched by the query workflow, synced here so searches only read them
+    sync_summary_index(profiles_candidates)
+    logging.info(f"LLM cache: {get_llm_cache().stats()}")
+    logging.info(f"LLM scheduler: {get_llm_scheduler().stats()}")
+    logging.info(f"Response decoding per node: {get_decode_stats()}")
 
     # Step 2: Search Candidates
     logging.info("Running Search")
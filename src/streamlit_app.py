@@ -1,23 +1,26 @@
 import streamlit as st
-import json
 from langgraph_agents.query_agent import interpret_and_filter_profiles
 from langgraph_agents.embeddings_agent import EmbeddingsAgent
-from utils.file_loader import load_json
-from src import DATA_DIR
+from utils.profile_store import open_profile_store
+from src import ROOT_DIR
 
 # Paths
-PROFILES_JSON_PATH = f"{DATA_DIR}/profiles_candidates.json"
+VECTORSTORE_PATH = f"{ROOT_DIR}/.cache/vectorstore"
 
 
-# Load candidate profiles
-@st.cache_data
+# Open the candidate profile store once; profiles are read from it lazily, per query
+@st.cache_resource
 def load_profiles():
-    with open(PROFILES_JSON_PATH, "r") as f:
-        return json.load(f)
+    return open_profile_store()
 
 
-# Initialize embeddings agent
-embeddings_agent = EmbeddingsAgent()
+# Create the embeddings agent once; it reads the vectorstore synced at ingestion, reloading it when it changes
+@st.cache_resource
+def load_embeddings_agent():
+    return EmbeddingsAgent(vectorstore_path=VECTORSTORE_PATH)
+
+
+embeddings_agent = load_embeddings_agent()
 
 # Streamlit UI
 st.title("Candidate Search App")
@@ -0,0 +1,91 @@
+import contextvars
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Texts per forward pass of a local encoder
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+# Texts per embed_documents request of a remote embedder, and requests in flight at a time
+REMOTE_EMBEDDING_BATCH_SIZE = int(os.getenv("REMOTE_EMBEDDING_BATCH_SIZE", "256"))
+REMOTE_EMBEDDING_MAX_CONCURRENCY = int(os.getenv("REMOTE_EMBEDDING_MAX_CONCURRENCY", "4"))
+
+# Sorted texts handed to a local encoder per call, so progress is logged and memory stays bounded on large corpora
+LOCAL_ENCODE_CHUNK = 8192
+
+def is_local_encoder(embedder) -> bool:
+    """
+    Local sentence-transformers style encoders expose `encode`; LangChain embedders expose `embed_documents`.
+    """
+    return hasattr(embedder, "encode") and not hasattr(embedder, "embed_documents")
+
+@contextmanager
+def encode_pool(model, processes: Optional[int] = None) -> Iterator[Any]:
+    """
+    Multi-process encode pool of a sentence-transformers model, stopped on exit. `processes` CPU workers
+    are started (all GPUs, or 4 CPU workers, when None).
+    """
+    pool = model.start_multi_process_pool(["cpu"] * processes if processes else None)
+    try:
+        yield pool
+    finally:
+        model.stop_multi_process_pool(pool)
+
+def _encode_local(model, texts: Sequence[str], batch_size: int, pool=None) -> np.ndarray:
+    # Longest first: each batch then holds texts of similar length, so little of it is padding
+    order = np.argsort([-len(text) for text in texts], kind="stable")
+    sorted_texts = [texts[i] for i in order]
+    parts = []
+    for start in range(0, len(sorted_texts), LOCAL_ENCODE_CHUNK):
+        chunk = sorted_texts[start:start + LOCAL_ENCODE_CHUNK]
+        if pool is not None:
+            parts.append(model.encode_multi_process(chunk, pool, batch_size=batch_size))
+        else:
+            parts.append(model.encode(chunk, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False))
+        logger.debug(f"Encoded {start + len(chunk)}/{len(sorted_texts)} texts")
+    vectors = np.empty((len(texts), parts[0].shape[1]), dtype=np.float32)
+    vectors[order] = np.concatenate(parts)
+    return vectors
+
+def _embed_remote(embedder, texts: Sequence[str], batch_size: int, max_concurrency: int) -> np.ndarray:
+    chunks = [list(texts[start:start + batch_size]) for start in range(0, len(texts), batch_size)]
+    # Each request runs in its own copy of the caller's context, so e.g. its scheduling priority applies
+    contexts = [contextvars.copy_context() for _ in chunks]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(chunks)))) as executor:
+        results = list(executor.map(
+            lambda context, chunk: context.run(embedder.embed_documents, chunk), contexts, chunks
+        ))
+    return np.asarray([vector for chunk in results for vector in chunk], dtype=np.float32)
+
+def embed_texts(
+    embedder,
+    texts: Sequence[str],
+    batch_size: Optional[int] = None,
+    pool=None,
+    max_concurrency: int = REMOTE_EMBEDDING_MAX_CONCURRENCY,
+) -> np.ndarray:
+    """
+    Embed texts in batches and return a (len(texts), dim) float32 matrix in input order.
+
+    A local encoder (SentenceTransformer) gets the texts sorted by length, `batch_size` per forward pass,
+    through an optional `encode_pool`. A remote LangChain embedder gets `embed_documents` requests of
+    `batch_size` texts, at most `max_concurrency` in flight.
+    """
+    texts = list(texts)
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    if is_local_encoder(embedder):
+        return _encode_local(embedder, texts, batch_size or LOCAL_EMBEDDING_BATCH_SIZE, pool)
+    return _embed_remote(embedder, texts, batch_size or REMOTE_EMBEDDING_BATCH_SIZE, max_concurrency)
+
+def embed_mapping(embedder, texts_by_id, **kwargs) -> dict:
+    """
+    `{id: embedding}` for a `{id: text}` mapping, embedded with `embed_texts`.
+    """
+    ids = list(texts_by_id)
+    vectors = embed_texts(embedder, [texts_by_id[key] for key in ids], **kwargs)
+    return dict(zip(ids, vectors))
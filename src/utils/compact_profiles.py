@@ -0,0 +1,291 @@
+import zlib
+from array import array
+from collections.abc import Mapping
+from enum import IntFlag
+from typing import Dict, Iterator, List, Optional, Tuple
+
+class Source(IntFlag):
+    CV = 1
+    LINKEDIN = 2
+    INTERVIEW = 4
+
+# Provenance labels, in the order the add_source_* functions list them
+SOURCE_LABELS = (("CV", Source.CV), ("LinkedIn", Source.LINKEDIN), ("Interview", Source.INTERVIEW))
+
+# Entry fields whose values repeat across candidates and are stored once, shared by every entry
+INTERNED_KEYS = frozenset({"title", "company", "duration_years", "degree", "institution", "year"})
+
+# Free-text fields that are unique per candidate; values this long are kept zlib-compressed
+COMPRESSED_KEYS = frozenset({"Summary", "description"})
+COMPRESS_MIN_CHARS = 128
+
+SOURCE_BITS = len(SOURCE_LABELS)
+SOURCE_MASK = (1 << SOURCE_BITS) - 1
+
+# `source` lists for every combination of flags
+_SOURCE_LISTS = tuple(
+    tuple(label for label, flag in SOURCE_LABELS if flags & flag) for flags in range(1 << SOURCE_BITS)
+)
+_SOURCE_CODES = {labels: flags for flags, labels in enumerate(_SOURCE_LISTS)}
+
+def encode_sources(labels) -> Optional[int]:
+    """
+    Bitflags of a `source` list, or None when the list cannot be rebuilt from flags
+    (unknown labels, duplicates or a different order).
+    """
+    if not isinstance(labels, list):
+        return None
+    return _SOURCE_CODES.get(tuple(labels))
+
+def decode_sources(flags: int) -> List[str]:
+    return list(_SOURCE_LISTS[flags])
+
+def _pack_text(value):
+    if isinstance(value, str) and len(value) >= COMPRESS_MIN_CHARS:
+        packed = zlib.compress(value.encode("utf-8"))
+        if len(packed) < len(value):
+            return packed
+    return value
+
+def _unpack_text(value):
+    # JSON values are never bytes, so bytes are always a compressed text
+    return zlib.decompress(value).decode("utf-8") if isinstance(value, bytes) else value
+
+class Vocabulary:
+    """
+    Interned strings with dense integer ids.
+    """
+    __slots__ = ("ids", "strings")
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, value: str) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return value_id
+
+    def get_id(self, value: str) -> Optional[int]:
+        return self.ids.get(value)
+
+    def __getitem__(self, value_id: int) -> str:
+        return self.strings[value_id]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+class SourcedSkills(array):
+    """
+    Skills with provenance, one `skill_id << SOURCE_BITS | flags` item per skill.
+    A plain list of skill names is stored as a bare `array("I")` of ids.
+    """
+    __slots__ = ()
+
+class CompactEntry(tuple):
+    """
+    Experience/Education entry as one tuple: the shared tuple of its keys, its `source` list as Source
+    flags (None when the list is kept as is among the values), then its values in key order.
+    """
+    __slots__ = ()
+
+    @property
+    def layout(self) -> tuple:
+        return self[0]
+
+    @property
+    def sources(self) -> Optional[int]:
+        return self[1]
+
+    @property
+    def values(self) -> tuple:
+        return self[2:]
+
+class CompactProfile(tuple):
+    """
+    Profile as one tuple: the shared tuple of its keys, then its values in key order, with Experience/Education
+    as tuples of CompactEntry, Skills as an array of vocabulary ids and long texts as zlib-compressed bytes.
+    """
+    __slots__ = ()
+
+    @property
+    def layout(self) -> tuple:
+        return self[0]
+
+    @property
+    def values(self) -> tuple:
+        return self[1:]
+
+class CompactProfiles(Mapping):
+    """
+    Compact in-memory pool of synthesized profiles that reads like the `{candidate_id: profile}` dict
+    the agents expect.
+
+    Skill names are interned in `skills` and stored per candidate as an array of ids, provenance lists
+    as Source bitflags, repeated entry fields (title, company, degree, ...) and key layouts are shared
+    across candidates, and long Summary/description texts are zlib-compressed. Profiles and entries are single
+    tuples, without a dict or list per entry.
+
+    Looking a candidate up rebuilds its profile in the original dict shape, key order included, from those
+    shared strings, so prompts built with `json.dumps` are unchanged. Parts that do not fit the compact form
+    (unknown source labels, other skill shapes) are kept as they are.
+    """
+
+    def __init__(self, profiles: Optional[Mapping] = None):
+        self.skills = Vocabulary()
+        self._strings: Dict[str, str] = {}
+        self._layouts: Dict[tuple, tuple] = {}
+        self._profiles: Dict[str, CompactProfile] = {}
+        for candidate_id, profile in (profiles or {}).items():
+            self.add(candidate_id, profile)
+
+    def _layout(self, keys) -> tuple:
+        keys = tuple(keys)
+        return self._layouts.setdefault(keys, keys)
+
+    def _entry(self, entry):
+        if not isinstance(entry, dict):
+            return entry
+        sources = encode_sources(entry.get("source")) if "source" in entry else None
+        values = (
+            None if key == "source" and sources is not None
+            else self._strings.setdefault(value, value) if key in INTERNED_KEYS and isinstance(value, str)
+            else _pack_text(value) if key in COMPRESSED_KEYS
+            else value
+            for key, value in entry.items()
+        )
+        return CompactEntry((self._layout(entry), sources, *values))
+
+    def _skills(self, skills):
+        """
+        Array form of a Skills list, or the list itself when it does not fit one.
+        """
+        if not isinstance(skills, list):
+            return skills
+        if all(isinstance(skill, str) for skill in skills):
+            return array("I", map(self.skills.intern, skills))
+        packed = SourcedSkills("I")
+        for skill in skills:
+            if not isinstance(skill, dict) or tuple(skill) != ("skill", "source") or not isinstance(skill["skill"], str):
+                return skills
+            source_flags = encode_sources(skill["source"])
+            if source_flags is None:
+                return skills
+            packed.append(self.skills.intern(skill["skill"]) << SOURCE_BITS | source_flags)
+        return packed
+
+    def compress(self, profile: Dict) -> CompactProfile:
+        """
+        Compact form of a profile dict, interning its strings in this pool.
+        """
+        if not isinstance(profile, dict):
+            raise TypeError(f"Expected a profile dict, got {type(profile).__name__}")
+        values = []
+        for key, value in profile.items():
+            if key == "Skills":
+                value = self._skills(value)
+            elif key in ("Experience", "Education") and isinstance(value, list):
+                value = tuple(self._entry(entry) for entry in value)
+            elif key in COMPRESSED_KEYS:
+                value = _pack_text(value)
+            values.append(value)
+        return CompactProfile((self._layout(profile), *values))
+
+    def _expand_value(self, value):
+        if isinstance(value, SourcedSkills):
+            names = self.skills.strings
+            return [
+                {"skill": names[item >> SOURCE_BITS], "source": list(_SOURCE_LISTS[item & SOURCE_MASK])}
+                for item in value
+            ]
+        if isinstance(value, array):
+            return [self.skills[skill_id] for skill_id in value]
+        if isinstance(value, tuple):
+            return [self._expand_entry(entry) for entry in value]
+        return _unpack_text(value)
+
+    def expand(self, compact: CompactProfile) -> Dict:
+        """
+        Rebuild the profile dict of a compact profile.
+        """
+        return {key: self._expand_value(value) for key, value in zip(compact.layout, compact.values)}
+
+    @staticmethod
+    def _expand_entry(entry):
+        if not isinstance(entry, CompactEntry):
+            return entry
+        expanded = {key: _unpack_text(value) for key, value in zip(entry.layout, entry.values)}
+        if entry.sources is not None:
+            expanded["source"] = list(_SOURCE_LISTS[entry.sources])
+        return expanded
+
+    def add(self, candidate_id: str, profile: Dict) -> None:
+        self._profiles[candidate_id] = self.compress(profile)
+
+    def discard(self, candidate_id: str) -> None:
+        self._profiles.pop(candidate_id, None)
+
+    def compact(self, candidate_id: str) -> CompactProfile:
+        return self._profiles[candidate_id]
+
+    def _compact_field(self, candidate_id: str, key: str, default=None):
+        compact = self._profiles[candidate_id]
+        return compact.values[compact.layout.index(key)] if key in compact.layout else default
+
+    def field(self, candidate_id: str, key: str, default=None):
+        """
+        One field of a candidate's profile, as the profile dict holds it, without rebuilding the rest:
+        `field(candidate_id, "Summary")` only inflates the Summary.
+        """
+        compact = self._profiles[candidate_id]
+        if key not in compact.layout:
+            return default
+        return self._expand_value(compact.values[compact.layout.index(key)])
+
+    def fields(self, key: str, default=None) -> Iterator[Tuple[str, object]]:
+        """
+        (candidate_id, value) of one field for every candidate, e.g. the Summaries to embed.
+        """
+        for candidate_id in self._profiles:
+            yield candidate_id, self.field(candidate_id, key, default)
+
+    def skill_names(self, candidate_id: str) -> List[str]:
+        """
+        Skill names of a candidate, read from the vocabulary without building the skill dicts.
+        """
+        skills = self._compact_field(candidate_id, "Skills")
+        if isinstance(skills, SourcedSkills):
+            return [self.skills[item >> SOURCE_BITS] for item in skills]
+        if isinstance(skills, array):
+            return [self.skills[skill_id] for skill_id in skills]
+        # Skills kept as they were given
+        return [
+            skill if isinstance(skill, str) else skill.get("skill")
+            for skill in skills if isinstance(skill, str) or isinstance(skill, dict) and isinstance(skill.get("skill"), str)
+        ] if isinstance(skills, list) else []
+
+    def skill_sources(self, candidate_id: str) -> Dict[str, Source]:
+        """
+        Skills of a candidate with their provenance flags, without rebuilding the profile.
+        """
+        skills = self._compact_field(candidate_id, "Skills")
+        if not isinstance(skills, SourcedSkills):
+            return {}
+        return {self.skills[item >> SOURCE_BITS]: Source(item & SOURCE_MASK) for item in skills}
+
+    def __getitem__(self, candidate_id: str) -> Dict:
+        return self.expand(self._profiles[candidate_id])
+
+    def __contains__(self, candidate_id) -> bool:
+        return candidate_id in self._profiles
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._profiles)
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        return {candidate_id: self.expand(compact) for candidate_id, compact in self._profiles.items()}
@@ -0,0 +1,128 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+SECTION_RE = re.compile(
+    r"^(?P<section>experience|work experience|professional experience|education|skills|technical skills)\s*:\s*(?P<rest>.*)$",
+    re.IGNORECASE
+)
+BULLET_RE = re.compile(r"^[-*•]\s*(?P<item>.+)$")
+DURATION = r"(?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>years?|yrs?|months?)"
+EXPERIENCE_PATTERNS = [
+    # Data Scientist at TechCorp: 3 years / Data Scientist at TechCorp (3 years)
+    re.compile(rf"^(?P<title>.+?)\s+at\s+(?P<company>.+?)\s*(?::|,|\(|-)\s*{DURATION}\)?\.?$", re.IGNORECASE),
+    # 5 years in Software Development / 3 years as Data Analyst at Acme
+    re.compile(rf"^{DURATION}\s+(?:in|as|of)\s+(?P<title>.+?)(?:\s+at\s+(?P<company>.+?))?\.?$", re.IGNORECASE),
+    # Data Scientist at TechCorp
+    re.compile(r"^(?P<title>[^:,]+?)\s+at\s+(?P<company>[^:,]+?)\.?$", re.IGNORECASE),
+]
+# A title or company holding a list separator or another duration was read from a line listing several
+# entries ("3 years as lead, 2 years at Acme"); such lines are left unrecognized for the LLM
+MALFORMED_FIELD_RE = re.compile(r"[,;|]|\b\d+(?:\.\d+)?\s*(?:years?|yrs?|months?)\b", re.IGNORECASE)
+# Confidence of a CV with any such line, kept below the fast-path threshold so its entries are not lost
+MALFORMED_CONFIDENCE = 0.5
+DEGREE = r"(?:B\.?Sc|M\.?Sc|B\.?A|M\.?A|B\.?S|M\.?S|B\.?Eng|M\.?Eng|MBA|Ph\.?D|Bachelor|Master|Doctor|Associate)\b"
+EDUCATION_PATTERNS = [
+    # MSc in Data Science, University of Data, 2018
+    re.compile(r"^(?P<degree>[^,]+?)\s*,\s*(?P<institution>[^,]+?)\s*,\s*(?P<year>(?:19|20)\d{2})\.?$"),
+    # MSc in Data Science from University of Data (2018)
+    re.compile(r"^(?P<degree>.+?)\s+(?:from|at)\s+(?P<institution>.+?)(?:\s*[,(]\s*(?P<year>(?:19|20)\d{2})\)?)?\.?$"),
+    # BSc in Computer Science
+    re.compile(rf"^(?P<degree>{DEGREE}.*?)\.?$", re.IGNORECASE),
+]
+NAME_RE = re.compile(r"^[A-Z][\w'.-]*(?:\s+[A-Z][\w'.-]*){1,3}$")
+
+def _duration_years(amount: str, unit: str):
+    years = float(amount) / 12 if unit.lower().startswith("month") else float(amount)
+    return int(years) if years.is_integer() else round(years, 1)
+
+def _parse_experience(item: str) -> Tuple[Optional[Dict], bool]:
+    """
+    The experience entry of a line, or None, and whether the line matched a pattern only with a malformed field.
+    """
+    malformed = False
+    for pattern in EXPERIENCE_PATTERNS:
+        match = pattern.match(item)
+        if not match:
+            continue
+        if any(MALFORMED_FIELD_RE.search(match.group(field) or "") for field in ("title", "company")):
+            malformed = True
+            continue
+        groups = match.groupdict()
+        return {
+            "title": groups["title"].strip(),
+            "company": (groups.get("company") or "unknown").strip(),
+            "duration_years": _duration_years(groups["amount"], groups["unit"]) if groups.get("amount") else "unknown",
+            "description": "",
+        }, False
+    return None, malformed
+
+def _parse_education(item: str) -> Optional[Dict]:
+    for pattern in EDUCATION_PATTERNS:
+        match = pattern.match(item)
+        if match:
+            groups = match.groupdict()
+            return {
+                "degree": groups["degree"].strip(),
+                "institution": (groups.get("institution") or "unknown").strip(),
+                "year": int(groups["year"]) if groups.get("year") else "unknown",
+            }
+    return None
+
+def _parse_skills(item: str) -> List[str]:
+    return [skill.strip() for skill in re.split(r"[,;]", item) if skill.strip()]
+
+def parse_cv_rules(text: str) -> Tuple[Dict, float]:
+    """
+    Deterministically parse a CV laid out as `Experience / Education / Skills` sections, either inline
+    (`Skills: a, b, c`) or as bullet lists, into the `name/Experience/Education/Skills` schema of CV_PROMPT.
+
+    Returns the parsed CV and a confidence in [0, 1]: the share of non-empty lines that were recognized,
+    scaled by the share of the three sections that were found, and at most MALFORMED_CONFIDENCE when an
+    experience line seems to list several entries.
+    """
+    parsed = {"name": "unknown", "Experience": [], "Education": [], "Skills": []}
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return parsed, 0.0
+
+    recognized, malformed, sections, section = 0, False, set(), None
+    for position, line in enumerate(lines):
+        header = SECTION_RE.match(line)
+        if header:
+            name = header.group("section").lower()
+            section = "Skills" if "skills" in name else "Education" if name == "education" else "Experience"
+            sections.add(section)
+            line = header.group("rest").strip()
+            if not line:
+                recognized += 1
+                continue
+        elif section is None:
+            # Preamble: the candidate's name, then an optional headline
+            if position == 0 and NAME_RE.match(line):
+                parsed["name"] = line
+                recognized += 1
+            elif position == 1 and ":" not in line:
+                recognized += 1
+            continue
+        else:
+            bullet = BULLET_RE.match(line)
+            line = bullet.group("item").strip() if bullet else line
+
+        if section == "Skills":
+            skills = _parse_skills(line)
+            parsed["Skills"].extend(skills)
+            recognized += bool(skills)
+        else:
+            if section == "Experience":
+                entry, line_malformed = _parse_experience(line)
+                malformed = malformed or line_malformed
+            else:
+                entry = _parse_education(line)
+            if entry:
+                parsed[section].append(entry)
+                recognized += 1
+
+    confidence = (recognized / len(lines)) * (len(sections) / 3)
+    if malformed:
+        confidence = min(confidence, MALFORMED_CONFIDENCE)
+    return parsed, round(confidence, 3)
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+from collections.abc import Mapping
+from typing import Iterable, List, Optional, Sequence
+import numpy as np
+from numpy.lib.format import open_memmap
+
+# Rows allocated when a store is created; the matrix doubles its capacity whenever it fills up
+INITIAL_CAPACITY = 1024
+
+VECTORS_FILE = "vectors.npy"
+INDEX_FILE = "index.json"
+
+class EmbeddingStore(Mapping):
+    """
+    On-disk embedding store: a contiguous float32 `.npy` matrix opened with mmap, plus an `index.json`
+    header holding the embedding model name, the dimension and the candidate id of every row.
+    Reads like a `{candidate_id: embedding}` dict, so it replaces the pickled embedding caches.
+
+    Opening a store maps the matrix without reading it, so startup does not depend on its size, and
+    processes opening the same store share its pages through the OS page cache. Rows are updated in
+    place and appended into spare capacity; only growing past the capacity copies the matrix, to a
+    file twice as large. Rows `0..len-1` are always the live ones: deleting a row moves the last row into it.
+    """
+
+    def __init__(self, path: str, model: Optional[str] = None, dim: Optional[int] = None, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r") as file:
+                header = json.load(file)
+            if model and header["model"] != model:
+                raise ValueError(f"Embedding store {path} holds {header['model']} embeddings, not {model}")
+            self.model, self.dim, self._ids = header["model"], header["dim"], header["ids"]
+            self._vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r" if readonly else "r+")
+        else:
+            # Created on the first write, once the dimension is known
+            self.model, self.dim, self._ids, self._vectors = model, dim, [], None
+        self._rows = {candidate_id: row for row, candidate_id in enumerate(self._ids)}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, candidate_id) -> bool:
+        return candidate_id in self._rows
+
+    def __iter__(self):
+        return iter(list(self._ids))
+
+    def __getitem__(self, candidate_id: str) -> np.ndarray:
+        if candidate_id not in self._rows:
+            raise KeyError(candidate_id)
+        return self.get(candidate_id)
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        Read-only (len, dim) float32 view of the live rows, backed by the mapped file.
+        """
+        if self._vectors is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        view = self._vectors[:len(self._ids)].view()
+        view.flags.writeable = False
+        return view
+
+    def rows(self, candidate_ids: Iterable[str]) -> np.ndarray:
+        """
+        Row of each id in `matrix`; raises KeyError for an id that is not stored.
+        """
+        return np.fromiter((self._rows[candidate_id] for candidate_id in candidate_ids), dtype=np.int64)
+
+    def get(self, candidate_id: str) -> Optional[np.ndarray]:
+        row = self._rows.get(candidate_id)
+        return None if row is None else np.array(self._vectors[row])
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Move the matrix to a new file of `capacity` rows, keeping the live rows.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        vectors = open_memmap(vectors_path + ".tmp", mode="w+", dtype=np.float32, shape=(capacity, self.dim))
+        if self._vectors is not None:
+            vectors[:len(self._ids)] = self._vectors[:len(self._ids)]
+        vectors.flush()
+        del vectors
+        os.replace(vectors_path + ".tmp", vectors_path)
+        self._vectors = np.load(vectors_path, mmap_mode="r+")
+
+    def _write_index(self) -> None:
+        # The index is written last and atomically: rows it does not list yet are ignored on reopen
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(index_path + ".tmp", "w") as file:
+            json.dump({"model": self.model, "dim": self.dim, "ids": self._ids}, file)
+        os.replace(index_path + ".tmp", index_path)
+
+    def upsert(self, candidate_ids: Sequence[str], vectors) -> None:
+        """
+        Write the vectors of the given candidates, updating their rows in place or appending new rows.
+        """
+        if self.readonly:
+            raise PermissionError(f"Embedding store {self.path} is open read-only")
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(candidate_ids), -1)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+            new_ids = [candidate_id for candidate_id in dict.fromkeys(candidate_ids) if candidate_id not in self._rows]
+            needed = len(self._ids) + len(new_ids)
+            capacity = 0 if self._vectors is None else self._vectors.shape[0]
+            if needed > capacity:
+                while capacity < needed:
+                    capacity = max(capacity * 2, INITIAL_CAPACITY)
+                self._allocate(capacity)
+            for candidate_id in new_ids:
+                self._rows[candidate_id] = len(self._ids)
+                self._ids.append(candidate_id)
+            self._vectors[[self._rows[candidate_id] for candidate_id in candidate_ids]] = vectors
+            self._vectors.flush()
+            self._write_index()
+
+    def delete(self, candidate_ids: Iterable[str]) -> None:
+        """
+        Remove the given candidates, filling each freed row with the current last row.
+        """
+        if self.readonly:
+            raise PermissionError(f"Embedding store {self.path} is open read-only")
+        with self._lock:
+            removed = False
+            for candidate_id in candidate_ids:
+                row = self._rows.pop(candidate_id, None)
+                if row is None:
+                    continue
+                last_id = self._ids.pop()
+                if last_id != candidate_id:
+                    self._vectors[row] = self._vectors[len(self._ids)]
+                    self._ids[row] = last_id
+                    self._rows[last_id] = row
+                removed = True
+            if removed:
+                self._vectors.flush()
+                self._write_index()
+
+    def retain(self, candidate_ids: Iterable[str]) -> None:
+        """
+        Delete every candidate not in `candidate_ids`.
+        """
+        keep = set(candidate_ids)
+        self.delete([candidate_id for candidate_id in self._ids if candidate_id not in keep])
@@ -1,23 +1,244 @@
-from langchain.embeddings import OpenAIEmbeddings
-import pickle
+import json
+import logging
 import os
+import re
+import shutil
+import threading
+from collections.abc import Mapping
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from utils.model_registry import DEFAULT_OPENAI_EMBEDDING_MODEL, get_openai_embeddings, get_or_create
+from utils.embedding_store import EmbeddingStore
+from utils.embeddings_preprocessor import render_profile_text, profile_text_hash, PROFILE_TEXT_VERSION
+from utils.batch_embedder import embed_texts
+from utils.similarity import SimilarityIndex
+from utils.quantized_embeddings import EMBEDDING_PCA_DIM, EMBEDDING_QUANTIZATION, QUANTIZE_FROM, QuantizedIndex, read_codes
+from src import ROOT_DIR
 
-# Cache path
-EMBEDDINGS_CACHE = "embeddings_cache.pkl"
+logger = logging.getLogger(__name__)
 
-# Initialize embedding model
-embedding_model = OpenAIEmbeddings()
+# Root of the embedding caches, one memory-mapped store per (model, renderer version)
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(ROOT_DIR, ".cache", "embeddings"))
+
+# Text hash of every candidate at the last sync, and the quantized codes of those candidates built by
+# the sync, kept in the store directory
+SYNCED_FILE = "candidates.json"
+QUANTIZED_FILE = "quantized.faiss"
+
+class CandidateEmbeddings(Mapping):
+    """
+    `{candidate_id: embedding}` view of the cache rows of some candidates, without copying the matrix.
+    It is valid until the cache is next updated. `quantized` is an optional compressed first-pass index
+    of the same candidates that `search` goes through instead of scoring the full matrix.
+    """
+
+    def __init__(self, store: EmbeddingStore, candidate_ids: List[str], rows: np.ndarray, quantized: Optional[QuantizedIndex] = None):
+        self.store = store
+        self.ids = candidate_ids
+        self.rows = rows
+        self.quantized = quantized
+        self._positions = {candidate_id: i for i, candidate_id in enumerate(candidate_ids)}
+        self._index = None
+
+    def __getitem__(self, candidate_id: str) -> np.ndarray:
+        return np.array(self.store.matrix[self.rows[self._positions[candidate_id]]])
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def index(self) -> SimilarityIndex:
+        """
+        Similarity index of these candidates, built on first use. Covering most of the store, the rows are
+        scored in place in the mapped matrix and then picked, since gathering them would copy them; covering
+        a small share of it (e.g. a pre-filtered pool), only their rows are gathered and scored.
+        """
+        if self._index is None:
+            if 2 * len(self.rows) < len(self.store):
+                self._index = SimilarityIndex(self.ids, np.asarray(self.store.matrix[self.rows]))
+            else:
+                self._index = SimilarityIndex(self.ids, self.store.matrix, rows=self.rows)
+        return self._index
+
+    def cosine_similarities(self, query_embedding) -> np.ndarray:
+        """
+        Cosine similarity of the query with each candidate, in `ids` order.
+        """
+        return self.index.scores(query_embedding)
+
+    def search(self, query_embedding, k: int) -> List[Tuple[str, float]]:
+        """
+        The `k` most similar candidates as (candidate_id, similarity), best first.
+        """
+        return (self.quantized or self.index).search(query_embedding, k)
+
+    def search_many(self, query_embeddings, k: int) -> List[List[Tuple[str, float]]]:
+        """
+        `search` for each row of a (queries, dim) matrix, scored together in blocks.
+        """
+        return (self.quantized or self.index).search_many(query_embeddings, k)
+
+class ProfileEmbeddingCache:
+    """
+    Embeddings of rendered profile texts, keyed by (model, renderer version, hash of the text).
+
+    Each (model, renderer version) has its own EmbeddingStore whose rows are keyed by text hash, so a
+    candidate is only re-embedded when its rendered text changes, and identical texts are embedded once.
+
+    `sync`, run at ingestion time on the whole corpus, records each candidate's text hash and
+    garbage-collects the rows no candidate renders to any more and the stores of older renderer versions.
+    `embed`, on the query path, never deletes anything and only renders the candidates the last sync
+    did not record. Large pools are also quantized by `sync`; `embed` uses those codes only for exactly
+    the synced candidates and otherwise scores the full-precision rows, never retraining them itself.
+    """
+
+    def __init__(self, embedder, model: str, cache_dir: str = EMBEDDING_CACHE_DIR,
+                 renderer: Callable[[Dict], str] = render_profile_text, version: int = PROFILE_TEXT_VERSION):
+        # An embedder, or a function returning one, called only once something has to be embedded
+        self._embedder = embedder
+        self.model = model
+        self.renderer = renderer
+        self.version = version
+        self.model_dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model))
+        self.store = EmbeddingStore(os.path.join(self.model_dir, f"v{version}"), model=model)
+        self._lock = threading.Lock()
+        self._synced_path = os.path.join(self.store.path, SYNCED_FILE)
+        self._quantized_path = os.path.join(self.store.path, QUANTIZED_FILE)
+        # (mtime, candidate -> text hash, quantized codes or None, quantization settings) of the last sync
+        self._synced: Tuple[Optional[int], Dict[str, str], object, Optional[Dict]] = (None, {}, None, None)
+
+    @property
+    def embedder(self):
+        if not hasattr(self._embedder, "encode") and not hasattr(self._embedder, "embed_documents"):
+            self._embedder = self._embedder()
+        return self._embedder
+
+    def _synced_hashes(self) -> Dict[str, str]:
+        """
+        Candidate -> text hash of the last sync, re-read when another process synced since.
+        """
+        try:
+            mtime = os.stat(self._synced_path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if self._synced[0] != mtime:
+            with open(self._synced_path, "r") as file:
+                synced = json.load(file)
+            codes, quantization = None, synced["quantization"]
+            if quantization:
+                try:
+                    codes = read_codes(self._quantized_path)
+                except RuntimeError:
+                    logger.warning(f"Embedding cache {self.model} v{self.version}: cannot read {self._quantized_path}, searching unquantized")
+            self._synced = (mtime, synced["candidates"], codes, quantization)
+        return self._synced[1]
+
+    def _hashes(self, profiles: Mapping, candidate_ids: List[str], rerender: bool) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Text hash of each candidate, and the rendered text of each hash that had to be rendered: every
+        candidate with `rerender`, otherwise those the last sync did not record or whose row is gone.
+        """
+        synced = {} if rerender else self._synced_hashes()
+        hashes, texts = [], {}
+        for candidate_id in candidate_ids:
+            text_hash = synced.get(candidate_id)
+            if text_hash is None or text_hash not in self.store:
+                text = self.renderer(profiles[candidate_id])
+                text_hash = profile_text_hash(text)
+                texts.setdefault(text_hash, text)
+            hashes.append(text_hash)
+        return hashes, texts
+
+    def _embed_pending(self, texts: Dict[str, str], refresh: bool) -> None:
+        """
+        Embed the texts not cached yet (all of them with `refresh`); the lock must be held.
+        """
+        pending = [text_hash for text_hash in texts if refresh or text_hash not in self.store]
+        if pending:
+            self.store.upsert(pending, embed_texts(self.embedder, [texts[text_hash] for text_hash in pending]))
+        logger.info(f"Embedding cache {self.model} v{self.version}: {len(texts) - len(pending)} cached, {len(pending)} embedded")
+
+    def _view(self, candidate_ids: List[str], hashes: List[str], synced: bool) -> CandidateEmbeddings:
+        """
+        View of the given candidates; `synced` tells whether they and their hashes are exactly those of the
+        last sync, whose quantized codes then serve as the first pass.
+        """
+        rows = self.store.rows(hashes)
+        quantized = None
+        _, synced_hashes, codes, quantization = self._synced
+        if synced and codes is not None and candidate_ids == list(synced_hashes):
+            quantized = QuantizedIndex(candidate_ids, self.store.matrix, rows, codes=codes, **quantization)
+        return CandidateEmbeddings(self.store, candidate_ids, rows, quantized)
+
+    def embed(self, profiles: Mapping, refresh: bool = False) -> CandidateEmbeddings:
+        """
+        Embeddings of the given profiles, embedding only the texts not cached yet (all of them, re-rendered,
+        with `refresh`). Candidates recorded by the last sync are not rendered again; nothing is deleted.
+        """
+        candidate_ids = list(profiles)
+        hashes, texts = self._hashes(profiles, candidate_ids, rerender=refresh)
+        with self._lock:
+            self._embed_pending(texts, refresh)
+            return self._view(candidate_ids, hashes, synced=not texts)
+
+    def sync(self, profiles: Mapping) -> CandidateEmbeddings:
+        """
+        Ingestion-time update with `profiles` as the whole corpus: render and embed what changed, drop the
+        other cached texts and older renderer versions, quantize a large pool, and record every candidate's
+        text hash for `embed`.
+        """
+        candidate_ids = list(profiles)
+        hashes, texts = self._hashes(profiles, candidate_ids, rerender=True)
+        with self._lock:
+            self._embed_pending(texts, refresh=False)
+            dropped = self._collect_garbage(hashes)
+            rows = self.store.rows(hashes)
+            codes, quantization = None, None
+            if EMBEDDING_QUANTIZATION and len(candidate_ids) >= QUANTIZE_FROM:
+                quantization = {"mode": EMBEDDING_QUANTIZATION, "pca_dim": EMBEDDING_PCA_DIM}
+                quantized = QuantizedIndex(candidate_ids, self.store.matrix, rows, **quantization)
+                quantized.save(self._quantized_path)
+                codes = quantized.index
+            elif os.path.exists(self._quantized_path):
+                os.remove(self._quantized_path)
+            os.makedirs(self.store.path, exist_ok=True)
+            with open(self._synced_path + ".tmp", "w") as file:
+                json.dump({"candidates": dict(zip(candidate_ids, hashes)), "quantization": quantization}, file)
+            os.replace(self._synced_path + ".tmp", self._synced_path)
+            self._synced = (os.stat(self._synced_path).st_mtime_ns, dict(zip(candidate_ids, hashes)), codes, quantization)
+            logger.info(f"Embedding cache {self.model} v{self.version}: synced {len(candidate_ids)} candidates, dropped {dropped} stale texts")
+            return self._view(candidate_ids, hashes, synced=True)
+
+    def collect_garbage(self, live_hashes) -> int:
+        """
+        Drop the cached texts not in `live_hashes` and the stores of other renderer versions of this model.
+        Returns the number of dropped rows.
+        """
+        with self._lock:
+            return self._collect_garbage(live_hashes)
+
+    def _collect_garbage(self, live_hashes) -> int:
+        live_hashes = set(live_hashes)
+        stale = [text_hash for text_hash in self.store if text_hash not in live_hashes]
+        self.store.delete(stale)
+        current = os.path.basename(self.store.path)
+        for name in os.listdir(self.model_dir) if os.path.isdir(self.model_dir) else []:
+            if name != current and re.fullmatch(r"v\d+", name):
+                shutil.rmtree(os.path.join(self.model_dir, name), ignore_errors=True)
+                logger.info(f"Removed embedding cache {self.model} {name}")
+        return len(stale)
+
+def get_profile_embedding_cache(model: str = DEFAULT_OPENAI_EMBEDDING_MODEL, embedder=None) -> ProfileEmbeddingCache:
+    """
+    Process-wide cache of a model. `embedder` (or a function returning it) defaults to the shared OpenAI
+    embeddings client of the model; pass e.g. `lambda: get_sentence_transformer(name)` for a local model.
+    """
+    embedder = embedder or (lambda: get_openai_embeddings(model))
+    return get_or_create(("profile_embedding_cache", model, PROFILE_TEXT_VERSION), lambda: ProfileEmbeddingCache(embedder, model))
 
 # Function to cache and retrieve embeddings
 def manage_embeddings(profiles, recache=False):
-    if os.path.exists(EMBEDDINGS_CACHE) and not recache:
-        with open(EMBEDDINGS_CACHE, "rb") as f:
-            embeddings = pickle.load(f)
-    else:
-        embeddings = {}
-        for candidate_id, profile in profiles.items():
-            text = f"{profile['Summary']} {json.dumps(profile)}"
-            embeddings[candidate_id] = embedding_model.embed_query(text)
-        with open(EMBEDDINGS_CACHE, "wb") as f:
-            pickle.dump(embeddings, f)
-    return embeddings
+    return get_profile_embedding_cache().embed(profiles, refresh=recache)
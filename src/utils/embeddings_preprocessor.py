@@ -1,12 +1,94 @@
+import hashlib
+import math
+
+# Version of the profile-to-text rendering; bump it whenever render_profile_text changes its output,
+# so cached embeddings of the old texts are no longer used
+PROFILE_TEXT_VERSION = 1
+
+# Placeholder values of the synthesized profiles that carry no information
+UNKNOWN_VALUES = ("", "unknown", "Unknown", None)
+
+def _known(value) -> bool:
+    return value not in UNKNOWN_VALUES
+
+def skill_names(skills):
+    """
+    Skill names of a Skills list, whether plain strings or `{"skill": ..., "source": [...]}` dicts, deduplicated in order.
+    """
+    names = []
+    for skill in skills if isinstance(skills, list) else []:
+        name = skill.get("skill") if isinstance(skill, dict) else skill
+        if isinstance(name, str) and name.strip() and name not in names:
+            names.append(name.strip())
+    return names
+
+def total_years(experience):
+    """
+    Sum of the `duration_years` of the experience entries holding a finite number, numeric strings included.
+    """
+    years = 0.0
+    for entry in experience if isinstance(experience, list) else []:
+        duration = entry.get("duration_years") if isinstance(entry, dict) else None
+        if isinstance(duration, bool):
+            continue
+        try:
+            duration = float(duration)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(duration):
+            years += duration
+    return years
+
+def render_profile_text(profile):
+    """
+    Canonical text of a profile for embedding: name, summary, experience, education and skills, one line
+    each, leaving out unknown values and provenance. Every embedder renders profiles with this function.
+    """
+    lines = []
+    if _known(profile.get("name")):
+        lines.append(str(profile["name"]))
+    if _known(profile.get("Summary")):
+        lines.append(f"Summary: {profile['Summary']}")
+
+    experiences = []
+    for exp in profile.get("Experience", []) if isinstance(profile.get("Experience"), list) else []:
+        if not isinstance(exp, dict):
+            continue
+        role = " at ".join(str(exp[key]) for key in ("title", "company") if _known(exp.get(key)))
+        if _known(exp.get("duration_years")):
+            role += f" ({exp['duration_years']} years)"
+        if _known(exp.get("description")):
+            role += f": {exp['description']}"
+        if role:
+            experiences.append(role)
+    if experiences:
+        lines.append(f"Experience: {' | '.join(experiences)}")
+
+    educations = []
+    for edu in profile.get("Education", []) if isinstance(profile.get("Education"), list) else []:
+        if not isinstance(edu, dict):
+            continue
+        degree = ", ".join(str(edu[key]) for key in ("degree", "institution") if _known(edu.get(key)))
+        if _known(edu.get("year")):
+            degree += f" ({edu['year']})"
+        if degree:
+            educations.append(degree)
+    if educations:
+        lines.append(f"Education: {' | '.join(educations)}")
+
+    skills = skill_names(profile.get("Skills"))
+    if skills:
+        lines.append(f"Skills: {', '.join(skills)}")
+    return "\n".join(lines)
+
+def profile_text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
 def preprocess_profile_text(profile):
     """
     Preprocess a single profile to create a text representation.
-    Combines 'Summary', 'Skills', and 'Experience' fields into a single text block.
     """
-    summary = profile.get("Summary", "")
-    skills = " ".join(profile.get("Skills", []))
-    experiences = " ".join(exp.get("description", "") for exp in profile.get("Experience", []))
-    return f"{summary} {skills} {experiences}"
+    return render_profile_text(profile)
 
 def preprocess_profiles(profiles):
     """
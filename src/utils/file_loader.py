@@ -1,5 +1,9 @@
 import json
 import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
 
 def load_json(filepath):
     """
@@ -26,3 +30,267 @@ def load_text_files(directory):
             with open(os.path.join(directory, filename), 'r') as file:
                 files_data[filename] = file.read()
     return files_data
+
+def append_ndjson(record, json_file):
+    """
+    Append one record as a single JSON line to an open file and flush it, so readers see it right away.
+    """
+    json_file.write(json.dumps(record) + "\n")
+    json_file.flush()
+
+def iter_ndjson(filepath):
+    """
+    Yield the records of an NDJSON file one at a time, skipping a trailing partially written line.
+    """
+    with open(filepath, "r") as file:
+        for line in file:
+            if not line.endswith("\n"):
+                break
+            if line.strip():
+                yield json.loads(line)
+
+def load_ndjson_profiles(filepath):
+    """
+    Load `{"candidate_id": ..., "profile": ...}` NDJSON records into a profiles dict; later records win
+    and `{"candidate_id": ..., "deleted": true}` records remove the candidate.
+    """
+    profiles = {}
+    for record in iter_ndjson(filepath):
+        if record.get("deleted"):
+            profiles.pop(record["candidate_id"], None)
+        else:
+            profiles[record["candidate_id"]] = record["profile"]
+    return profiles
+
+# Sidecar byte-offset index of an NDJSON profiles file
+NDJSON_INDEX_SUFFIX = ".idx"
+# Decoded profiles kept by NDJSONProfiles
+PROFILE_CACHE_SIZE = 256
+# Compact once superseded or deleted records make up this share of a file of at least COMPACTION_MIN_BYTES
+COMPACTION_DEAD_RATIO = 0.5
+COMPACTION_MIN_BYTES = 1 << 20
+
+# `append_ndjson` writes the candidate id first, so indexing rarely needs to decode the whole record
+CANDIDATE_ID_RE = re.compile(rb'^\{"candidate_id": ("(?:[^"\\]|\\.)*")')
+
+def _record_candidate_id(line):
+    match = CANDIDATE_ID_RE.match(line)
+    if match:
+        return json.loads(match.group(1)), line.rstrip().endswith(b', "deleted": true}')
+    record = json.loads(line)
+    return record["candidate_id"], bool(record.get("deleted"))
+
+def _scan_ndjson(filepath, index):
+    """
+    Extend an NDJSON index (`{"size", "dead", "offsets"}`) with the complete records written after
+    `index["size"]`. A record for a known candidate supersedes the earlier one; `"deleted": true` removes it.
+    """
+    offsets = index["offsets"]
+    with open(filepath, "rb") as file:
+        file.seek(index["size"])
+        position = index["size"]
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                candidate_id, deleted = _record_candidate_id(line)
+                previous = offsets.pop(candidate_id, None)
+                if previous:
+                    index["dead"] += previous[1]
+                if deleted:
+                    index["dead"] += len(line)
+                else:
+                    offsets[candidate_id] = [position, len(line)]
+            position += len(line)
+        index["size"] = position
+    return index
+
+def _index_is_current(filepath, index):
+    """
+    An index still describes the file if the file did not shrink and its last indexed record is where the index says.
+    """
+    if index["size"] > os.path.getsize(filepath):
+        return False
+    if not index["offsets"]:
+        return index["size"] == 0
+    candidate_id, (offset, length) = max(index["offsets"].items(), key=lambda item: item[1][0])
+    with open(filepath, "rb") as file:
+        file.seek(offset)
+        line = file.read(length)
+    try:
+        return line.endswith(b"\n") and _record_candidate_id(line)[0] == candidate_id
+    except (ValueError, KeyError):
+        return False
+
+def load_ndjson_index(filepath):
+    """
+    Load the sidecar index of an NDJSON profiles file, indexing only what was appended since it was saved
+    and rebuilding it when the file was rewritten. Saves the index back when it changed.
+    """
+    index_path = filepath + NDJSON_INDEX_SUFFIX
+    index = None
+    if os.path.exists(index_path):
+        with open(index_path, "r") as file:
+            index = json.load(file)
+        if not os.path.exists(filepath) or not _index_is_current(filepath, index):
+            index = None
+    if index is None:
+        index = {"size": 0, "dead": 0, "offsets": {}}
+    if os.path.exists(filepath) and os.path.getsize(filepath) != index["size"]:
+        size = index["size"]
+        _scan_ndjson(filepath, index)
+        if index["size"] != size:
+            save_ndjson_index(filepath, index)
+    return index
+
+def save_ndjson_index(filepath, index):
+    index_path = filepath + NDJSON_INDEX_SUFFIX
+    with open(index_path + ".tmp", "w") as file:
+        json.dump(index, file)
+    os.replace(index_path + ".tmp", index_path)
+
+class NDJSONProfiles(Mapping):
+    """
+    Read-only `{candidate_id: profile}` mapping over an NDJSON profiles file and its sidecar offset index.
+
+    Opening it only loads the index; a profile is read and decoded when it is accessed, and the last
+    `cache_size` decoded profiles are kept. Call `refresh()` to pick up records appended since it was opened.
+    Profiles are shared with the cache, so copy one before changing it.
+    """
+
+    def __init__(self, filepath, cache_size=PROFILE_CACHE_SIZE):
+        self.filepath = filepath
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._file = None
+        self.refresh()
+
+    def refresh(self):
+        with self._lock:
+            self._offsets = load_ndjson_index(self.filepath)["offsets"]
+            # Reopen in case the file was compacted into a new one
+            if self._file:
+                self._file.close()
+            self._file = open(self.filepath, "rb") if os.path.exists(self.filepath) else None
+            self._cache.clear()
+
+    def __getitem__(self, candidate_id):
+        with self._lock:
+            if candidate_id in self._cache:
+                self._cache.move_to_end(candidate_id)
+                return self._cache[candidate_id]
+            offset, length = self._offsets[candidate_id]
+            self._file.seek(offset)
+            profile = json.loads(self._file.read(length))["profile"]
+            self._cache[candidate_id] = profile
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return profile
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._offsets
+
+    def __iter__(self):
+        return iter(list(self._offsets))
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def subset(self, candidate_ids):
+        return {candidate_id: self[candidate_id] for candidate_id in candidate_ids if candidate_id in self}
+
+    def to_dict(self):
+        return {candidate_id: self[candidate_id] for candidate_id in self}
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class NDJSONProfileWriter:
+    """
+    Append-only writer of an NDJSON profiles file that keeps its offset index current. Updating or deleting
+    a candidate appends a record; as soon as a write brings superseded records past COMPACTION_DEAD_RATIO of
+    the file, it is rewritten with the live records only. Open readers keep reading the file they opened
+    until they `refresh()`.
+    """
+
+    def __init__(self, filepath, truncate=False):
+        self.filepath = filepath
+        if truncate:
+            for path in (filepath, filepath + NDJSON_INDEX_SUFFIX):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._index = load_ndjson_index(filepath)
+        self._file = open(filepath, "ab")
+        # Drop a partially written last record, so appended records start where the index expects
+        self._file.truncate(self._index["size"])
+
+    def _append(self, candidate_id, record):
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        previous = self._index["offsets"].pop(candidate_id, None)
+        if previous:
+            self._index["dead"] += previous[1]
+        self._file.write(line)
+        self._file.flush()
+        return line
+
+    def write(self, candidate_id, profile):
+        line = self._append(candidate_id, {"candidate_id": candidate_id, "profile": profile})
+        self._index["offsets"][candidate_id] = [self._index["size"], len(line)]
+        self._index["size"] += len(line)
+        if self.needs_compaction():
+            self.compact()
+
+    def delete(self, candidate_id):
+        if candidate_id in self._index["offsets"]:
+            line = self._append(candidate_id, {"candidate_id": candidate_id, "deleted": True})
+            self._index["dead"] += len(line)
+            self._index["size"] += len(line)
+            if self.needs_compaction():
+                self.compact()
+
+    def needs_compaction(self):
+        size = self._index["size"]
+        return size >= COMPACTION_MIN_BYTES and self._index["dead"] >= COMPACTION_DEAD_RATIO * size
+
+    def compact(self):
+        """
+        Rewrite the file with the live record of each candidate, in file order, and swap it in atomically.
+        """
+        self._file.close()
+        offsets, position = {}, 0
+        with open(self.filepath, "rb") as source, open(self.filepath + ".tmp", "wb") as target:
+            for candidate_id, (offset, length) in sorted(self._index["offsets"].items(), key=lambda item: item[1][0]):
+                source.seek(offset)
+                target.write(source.read(length))
+                offsets[candidate_id] = [position, length]
+                position += length
+        os.replace(self.filepath + ".tmp", self.filepath)
+        self._index = {"size": position, "dead": 0, "offsets": offsets}
+        save_ndjson_index(self.filepath, self._index)
+        self._file = open(self.filepath, "ab")
+
+    def flush(self):
+        """
+        Save the index; `write` and `delete` already compacted the file when enough of it was dead.
+        """
+        save_ndjson_index(self.filepath, self._index)
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
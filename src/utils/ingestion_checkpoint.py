@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Optional
+from langgraph.checkpoint.sqlite import SqliteSaver
+from src import ROOT_DIR
+
+# On-disk locations of the graph checkpoints and of the per-document results
+GRAPH_CHECKPOINT_PATH = os.getenv("GRAPH_CHECKPOINT_PATH", os.path.join(ROOT_DIR, ".cache", "graph_checkpoints.sqlite"))
+DOCUMENT_CHECKPOINT_PATH = os.getenv("DOCUMENT_CHECKPOINT_PATH", os.path.join(ROOT_DIR, ".cache", "document_checkpoints.sqlite"))
+
+def _connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return sqlite3.connect(path, check_same_thread=False)
+
+def get_graph_checkpointer(path: str = GRAPH_CHECKPOINT_PATH) -> SqliteSaver:
+    """
+    SQLite checkpointer for compiled graphs: finished nodes of a thread are not re-run on resume.
+    """
+    return SqliteSaver(_connect(path))
+
+def ingestion_thread_id(inputs: Any) -> str:
+    """
+    Thread id of an ingestion run, derived from its inputs: a run over other inputs never resumes this one's state.
+    """
+    return f"ingestion-{DocumentCheckpointStore.input_hash(inputs)[:16]}"
+
+class DocumentCheckpointStore:
+    """
+    Durable per-document results of the ingestion stages, scoped by graph thread id.
+
+    Each stage records a document's result as soon as it is decoded, together with a hash of the
+    request that produced it, so a restarted run skips the LLM calls that already finished and
+    recomputes any document whose input changed.
+    """
+
+    def __init__(self, path: str = DOCUMENT_CHECKPOINT_PATH):
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS document_checkpoints (
+                thread_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                key TEXT NOT NULL,
+                input_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (thread_id, stage, key)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def input_hash(payload: Any) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, thread_id: str, stage: str, key: str, input_hash: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT input_hash, result FROM document_checkpoints WHERE thread_id = ? AND stage = ? AND key = ?",
+                (thread_id, stage, key)
+            ).fetchone()
+        if row is None or row[0] != input_hash:
+            return None
+        return json.loads(row[1])
+
+    def put(self, thread_id: str, stage: str, key: str, input_hash: str, result: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO document_checkpoints (thread_id, stage, key, input_hash, result) VALUES (?, ?, ?, ?, ?)",
+                (thread_id, stage, key, input_hash, json.dumps(result))
+            )
+            self._conn.commit()
+
+    def clear(self, thread_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM document_checkpoints WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+_document_checkpoints: Optional[DocumentCheckpointStore] = None
+_document_checkpoints_lock = threading.Lock()
+
+def get_document_checkpoints() -> DocumentCheckpointStore:
+    """
+    Return the process-wide per-document checkpoint store, opening it on first use.
+    """
+    global _document_checkpoints
+    with _document_checkpoints_lock:
+        if _document_checkpoints is None:
+            _document_checkpoints = DocumentCheckpointStore()
+        return _document_checkpoints
+
+def clear_thread(checkpointer: SqliteSaver, thread_id: str) -> None:
+    """
+    Drop the graph and per-document checkpoints of a finished thread, so they neither pile up nor get resumed.
+    """
+    with checkpointer.cursor() as cursor:
+        cursor.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+        cursor.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+    get_document_checkpoints().clear(thread_id)
+
+def run_resumable(compiled_graph, inputs: Dict, on_update: Optional[Callable[[Dict], None]] = None,
+                  thread_id: Optional[str] = None) -> Dict:
+    """
+    Run a graph compiled with a SQLite checkpointer over `inputs` and return its final state.
+
+    An unfinished run of the same thread (by default, of the same inputs) is resumed from its checkpoint
+    instead of starting over, and documents already parsed or synthesized within an unfinished node are
+    reused. `on_update` receives each streamed `{node: update}`. Once the run completes, the thread's
+    checkpoints are cleared.
+    """
+    thread_id = thread_id or ingestion_thread_id(inputs)
+    thread = {"configurable": {"thread_id": thread_id}}
+    snapshot = compiled_graph.get_state(thread)
+    graph_input = inputs
+    if snapshot.next:
+        logging.info(f"Resuming thread {thread_id} at {snapshot.next}")
+        graph_input = None
+    for update in compiled_graph.stream(graph_input, thread):
+        if on_update:
+            on_update(update)
+    values = compiled_graph.get_state(thread).values
+    clear_thread(compiled_graph.checkpointer, thread_id)
+    return values
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from utils.preprocessor import candidate_id_from_file_name, candidate_id_from_position
+
+def content_hash(content) -> str:
+    """
+    SHA-256 of a source document: raw text as is, JSON objects in canonical (sorted-key) form.
+    """
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def _has_error(parsed) -> bool:
+    return not isinstance(parsed, dict) or any(key.startswith("error") for key in parsed)
+
+def _combined_hash(hashes: List[str]) -> str:
+    return content_hash("".join(sorted(hashes)))
+
+class IngestionManifest:
+    """
+    Content-hash manifest of the ingestion sources.
+
+    Records, per source document, its hash, owning candidate and parsed result, and per candidate
+    the combined hash of its sources, so a run only re-parses changed documents and only
+    re-synthesizes candidates with at least one changed source. A file whose size and mtime
+    are unchanged since the last run is not even read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        data = {}
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                data = json.load(file)
+        self.files = data.get("files", {})            # path -> [size, mtime_ns]
+        self.documents = data.get("documents", {})    # doc_id -> {"hash", "candidate_id", "parsed"}
+        self.candidates = data.get("candidates", {})  # candidate_id -> combined source hash
+        self._pending_hashes = {}
+        self._pending_files = {}
+        self._removed = set()
+
+    def _stat_unchanged(self, path: str) -> bool:
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        self._pending_files[path] = signature
+        return self.files.get(path) == signature
+
+    def _check(self, doc_id: str, candidate_id: str, content) -> bool:
+        digest = content_hash(content)
+        known = self.documents.get(doc_id)
+        if known and known["hash"] == digest:
+            return False
+        self._pending_hashes[doc_id] = (digest, candidate_id)
+        return True
+
+    def scan_text_files(self, directory: str, kind: str) -> Dict[str, str]:
+        """
+        Return {filename: content} for the `.txt` files of `directory` that are new or changed.
+        """
+        changed, seen = {}, set()
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".txt"):
+                continue
+            path = os.path.join(directory, filename)
+            doc_id = f"{kind}/{filename}"
+            seen.add(doc_id)
+            if self._stat_unchanged(path) and self.documents.get(doc_id, {}).get("hash"):
+                continue
+            with open(path, "r") as file:
+                content = file.read()
+            if self._check(doc_id, candidate_id_from_file_name(filename, kind), content):
+                changed[filename] = content
+        self._removed.update(doc_id for doc_id in self.documents if doc_id.startswith(f"{kind}/") and doc_id not in seen)
+        return changed
+
+    def scan_linkedin(self, path: str) -> Dict[str, Dict]:
+        """
+        Return {candidate_id: profile} for the LinkedIn profiles that are new or changed.
+        """
+        known = {doc_id for doc_id in self.documents if doc_id.startswith("linkedin/")}
+        if self._stat_unchanged(path) and known and all(self.documents[doc_id]["hash"] for doc_id in known):
+            return {}
+        with open(path, "r") as file:
+            profiles = json.load(file)
+        changed, seen = {}, set()
+        for i, profile in enumerate(profiles):
+            candidate_id = candidate_id_from_position(i)
+            doc_id = f"linkedin/{candidate_id}"
+            seen.add(doc_id)
+            if self._check(doc_id, candidate_id, profile):
+                changed[candidate_id] = profile
+        self._removed.update(known - seen)
+        return changed
+
+    def affected_candidates(self) -> Set[str]:
+        """
+        Candidates whose combined source hash, counting this run's new, changed and removed documents,
+        differs from the one recorded at their last settled run; those whose last synthesis failed or
+        never happened have none recorded.
+        """
+        sources = {}
+        for doc_id, entry in self.documents.items():
+            if doc_id not in self._removed and doc_id not in self._pending_hashes:
+                sources.setdefault(entry["candidate_id"], []).append(entry["hash"] or "")
+        for digest, candidate_id in self._pending_hashes.values():
+            sources.setdefault(candidate_id, []).append(digest)
+        affected = {
+            candidate_id for candidate_id, hashes in sources.items()
+            if self.candidates.get(candidate_id) != _combined_hash(hashes)
+        }
+        affected.update(self.documents[doc_id]["candidate_id"] for doc_id in self._removed)
+        return affected
+
+    def record_parsed(self, kind: str, parsed_documents: Dict[str, Dict]) -> None:
+        """
+        Store the parsed results of the changed `kind` documents, keyed by candidate id.
+        Failed parses are kept for this run but not recorded, so they are retried next time.
+        """
+        for doc_id, (digest, candidate_id) in self._pending_hashes.items():
+            if not doc_id.startswith(f"{kind}/") or candidate_id not in parsed_documents:
+                continue
+            parsed = parsed_documents[candidate_id]
+            self.documents[doc_id] = {
+                "hash": None if _has_error(parsed) else digest,
+                "candidate_id": candidate_id,
+                "parsed": parsed,
+            }
+
+    def clear(self) -> None:
+        """
+        Forget every recorded file, document and candidate, before a run that re-ingests all the sources.
+        """
+        self.files, self.documents, self.candidates = {}, {}, {}
+        self._pending_hashes, self._pending_files, self._removed = {}, {}, set()
+
+    def record_candidate(self, candidate_id: str, documents: Dict[str, Tuple[Any, Dict]], profile: Dict) -> None:
+        """
+        Record a candidate ingested without a scan (e.g. streamed): its source documents as
+        {doc_id: (content, parsed)} and, unless its synthesis failed, the source hash of `profile`.
+        Failed parses are recorded without a hash, so they are retried next time.
+        """
+        for doc_id, (content, parsed) in documents.items():
+            self.documents[doc_id] = {
+                "hash": None if _has_error(parsed) else content_hash(content),
+                "candidate_id": candidate_id,
+                "parsed": parsed,
+            }
+        if _has_error(profile) or not documents:
+            self.candidates.pop(candidate_id, None)
+        else:
+            self.candidates[candidate_id] = _combined_hash([self.documents[doc_id]["hash"] or "" for doc_id in documents])
+
+    def parsed_sources(self, kind: str, candidate_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Parsed `kind` documents of the given candidates, from this run or earlier ones.
+        """
+        wanted = set(candidate_ids)
+        return {
+            entry["candidate_id"]: entry["parsed"]
+            for doc_id, entry in self.documents.items()
+            if doc_id.startswith(f"{kind}/") and entry["candidate_id"] in wanted and doc_id not in self._removed
+        }
+
+    def save(self, profiles: Dict[str, Dict]) -> None:
+        """
+        Drop removed documents, record the source hash of every successfully synthesized candidate in
+        `profiles` and of every candidate without a CV (never synthesized, so settled as is), and write
+        the manifest.
+        """
+        for doc_id in self._removed:
+            self.documents.pop(doc_id, None)
+        self.files.update(self._pending_files)
+        source_hashes = {}
+        for entry in self.documents.values():
+            source_hashes.setdefault(entry["candidate_id"], []).append(entry["hash"] or "")
+        for candidate_id, profile in profiles.items():
+            if _has_error(profile):
+                self.candidates.pop(candidate_id, None)
+            else:
+                self.candidates[candidate_id] = _combined_hash(source_hashes.get(candidate_id, []))
+        with_cv = {entry["candidate_id"] for doc_id, entry in self.documents.items() if doc_id.startswith("cv/")}
+        for candidate_id in source_hashes.keys() - with_cv:
+            self.candidates[candidate_id] = _combined_hash(source_hashes[candidate_id])
+        self.candidates = {
+            candidate_id: digest for candidate_id, digest in self.candidates.items() if candidate_id in source_hashes
+        }
+        with open(self.path, "w") as file:
+            json.dump({"files": self.files, "documents": self.documents, "candidates": self.candidates}, file)
+        self._pending_hashes, self._pending_files, self._removed = {}, {}, set()
+        logging.info(f"Ingestion manifest saved to {self.path}")
@@ -0,0 +1,86 @@
+import re
+from typing import Dict, List, Tuple
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from utils.token_budget import estimate_tokens
+
+# Fields identifying the same Experience/Education entry across chunks
+ENTRY_KEYS = {
+    "Experience": ("title", "company"),
+    "Education": ("degree", "institution"),
+}
+
+def _normalize(value) -> str:
+    # Punctuation is dropped, except decimal points: "3.5" and "35" years must not compare equal
+    return " ".join(re.sub(r"(?<!\d)\.|\.(?!\d)|[^a-z0-9.\s]", "", str(value).lower()).split())
+
+def _is_known(value) -> bool:
+    return value not in (None, "", [], {}) and _normalize(value) != "unknown"
+
+def split_transcript(text: str, chunk_tokens: int, overlap_tokens: int) -> List[str]:
+    """
+    Split a transcript into chunks of at most `chunk_tokens` estimated tokens, preferring paragraph,
+    then line (speaker turn), then sentence boundaries, with `overlap_tokens` of context carried over.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens,
+        chunk_overlap=overlap_tokens,
+        length_function=estimate_tokens,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+    return splitter.split_text(text)
+
+def _merge_entry(merged: Dict, entry: Dict, conflicts: List[str], label: str) -> None:
+    for key, value in entry.items():
+        if not _is_known(value):
+            merged.setdefault(key, value)
+        elif not _is_known(merged.get(key)):
+            merged[key] = value
+        elif key == "description":
+            # Chunks describe the same role from different angles: keep the most detailed account
+            if len(str(value)) > len(str(merged[key])):
+                merged[key] = value
+        elif _normalize(value) != _normalize(merged[key]):
+            conflicts.append(f"{label}.{key}: {merged[key]!r} vs {value!r}")
+
+def _merge_entries(field_name: str, partials: List[Dict], conflicts: List[str]) -> List[Dict]:
+    merged = {}
+    for partial in partials:
+        entries = partial.get(field_name, [])
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            identity = tuple(_normalize(entry.get(key, "unknown")) for key in ENTRY_KEYS[field_name])
+            _merge_entry(merged.setdefault(identity, {}), entry, conflicts, f"{field_name}{list(identity)}")
+    return list(merged.values())
+
+def _merge_skills(partials: List[Dict]) -> List[str]:
+    skills = {}
+    for partial in partials:
+        values = partial.get("Skills", [])
+        values = values.split(",") if isinstance(values, str) else values
+        for skill in values if isinstance(values, list) else []:
+            if isinstance(skill, str) and skill.strip():
+                skills.setdefault(skill.strip().lower(), skill.strip())
+    return list(skills.values())
+
+def merge_extractions(partials: List[Dict]) -> Tuple[Dict, List[str]]:
+    """
+    Deterministically merge the `name/Experience/Education/Skills` extractions of a transcript's chunks.
+
+    Experience and Education entries are deduplicated by normalized title/company (degree/institution),
+    filling unknown values from other chunks; skills are deduplicated case-insensitively.
+    Returns the merged extraction and the conflicts (two chunks stating different known values for the
+    same field) that a final LLM merge should arbitrate; with no conflicts the merge is final.
+    """
+    conflicts = []
+    names = [partial.get("name") for partial in partials if _is_known(partial.get("name"))]
+    for name in names[1:]:
+        if _normalize(name) != _normalize(names[0]):
+            conflicts.append(f"name: {names[0]!r} vs {name!r}")
+    merged = {
+        "name": names[0] if names else "unknown",
+        "Experience": _merge_entries("Experience", partials, conflicts),
+        "Education": _merge_entries("Education", partials, conflicts),
+        "Skills": _merge_skills(partials),
+    }
+    return merged, conflicts
@@ -0,0 +1,317 @@
+import json
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Field specs: a type or tuple of types, `[spec]` for a list of spec, or a dict of field specs
+EXPERIENCE_SCHEMA = {"title": str, "company": str, "duration_years": (int, float, str), "description": str}
+EDUCATION_SCHEMA = {"degree": str, "institution": str, "year": (int, str)}
+EXTRACTION_SCHEMA = {"name": str, "Experience": [EXPERIENCE_SCHEMA], "Education": [EDUCATION_SCHEMA], "Skills": [str]}
+SYNTHESIS_SCHEMA = {**EXTRACTION_SCHEMA, "Summary": str}
+
+# Key of the whole answer in the invalid fields of a response that could not be parsed at all
+WHOLE_RESPONSE = "*"
+
+FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+NUMBER_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(?:years?|yrs?)?\s*$", re.IGNORECASE)
+# Incomplete trailing members of a truncated answer, dropped one at a time until the rest parses
+DANGLING_RES = [
+    re.compile(r',?\s*"(?:[^"\\]|\\.)*"\s*:\s*[-\w.+]*\s*$'),
+    re.compile(r',?\s*"(?:[^"\\]|\\.)*"\s*$'),
+    re.compile(r',?\s*[-\w.+]+\s*$'),
+]
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+def _scan(text: str) -> Tuple[str, List[str], Optional[str], List[str]]:
+    """
+    Rewrite single-quoted strings as JSON strings, drop trailing commas and map Python literals, outside of strings.
+    Returns the rewritten text, the repairs applied, the string quote still open at the end (if any),
+    and the closing brackets still expected.
+    """
+    out, repairs, closers = [], [], []
+    quote, i = None, 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == "\\" and i + 1 < len(text):
+                escaped = text[i + 1]
+                out.append("'" if quote == "'" and escaped == "'" else char + escaped)
+                i += 2
+                continue
+            if char == quote:
+                out.append('"')
+                quote = None
+            elif char == '"':
+                out.append('\\"')
+            else:
+                out.append(char)
+        elif char in "\"'":
+            if char == "'":
+                repairs.append("single_quotes")
+            quote = char
+            out.append('"')
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            if closers:
+                closers.pop()
+            out.append(char)
+        elif char == "," and re.match(r"\s*[}\]]", text[i + 1:]):
+            repairs.append("trailing_comma")
+        elif char.isalpha():
+            word = re.match(r"[A-Za-z_]+", text[i:]).group(0)
+            if word in PYTHON_LITERALS:
+                repairs.append("python_literals")
+            out.append(PYTHON_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        else:
+            out.append(char)
+        i += 1
+    return "".join(out), repairs, quote, closers
+
+def _json_bounds(text: str) -> Tuple[int, Optional[int]]:
+    """
+    Start of the first JSON object or array in the text, and the end of its closing bracket (None if never closed).
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON object in the response")
+    start, depth, quote, escaped = min(starts), 0, None, False
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'" and (char == '"' or not text[i - 1].isalnum()):
+            quote = char
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return start, i + 1
+    return start, None
+
+def _close_truncated(text: str) -> str:
+    """
+    Close the brackets a truncated answer left open, after dropping its incomplete trailing member.
+    A string cut off mid-way is dropped, never closed: its partial value must not pass as the real one.
+    """
+    text, _, quote, closers = _scan(text)
+    if quote:
+        text = DANGLING_RES[1].sub("", text + '"')
+    for _ in range(len(DANGLING_RES) + 2):
+        candidate = text.rstrip().rstrip(",")
+        closed = candidate + "".join(reversed(closers))
+        try:
+            json.loads(closed)
+            return closed
+        except json.JSONDecodeError:
+            for dangling in DANGLING_RES:
+                stripped = dangling.sub("", candidate)
+                if stripped != candidate:
+                    text = stripped
+                    break
+            else:
+                return closed
+    return closed
+
+def repair_json(text: str) -> Tuple[Any, List[str]]:
+    """
+    Parse an LLM answer as JSON, locally fixing the usual failures: markdown fences, prose around the JSON,
+    single quotes, Python literals, trailing commas and truncated closing brackets.
+    Returns the value and the repairs applied; raises ValueError when the answer cannot be recovered.
+    """
+    try:
+        return json.loads(text), []
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    repairs = []
+    fence = FENCE_RE.search(text)
+    if fence:
+        text = fence.group(1)
+        repairs.append("fence")
+    start, end = _json_bounds(text)
+    if text[:start].strip() or (end is not None and text[end:].strip()):
+        repairs.append("prose")
+    text = text[start:end]
+
+    if end is None:
+        text = _close_truncated(text)
+        repairs.append("truncated")
+    else:
+        text, scan_repairs, _, _ = _scan(text)
+        repairs.extend(dict.fromkeys(scan_repairs))
+    try:
+        return json.loads(text), repairs
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrecoverable JSON ({', '.join(repairs) or 'no local repair applies'}): {e}") from e
+
+def _coerce(value, spec) -> Tuple[Any, Optional[str]]:
+    """
+    Coerce a value to a field spec where the intent is unambiguous. Returns the value and, when it
+    still does not fit, the reason.
+    """
+    if isinstance(spec, list):
+        item_spec = spec[0]
+        if value is None:
+            return [], None
+        if isinstance(value, str) and item_spec is str:
+            value = [item.strip() for item in value.split(",") if item.strip()]
+        elif isinstance(value, dict) and isinstance(item_spec, dict):
+            value = [value]
+        if not isinstance(value, list):
+            return value, f"expected a list, got {type(value).__name__}"
+        items = []
+        for item in value:
+            if item_spec is str and isinstance(item, dict):
+                item = item.get("skill", item.get("name", item))
+            item, reason = _coerce(item, item_spec)
+            if reason:
+                return value, f"list item {item!r}: {reason}"
+            items.append(item)
+        return items, None
+
+    if isinstance(spec, dict):
+        if not isinstance(value, dict):
+            return value, f"expected an object with {', '.join(spec)}, got {type(value).__name__}"
+        coerced = dict(value)
+        for key, field_spec in spec.items():
+            if key in coerced:
+                coerced[key], reason = _coerce(coerced[key], field_spec)
+                if reason:
+                    return value, f"{key}: {reason}"
+        return coerced, None
+
+    types = spec if isinstance(spec, tuple) else (spec,)
+    if value is None:
+        return "unknown", None
+    if (int in types or float in types) and isinstance(value, str) and NUMBER_RE.match(value):
+        number = float(NUMBER_RE.match(value).group(1))
+        return int(number) if number.is_integer() and int in types else number, None
+    if isinstance(value, types) and not isinstance(value, bool):
+        return value, None
+    if str in types and isinstance(value, (int, float)):
+        return str(value), None
+    return value, f"expected {' or '.join(t.__name__ for t in types)}, got {type(value).__name__}"
+
+def validate(value: Any, schema: Dict) -> Tuple[Any, Dict[str, str]]:
+    """
+    Coerce a decoded answer to a schema. Missing fields get their empty value; returns the coerced answer
+    and the top-level fields that are still invalid, with the reason.
+    """
+    if not isinstance(value, dict):
+        return value, {WHOLE_RESPONSE: f"expected a JSON object, got {type(value).__name__}"}
+    coerced, invalid = dict(value), {}
+    for field, spec in schema.items():
+        if field not in coerced:
+            coerced[field] = [] if isinstance(spec, list) else "unknown"
+            continue
+        coerced[field], reason = _coerce(coerced[field], spec)
+        if reason:
+            invalid[field] = reason
+    return coerced, invalid
+
+class DecodeStats:
+    """
+    Per-node counts of how LLM answers were decoded: clean, repaired locally, re-prompted or failed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(Counter)
+
+    def record(self, node: str, *events: str) -> None:
+        with self._lock:
+            self._counts[node].update(events)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            report = {}
+            for node, counts in self._counts.items():
+                responses = counts["responses"]
+                report[node] = {
+                    **dict(counts),
+                    "parse_failure_rate": round((responses - counts["clean"]) / responses, 3) if responses else 0.0,
+                }
+            return report
+
+_decode_stats = DecodeStats()
+
+def _truncated_fields(value: Any, schema: Dict) -> Dict[str, str]:
+    """
+    Schema fields a truncated answer may have lost: the last one it wrote and those it never reached.
+    """
+    if not isinstance(value, dict):
+        return {}
+    fields = {field: "missing from a truncated answer" for field in schema if field not in value}
+    last = list(value)[-1] if value else None
+    if last in schema:
+        fields[last] = "cut off by a truncated answer"
+    return fields
+
+def decode_json(node: str, text: str, schema: Optional[Dict] = None) -> Tuple[Any, Dict[str, str]]:
+    """
+    Decode and validate an LLM answer without any new request. Returns the decoded answer (None if it
+    could not be parsed) and the fields that still need a targeted re-prompt, including those a
+    truncated answer may have cut off.
+    """
+    try:
+        value, repairs = repair_json(text)
+    except ValueError as e:
+        _decode_stats.record(node, "responses", "unparseable")
+        return None, {WHOLE_RESPONSE: str(e)}
+    invalid = {}
+    if schema:
+        truncated = _truncated_fields(value, schema) if "truncated" in repairs else {}
+        value, invalid = validate(value, schema)
+        invalid = {**truncated, **invalid}
+    _decode_stats.record(node, "responses", *(f"repair:{repair}" for repair in repairs))
+    if not repairs and not invalid:
+        _decode_stats.record(node, "clean")
+    elif not invalid:
+        _decode_stats.record(node, "repaired_locally")
+    else:
+        _decode_stats.record(node, "invalid_fields")
+    return value, invalid
+
+def apply_repair(node: str, value: Any, invalid: Dict[str, str], text: str, schema: Optional[Dict] = None) -> Any:
+    """
+    Merge the answer to a targeted repair prompt into a decoded answer. Fields the repair still gets wrong
+    fall back to their empty value; returns None when an unparseable answer could not be repaired.
+    """
+    _decode_stats.record(node, "reprompted")
+    try:
+        repaired, _ = repair_json(text)
+    except ValueError:
+        repaired = None
+    if WHOLE_RESPONSE in invalid:
+        if repaired is None or (schema and validate(repaired, schema)[1]):
+            _decode_stats.record(node, "failed")
+            return None
+        _decode_stats.record(node, "reprompt_fixed")
+        return validate(repaired, schema)[0] if schema else repaired
+
+    value = dict(value)
+    fixed = 0
+    for field in invalid:
+        spec = schema[field]
+        candidate, reason = _coerce(repaired.get(field), spec) if isinstance(repaired, dict) and field in repaired else (None, "missing")
+        if reason:
+            value[field] = [] if isinstance(spec, list) else "unknown"
+        else:
+            value[field] = candidate
+            fixed += 1
+    _decode_stats.record(node, "reprompt_fixed" if fixed == len(invalid) else "failed_fields")
+    return value
+
+def get_decode_stats() -> Dict[str, Dict[str, Any]]:
+    return _decode_stats.stats()
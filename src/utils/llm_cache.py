@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from src import ROOT_DIR
+
+# On-disk location and size budget of the shared LLM response cache
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(ROOT_DIR, ".cache", "llm_cache.sqlite"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+logger = logging.getLogger(__name__)
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _system_prompt_hash(prompt: str) -> Optional[str]:
+    """
+    Hash of the system message inside a serialized chat prompt, if there is one.
+    """
+    try:
+        messages = json.loads(prompt)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    for message in messages if isinstance(messages, list) else []:
+        if isinstance(message, dict) and message.get("id", [""])[-1] == "SystemMessage":
+            return _sha256(message.get("kwargs", {}).get("content", ""))
+    return None
+
+class LLMResponseCache(BaseCache):
+    """
+    Persistent, content-addressed LLM response cache backed by SQLite.
+
+    Entries are keyed by a hash of the serialized model parameters (model name, temperature, ...)
+    and the full prompt (system prompt and input), so any change to either is a miss.
+    Least recently used entries are evicted once the cache grows past `max_bytes`. The total size is
+    kept in the database by triggers, so processes sharing the file all see and enforce the same budget.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                system_hash TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used);
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_system_hash ON llm_cache (system_hash);
+            CREATE TABLE IF NOT EXISTS prompts (
+                name TEXT PRIMARY KEY,
+                system_hash TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS llm_cache_size (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO llm_cache_size (id, bytes) VALUES (0, (SELECT COALESCE(SUM(size), 0) FROM llm_cache));
+            CREATE TRIGGER IF NOT EXISTS llm_cache_size_insert AFTER INSERT ON llm_cache BEGIN
+                UPDATE llm_cache_size SET bytes = bytes + NEW.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS llm_cache_size_update AFTER UPDATE OF size ON llm_cache BEGIN
+                UPDATE llm_cache_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS llm_cache_size_delete AFTER DELETE ON llm_cache BEGIN
+                UPDATE llm_cache_size SET bytes = bytes - OLD.size WHERE id = 0;
+            END;
+        """)
+        self._conn.commit()
+
+    def _size(self) -> int:
+        """
+        Bytes of cached responses, as recorded in the database.
+        """
+        return self._conn.execute("SELECT bytes FROM llm_cache_size WHERE id = 0").fetchone()[0]
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return _sha256(f"{llm_string}\x00{prompt}")
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        try:
+            return [loads(item) for item in json.loads(row[0])]
+        except Exception as e:
+            logger.warning(f"Discarding unreadable LLM cache entry: {e}")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        response = json.dumps([dumps(generation) for generation in return_val])
+        key = self._key(prompt, llm_string)
+        size = len(response)
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE: replacing deletes the old row without firing the size trigger
+            self._conn.execute(
+                """INSERT INTO llm_cache (key, system_hash, response, size, last_used) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (key) DO UPDATE SET system_hash = excluded.system_hash, response = excluded.response,
+                   size = excluded.size, last_used = excluded.last_used""",
+                (key, _system_prompt_hash(prompt), response, size, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """
+        Drop least recently used entries until the cache is back under 90% of `max_bytes`. Runs inside the
+        write transaction of `update`, so the size it reads includes every other process's committed writes.
+        """
+        total = self._size()
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_used")
+        evicted = []
+        for key, size in rows:
+            if total <= target:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+        logger.info(f"LLM cache evicted {len(evicted)} entries.")
+
+    def register_prompts(self, prompts: Dict[str, str]) -> None:
+        """
+        Record the current text of named system prompts and drop the cached responses
+        of any prompt whose text changed since it was last registered.
+        """
+        with self._lock:
+            for name, text in prompts.items():
+                system_hash = _sha256(text)
+                row = self._conn.execute("SELECT system_hash FROM prompts WHERE name = ?", (name,)).fetchone()
+                if row and row[0] != system_hash:
+                    deleted = self._conn.execute("DELETE FROM llm_cache WHERE system_hash = ?", (row[0],)).rowcount
+                    logger.info(f"Prompt {name} changed, invalidated {deleted} cached responses.")
+                self._conn.execute("INSERT OR REPLACE INTO prompts (name, system_hash) VALUES (?, ?)", (name, system_hash))
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters for this process plus the current size of the cache.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            size = self._size()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache() -> LLMResponseCache:
+    """
+    Return the process-wide LLM response cache, opening it on first use.
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache()
+        return _llm_cache
@@ -0,0 +1,392 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional
+import openai
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from utils.token_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Provider limits shared by every LLM and embedding call of the process
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+
+# Retries of rate-limited and transient failures, with jittered exponential backoff between attempts
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))
+LLM_BACKOFF_BASE_SECONDS = 1.0
+LLM_BACKOFF_MAX_SECONDS = 60.0
+
+# Completion tokens reserved for a chat call that does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+
+class Priority(IntEnum):
+    """
+    Scheduling classes: queued interactive calls are always granted before queued bulk ones.
+    """
+    INTERACTIVE = 0
+    BULK = 1
+
+_priority_override = contextvars.ContextVar("llm_priority", default=None)
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """
+    Run the scheduled calls made inside the block (including from tasks and batch threads it starts)
+    with the given priority, whatever the default of the model making them.
+    """
+    token = _priority_override.set(priority)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously up to its capacity. A take larger than the capacity is let through
+    once the bucket is full and leaves it in debt, so oversized calls are delayed instead of blocked forever.
+    """
+
+    def __init__(self, capacity: float, per_second: float):
+        self.capacity = capacity
+        self.per_second = per_second
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.per_second)
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+class _Waiter:
+    """
+    A queued call: its token estimate, whether it was granted, and how to wake its caller.
+    """
+    __slots__ = ("tokens", "granted", "wake")
+
+    def __init__(self, tokens: int, wake: Callable[[], None]):
+        self.tokens = tokens
+        self.granted = False
+        self.wake = wake
+
+class LLMScheduler:
+    """
+    Process-wide gate in front of the LLM and embedding APIs.
+
+    Calls wait in a priority queue until both the requests-per-minute and the tokens-per-minute buckets
+    can serve them. Whoever finds the limits allowing it grants as many queued calls as they can serve
+    and wakes their callers; only the call at the head sleeps on a timer, until the buckets refill.
+    Rate-limited (429) and transient failures are retried with full-jitter exponential backoff, honouring
+    `Retry-After`. A 429 also pauses the whole queue, so concurrent callers back off
+    together instead of retrying in a herd. `stats()` exposes queue depths, waits and retry counts.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+        backoff_max: float = LLM_BACKOFF_MAX_SECONDS,
+        burst_seconds: float = 60.0
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        # Wakes blocked `acquire` callers; `aacquire` callers are woken through their own event loop
+        self._condition = threading.Condition(self._lock)
+        # Buckets hold `burst_seconds` worth of the per-minute limits
+        self._requests = TokenBucket(requests_per_minute * burst_seconds / 60, requests_per_minute / 60)
+        self._tokens = TokenBucket(tokens_per_minute * burst_seconds / 60, tokens_per_minute / 60)
+        self._queue = []
+        self._waiters = {}
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._metrics = {
+            "granted": {p.name: 0 for p in Priority},
+            "wait_seconds": {p.name: 0.0 for p in Priority},
+            "max_queue_depth": 0,
+            "tokens": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+        }
+
+    def _enqueue(self, priority: Priority, waiter: "_Waiter"):
+        """
+        Queue a call; the lock must be held.
+        """
+        ticket = (int(priority), next(self._sequence))
+        heapq.heappush(self._queue, ticket)
+        self._waiters[ticket] = waiter
+        self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], len(self._queue))
+        return ticket
+
+    def _dispatch(self) -> float:
+        """
+        Grant queued calls in priority order for as long as the limits allow, waking their callers, and
+        return how long until the call left at the head can be granted (0 with an empty queue). A call
+        that becomes the head without being granted is woken too, to wait for exactly that long.
+        The lock must be held.
+        """
+        granted = False
+        while self._queue:
+            ticket = self._queue[0]
+            waiter = self._waiters[ticket]
+            now = time.monotonic()
+            wait = max(self._paused_until - now, self._requests.wait_time(1, now), self._tokens.wait_time(waiter.tokens, now))
+            if wait > 0:
+                if granted:
+                    waiter.wake()
+                return wait
+            heapq.heappop(self._queue)
+            del self._waiters[ticket]
+            self._requests.take(1, now)
+            self._tokens.take(waiter.tokens, now)
+            self._metrics["tokens"] += waiter.tokens
+            waiter.granted = granted = True
+            waiter.wake()
+        return 0.0
+
+    def _timeout(self, ticket, wait: float) -> Optional[float]:
+        """
+        How long a queued call sleeps before checking again: the head until the limits allow it, the others
+        until woken. The lock must be held.
+        """
+        return wait if self._queue[0] == ticket else None
+
+    def _discard(self, ticket) -> None:
+        """
+        Drop an abandoned call from the queue and let the calls behind it move up. The lock must be held.
+        """
+        if self._waiters.pop(ticket, None) is not None:
+            was_head = self._queue[0] == ticket
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            if was_head and self._queue:
+                self._waiters[self._queue[0]].wake()
+            self._dispatch()
+
+    def _granted(self, priority: Priority, started: float) -> None:
+        with self._lock:
+            self._metrics["granted"][priority.name] += 1
+            self._metrics["wait_seconds"][priority.name] += time.monotonic() - started
+
+    def acquire(self, tokens: int, priority: Priority = Priority.BULK) -> None:
+        """
+        Block until a call of `tokens` estimated tokens may be sent.
+        """
+        started = time.monotonic()
+        waiter = _Waiter(tokens, self._condition.notify_all)
+        with self._condition:
+            ticket = self._enqueue(priority, waiter)
+            try:
+                while not waiter.granted:
+                    wait = self._dispatch()
+                    if not waiter.granted:
+                        self._condition.wait(self._timeout(ticket, wait))
+            finally:
+                if not waiter.granted:
+                    self._discard(ticket)
+        self._granted(priority, started)
+
+    async def aacquire(self, tokens: int, priority: Priority = Priority.BULK) -> None:
+        """
+        Async counterpart of `acquire`.
+        """
+        started = time.monotonic()
+        loop, event = asyncio.get_running_loop(), asyncio.Event()
+        waiter = _Waiter(tokens, lambda: loop.call_soon_threadsafe(event.set))
+        with self._lock:
+            ticket = self._enqueue(priority, waiter)
+        try:
+            while True:
+                with self._lock:
+                    wait = self._dispatch()
+                    if waiter.granted:
+                        break
+                    timeout = self._timeout(ticket, wait)
+                    event.clear()
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                if not waiter.granted:
+                    self._discard(ticket)
+        self._granted(priority, started)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Backoff before retrying after `error`, or None when the error is not worth retrying.
+        """
+        rate_limited = isinstance(error, openai.RateLimitError)
+        transient = isinstance(error, (openai.APIConnectionError, openai.InternalServerError)) or (
+            isinstance(error, openai.APIStatusError) and error.status_code in (408, 409)
+        )
+        if not (rate_limited or transient) or attempt >= self.max_retries:
+            return None
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        response = getattr(error, "response", None)
+        try:
+            delay = max(delay, float(response.headers.get("retry-after", 0)))
+        except (AttributeError, TypeError, ValueError):
+            pass
+        with self._lock:
+            self._metrics["retries"] += 1
+            if rate_limited:
+                self._metrics["rate_limited"] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def _failed(self) -> None:
+        with self._lock:
+            self._metrics["failures"] += 1
+
+    def call(self, fn: Callable[[], Any], tokens: int = 1, priority: Priority = Priority.BULK) -> Any:
+        """
+        Run `fn` (one API request of about `tokens` tokens) once the limits allow it, retrying on 429s and transient errors.
+        """
+        for attempt in itertools.count():
+            self.acquire(tokens, priority)
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    self._failed()
+                    raise
+                logger.warning(f"LLM call failed ({type(e).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s.")
+                time.sleep(delay)
+
+    async def acall(self, fn: Callable[[], Any], tokens: int = 1, priority: Priority = Priority.BULK) -> Any:
+        """
+        Async counterpart of `call`: `fn` returns an awaitable.
+        """
+        for attempt in itertools.count():
+            await self.aacquire(tokens, priority)
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    self._failed()
+                    raise
+                logger.warning(f"LLM call failed ({type(e).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s.")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            depth = {p.name: 0 for p in Priority}
+            for priority, _ in self._queue:
+                depth[Priority(priority).name] += 1
+            granted = self._metrics["granted"]
+            return {
+                **self._metrics,
+                "granted": dict(granted),
+                "queue_depth": depth,
+                "mean_wait_seconds": {
+                    name: self._metrics["wait_seconds"][name] / granted[name] if granted[name] else 0.0 for name in granted
+                },
+            }
+
+_llm_scheduler: Optional[LLMScheduler] = None
+_llm_scheduler_lock = threading.Lock()
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Return the process-wide scheduler, creating it with the env-configured limits on first use.
+    """
+    global _llm_scheduler
+    with _llm_scheduler_lock:
+        if _llm_scheduler is None:
+            _llm_scheduler = LLMScheduler()
+        return _llm_scheduler
+
+def set_llm_scheduler(scheduler: LLMScheduler) -> None:
+    """
+    Replace the process-wide scheduler, e.g. with other limits.
+    """
+    global _llm_scheduler
+    with _llm_scheduler_lock:
+        _llm_scheduler = scheduler
+
+def _current_priority(default: Priority) -> Priority:
+    override = _priority_override.get()
+    return default if override is None else override
+
+class ScheduledChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI whose API requests go through the process-wide scheduler. Responses served by the
+    LLM cache never reach the API, so they are not rate limited either.
+    """
+    priority: Priority = Priority.INTERACTIVE
+    # Retries are owned by the scheduler
+    max_retries: Optional[int] = 0
+
+    def _request_tokens(self, messages) -> int:
+        prompt_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        return prompt_tokens + (self.max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        generate = super()._generate
+        return get_llm_scheduler().call(
+            lambda: generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._request_tokens(messages), _current_priority(self.priority)
+        )
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        agenerate = super()._agenerate
+        return await get_llm_scheduler().acall(
+            lambda: agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._request_tokens(messages), _current_priority(self.priority)
+        )
+
+class ScheduledOpenAIEmbeddings(OpenAIEmbeddings):
+    """
+    OpenAIEmbeddings whose API requests, one per `chunk_size` texts, go through the process-wide scheduler.
+    """
+    priority: Priority = Priority.INTERACTIVE
+    # Retries are owned by the scheduler
+    max_retries: int = 0
+
+    def _chunks(self, texts: List[str], chunk_size: Optional[int]):
+        size = chunk_size or self.chunk_size
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    def embed_documents(self, texts: List[str], chunk_size: Optional[int] = None) -> List[List[float]]:
+        embed, scheduler = super().embed_documents, get_llm_scheduler()
+        embeddings = []
+        for chunk in self._chunks(texts, chunk_size):
+            embeddings.extend(scheduler.call(
+                lambda: embed(chunk, chunk_size), sum(map(estimate_tokens, chunk)), _current_priority(self.priority)
+            ))
+        return embeddings
+
+    async def aembed_documents(self, texts: List[str], chunk_size: Optional[int] = None) -> List[List[float]]:
+        aembed, scheduler = super().aembed_documents, get_llm_scheduler()
+        embeddings = []
+        for chunk in self._chunks(texts, chunk_size):
+            embeddings.extend(await scheduler.acall(
+                lambda: aembed(chunk, chunk_size), sum(map(estimate_tokens, chunk)), _current_priority(self.priority)
+            ))
+        return embeddings
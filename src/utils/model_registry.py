@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Models used when a caller does not name one
+DEFAULT_CHAT_MODEL = "gpt-3.5-turbo"
+DEFAULT_OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
+DEFAULT_SENTENCE_TRANSFORMER = "all-MiniLM-L6-v2"
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_instances: Dict[Hashable, Any] = {}
+_key_locks: Dict[Hashable, threading.Lock] = {}
+_environment_loaded = False
+
+def load_environment() -> None:
+    """
+    Load the .env file into the environment, once per process.
+    """
+    global _environment_loaded
+    with _lock:
+        if _environment_loaded:
+            return
+        _environment_loaded = True
+    from dotenv import load_dotenv
+    load_dotenv()
+
+def get_or_create(key: Hashable, factory: Callable[[], T]) -> T:
+    """
+    The process-wide instance registered under `key`, created with `factory` on first use.
+    Concurrent first uses of the same key wait for a single creation; other keys are not blocked.
+    """
+    instance = _instances.get(key)
+    if instance is not None:
+        return instance
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in _instances:
+            start = time.perf_counter()
+            _instances[key] = factory()
+            logger.info(f"Loaded {key} in {time.perf_counter() - start:.2f}s")
+        return _instances[key]
+
+def _chat_key(model, temperature, priority):
+    # Priority.INTERACTIVE is 0; the scheduler module is only imported when a client is created
+    return ("chat", model, temperature, int(priority or 0))
+
+def get_chat_model(model: str = DEFAULT_CHAT_MODEL, temperature: float = 0, priority=None):
+    """
+    Shared scheduled, cached chat client for a model, temperature and scheduling priority.
+    """
+    def create():
+        load_environment()
+        from utils.llm_cache import get_llm_cache
+        from utils.llm_scheduler import Priority, ScheduledChatOpenAI
+        return ScheduledChatOpenAI(
+            model=model, temperature=temperature, cache=get_llm_cache(), priority=priority or Priority.INTERACTIVE
+        )
+    return get_or_create(_chat_key(model, temperature, priority), create)
+
+def set_chat_model(instance, model: str = DEFAULT_CHAT_MODEL, temperature: float = 0, priority=None) -> None:
+    """
+    Use `instance` wherever get_chat_model is asked for this model, e.g. a fake model in benchmarks.
+    """
+    with _lock:
+        _instances[_chat_key(model, temperature, priority)] = instance
+
+def get_openai_embeddings(model: str = DEFAULT_OPENAI_EMBEDDING_MODEL):
+    """
+    Shared scheduled OpenAI embeddings client for a model.
+    """
+    def create():
+        load_environment()
+        from utils.llm_scheduler import ScheduledOpenAIEmbeddings
+        return ScheduledOpenAIEmbeddings(model=model)
+    return get_or_create(("openai_embeddings", model), create)
+
+def get_sentence_transformer(name: str = DEFAULT_SENTENCE_TRANSFORMER):
+    """
+    Shared local sentence-transformers encoder, loaded from disk or the hub on first use.
+    """
+    def create():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(name)
+    return get_or_create(("sentence_transformer", name), create)
+
+def prewarm(*loaders: Callable[[], Any]) -> List[Any]:
+    """
+    Create models ahead of their first use, e.g. `prewarm(get_chat_model, lambda: get_sentence_transformer("all-mpnet-base-v2"))`.
+    The loaders run concurrently; returns their instances in order.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(loaders))) as executor:
+        return list(executor.map(lambda loader: loader(), loaders))
+
+def loaded_models() -> List[Hashable]:
+    return list(_instances)
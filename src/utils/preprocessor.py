@@ -3,3 +3,15 @@ def extract_name_from_file_name(file_name):
     Extracts a candidate's name from file names like `cv_<name>.txt` or `interview_<name>.txt`.
     """
     return file_name.split('_')[1].split('.')[0].title()
+
+def candidate_id_from_file_name(file_name, prefix):
+    """
+    Maps a source file name like `cv_1.txt` or `interview_1.txt` to its candidate key (`candidate_1`).
+    """
+    return file_name.replace(f"{prefix}_", "candidate_").split(".txt")[0]
+
+def candidate_id_from_position(index):
+    """
+    Maps the position of a LinkedIn profile in `linkedin_profiles.json` to its candidate key.
+    """
+    return f"candidate_{index + 1}"
@@ -0,0 +1,315 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from utils.embeddings_preprocessor import total_years
+from src import DATA_DIR
+
+# On-disk location of the candidate profile store
+PROFILE_STORE_PATH = os.getenv("PROFILE_STORE_PATH", os.path.join(DATA_DIR, "profiles_candidates.sqlite"))
+# JSON export written by the consolidator, which seeds an empty store whoever opens it first
+PROFILES_SEED_PATH = os.getenv("PROFILES_SEED_PATH", os.path.join(DATA_DIR, "profiles_candidates2.json"))
+
+# Candidates loaded per query when iterating over the whole store
+LOAD_BATCH_SIZE = 500
+
+# Version of the derived columns (total_years); bump it whenever their computation changes,
+# so stores written before are recomputed when opened
+DERIVED_COLUMNS_VERSION = 1
+
+# Columns of the entry tables; any other key of an entry, and values that are not a string or number, are kept in its `extra` JSON
+EXPERIENCE_COLUMNS = ("title", "company", "duration_years", "description")
+EDUCATION_COLUMNS = ("degree", "institution", "year")
+# Profile fields stored in their own columns and tables; a value of another type than these tables hold
+# (e.g. Skills given as one string) is kept in the candidate's `extra` JSON as it is
+TEXT_FIELDS = (("name", "name"), ("Summary", "summary"))
+LIST_FIELDS = ("Experience", "Education", "Skills")
+# Key of the candidate's `extra` JSON listing the list fields the profile did not have (e.g. error profiles)
+ABSENT_FIELDS_KEY = "__absent__"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    candidate_id TEXT PRIMARY KEY,
+    name TEXT,
+    summary TEXT,
+    total_years REAL NOT NULL DEFAULT 0,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS experience (
+    candidate_id TEXT NOT NULL REFERENCES candidates(candidate_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT,
+    company TEXT,
+    duration_years,
+    description TEXT,
+    source TEXT,
+    extra TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (candidate_id, position)
+);
+CREATE TABLE IF NOT EXISTS education (
+    candidate_id TEXT NOT NULL REFERENCES candidates(candidate_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    degree TEXT,
+    institution TEXT,
+    year,
+    source TEXT,
+    extra TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (candidate_id, position)
+);
+CREATE TABLE IF NOT EXISTS skills (
+    candidate_id TEXT NOT NULL REFERENCES candidates(candidate_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    skill TEXT NOT NULL,
+    skill_key TEXT NOT NULL,
+    source TEXT,
+    PRIMARY KEY (candidate_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_total_years ON candidates(total_years);
+CREATE INDEX IF NOT EXISTS idx_education_degree ON education(degree COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_skills_skill_key ON skills(skill_key);
+"""
+
+def _entry_row(candidate_id, position, entry, columns):
+    if not isinstance(entry, dict):
+        # A plain string entry is searchable as a description, and read back as the string it was
+        description = entry if isinstance(entry, str) else None
+        return (candidate_id, position, *(description if column == "description" else None for column in columns), None, json.dumps(entry))
+    source = json.dumps(entry["source"]) if "source" in entry else None
+    values = {column: entry[column] for column in columns if type(entry.get(column)) in (str, int, float)}
+    extra = {key: value for key, value in entry.items() if key not in values and key != "source"}
+    return (candidate_id, position, *(values.get(column) for column in columns), source, json.dumps(extra))
+
+def _entry(row, columns):
+    values, source, extra = row[:len(columns)], row[len(columns)], json.loads(row[len(columns) + 1])
+    if not isinstance(extra, dict):
+        return extra
+    entry = {column: value for column, value in zip(columns, values) if value is not None}
+    if source is not None:
+        entry["source"] = json.loads(source)
+    entry.update(extra)
+    return entry
+
+def _skill_row_fits(skill) -> bool:
+    # A skill row holds a name, plus the sources of a {"skill", "source"} entry
+    return isinstance(skill, str) or (isinstance(skill, dict) and skill.keys() == {"skill", "source"} and isinstance(skill["skill"], str))
+
+class ProfileStore(Mapping):
+    """
+    SQLite store of synthesized candidate profiles, with one table each for candidates, experience,
+    education and skills (including their `source` provenance) and indexes on skill, degree and total years.
+
+    It reads like the `{candidate_id: profile}` dict the agents expect, but loads profiles lazily:
+    looking one up costs a few indexed queries, iterating over `items()` loads them in batches,
+    and the `candidates_with_*` lookups answer filters without loading any profile. A profile reads back
+    equal to the one stored, error profiles and plain string entries included.
+    """
+
+    def __init__(self, path: str = PROFILE_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < DERIVED_COLUMNS_VERSION:
+            self._recompute_total_years()
+            self._conn.execute(f"PRAGMA user_version = {DERIVED_COLUMNS_VERSION}")
+        self._conn.commit()
+
+    def _recompute_total_years(self) -> None:
+        experience = {}
+        for candidate_id, duration in self._conn.execute("SELECT candidate_id, duration_years FROM experience"):
+            experience.setdefault(candidate_id, []).append({"duration_years": duration})
+        self._conn.execute("UPDATE candidates SET total_years = 0")
+        self._conn.executemany(
+            "UPDATE candidates SET total_years = ? WHERE candidate_id = ?",
+            [(total_years(entries), candidate_id) for candidate_id, entries in experience.items()]
+        )
+
+    # Writes
+
+    def _delete_rows(self, candidate_ids: List[str], tables=("experience", "education", "skills", "candidates")) -> None:
+        for start in range(0, len(candidate_ids), LOAD_BATCH_SIZE):
+            batch = candidate_ids[start:start + LOAD_BATCH_SIZE]
+            marks = ",".join("?" * len(batch))
+            for table in tables:
+                self._conn.execute(f"DELETE FROM {table} WHERE candidate_id IN ({marks})", batch)
+
+    def _write(self, profiles: Dict[str, Dict]) -> None:
+        candidates, experience, education, skills = [], [], [], []
+        for candidate_id, profile in profiles.items():
+            text_fields = {field for field, _ in TEXT_FIELDS if isinstance(profile.get(field), str)}
+            list_fields = {field for field in LIST_FIELDS if isinstance(profile.get(field), list) and (
+                field != "Skills" or all(_skill_row_fits(skill) for skill in profile[field])
+            )}
+            extra = {key: value for key, value in profile.items() if key not in text_fields | list_fields}
+            absent = [field for field in LIST_FIELDS if field not in profile]
+            if absent:
+                extra[ABSENT_FIELDS_KEY] = absent
+            candidates.append((
+                candidate_id, *(profile[field] if field in text_fields else None for field, _ in TEXT_FIELDS),
+                total_years(profile.get("Experience")), json.dumps(extra)
+            ))
+            for position, entry in enumerate(profile["Experience"] if "Experience" in list_fields else []):
+                experience.append(_entry_row(candidate_id, position, entry, EXPERIENCE_COLUMNS))
+            for position, entry in enumerate(profile["Education"] if "Education" in list_fields else []):
+                education.append(_entry_row(candidate_id, position, entry, EDUCATION_COLUMNS))
+            for position, skill in enumerate(profile["Skills"] if "Skills" in list_fields else []):
+                name, source = (skill["skill"], json.dumps(skill["source"])) if isinstance(skill, dict) else (skill, None)
+                skills.append((candidate_id, position, name, name.strip().lower(), source))
+
+        # Child rows are replaced, the candidate row is updated in place so it keeps its order
+        self._delete_rows(list(profiles), ("experience", "education", "skills"))
+        self._conn.executemany("""
+            INSERT INTO candidates (candidate_id, name, summary, total_years, extra) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(candidate_id) DO UPDATE SET
+                name = excluded.name, summary = excluded.summary, total_years = excluded.total_years, extra = excluded.extra
+        """, candidates)
+        self._conn.executemany("INSERT INTO experience VALUES (?, ?, ?, ?, ?, ?, ?, ?)", experience)
+        self._conn.executemany("INSERT INTO education VALUES (?, ?, ?, ?, ?, ?, ?)", education)
+        self._conn.executemany("INSERT INTO skills VALUES (?, ?, ?, ?, ?)", skills)
+
+    def upsert_many(self, profiles: Dict[str, Dict]) -> None:
+        """
+        Insert or replace the given candidates' profiles in one transaction; other candidates are untouched.
+        """
+        with self._lock, self._conn:
+            self._write(profiles)
+
+    def upsert(self, candidate_id: str, profile: Dict) -> None:
+        self.upsert_many({candidate_id: profile})
+
+    def delete(self, candidate_ids: Iterable[str]) -> None:
+        with self._lock, self._conn:
+            self._delete_rows(list(candidate_ids))
+
+    def replace_all(self, profiles: Dict[str, Dict]) -> None:
+        """
+        Make the store hold exactly the given profiles, in one transaction.
+        """
+        with self._lock, self._conn:
+            for table in ("experience", "education", "skills", "candidates"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._write(profiles)
+
+    def import_json(self, json_path: str) -> int:
+        """
+        Load a `{candidate_id: profile}` JSON export (e.g. profiles_candidates.json) into the store.
+        """
+        with open(json_path, "r") as file:
+            profiles = json.load(file)
+        self.upsert_many(profiles)
+        logging.info(f"Imported {len(profiles)} profiles from {json_path} into {self.path}")
+        return len(profiles)
+
+    # Reads
+
+    def _load(self, candidate_ids: List[str]) -> Dict[str, Dict]:
+        marks = ",".join("?" * len(candidate_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT candidate_id, name, summary, extra FROM candidates WHERE candidate_id IN ({marks})", candidate_ids
+            ).fetchall()
+            profiles = {}
+            for candidate_id, name, summary, extra in rows:
+                profile = {} if name is None else {"name": name}
+                if summary is not None:
+                    profile["Summary"] = summary
+                extra = json.loads(extra)
+                absent = extra.pop(ABSENT_FIELDS_KEY, ())
+                profile.update({field: [] for field in LIST_FIELDS if field not in absent}, **extra)
+                profiles[candidate_id] = profile
+            for table, columns, field in (("experience", EXPERIENCE_COLUMNS, "Experience"), ("education", EDUCATION_COLUMNS, "Education")):
+                for row in self._conn.execute(
+                    f"SELECT candidate_id, {', '.join(columns)}, source, extra FROM {table} "
+                    f"WHERE candidate_id IN ({marks}) ORDER BY candidate_id, position", candidate_ids
+                ):
+                    profiles[row[0]][field].append(_entry(row[1:], columns))
+            for candidate_id, skill, source in self._conn.execute(
+                f"SELECT candidate_id, skill, source FROM skills WHERE candidate_id IN ({marks}) ORDER BY candidate_id, position",
+                candidate_ids
+            ):
+                profiles[candidate_id]["Skills"].append(skill if source is None else {"skill": skill, "source": json.loads(source)})
+        # Keep the requested order
+        return {candidate_id: profiles[candidate_id] for candidate_id in candidate_ids if candidate_id in profiles}
+
+    def __getitem__(self, candidate_id: str) -> Dict:
+        profile = self._load([candidate_id]).get(candidate_id)
+        if profile is None:
+            raise KeyError(candidate_id)
+        return profile
+
+    def __contains__(self, candidate_id) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM candidates WHERE candidate_id = ?", (candidate_id,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT candidate_id FROM candidates ORDER BY rowid")]
+
+    def items(self, candidate_ids: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Yield (candidate_id, profile) pairs, for all candidates or the given ones, loading `LOAD_BATCH_SIZE` at a time.
+        """
+        candidate_ids = self.ids() if candidate_ids is None else list(candidate_ids)
+        for start in range(0, len(candidate_ids), LOAD_BATCH_SIZE):
+            yield from self._load(candidate_ids[start:start + LOAD_BATCH_SIZE]).items()
+
+    def values(self) -> Iterator[Dict]:
+        return (profile for _, profile in self.items())
+
+    def subset(self, candidate_ids: Iterable[str]) -> Dict[str, Dict]:
+        return dict(self.items(candidate_ids))
+
+    def to_dict(self) -> Dict[str, Dict]:
+        return dict(self.items())
+
+    # Indexed lookups
+
+    def candidates_with_skill(self, skill: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT candidate_id FROM skills WHERE skill_key = ?", (skill.strip().lower(),)
+            )]
+
+    def candidates_with_degree(self, degree: str) -> List[str]:
+        """
+        Candidates with a degree starting with `degree`, case-insensitively (e.g. "PhD", "MSc in Data").
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT candidate_id FROM education WHERE degree LIKE ?", (degree + "%",)
+            )]
+
+    def candidates_by_years(self, min_years: Optional[float] = None, max_years: Optional[float] = None) -> List[str]:
+        """
+        Candidates whose total years of experience are within [min_years, max_years].
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT candidate_id FROM candidates WHERE total_years >= ? AND total_years <= ? ORDER BY rowid",
+                (float("-inf") if min_years is None else min_years, float("inf") if max_years is None else max_years)
+            )]
+
+    def close(self) -> None:
+        self._conn.close()
+
+def open_profile_store(path: str = PROFILE_STORE_PATH, json_path: Optional[str] = PROFILES_SEED_PATH) -> ProfileStore:
+    """
+    Open the profile store, seeding an empty store from the consolidator's JSON export when it exists.
+    """
+    store = ProfileStore(path)
+    if json_path and os.path.exists(json_path) and len(store) == 0:
+        store.import_json(json_path)
+    return store
@@ -0,0 +1,112 @@
+import json
+import re
+from itertools import combinations
+from typing import Callable, Dict, List, Optional
+
+# Dict entries with more keys than this are matched by a linear subset test instead of being indexed
+MAX_INDEXED_KEYS = 8
+
+# Fields compared, after normalization, by fuzzy matching
+FUZZY_KEYS = {
+    "Experience": ("title", "company"),
+    "Education": ("degree", "institution"),
+}
+
+def _canonical(value):
+    """
+    Hashable stand-in for a value that compares like the value itself.
+    """
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("json", json.dumps(value, sort_keys=True, default=str))
+
+def _normalize_text(value) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", str(value).lower()))
+
+class _FieldIndex:
+    """
+    Lookup structures for one field (e.g. Experience) of one source.
+    """
+    __slots__ = ("subsets", "strings", "wide_items", "fuzzy")
+
+    def __init__(self, items, fuzzy_keys):
+        self.subsets, self.strings, self.wide_items, self.fuzzy = set(), set(), [], set()
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, str):
+                self.strings.add(item)
+            elif isinstance(item, dict):
+                if len(item) > MAX_INDEXED_KEYS:
+                    self.wide_items.append(item)
+                else:
+                    # Every subset of the item's pairs, so "entry is a subset of item" is a single lookup
+                    pairs = [(key, _canonical(value)) for key, value in item.items()]
+                    for size in range(len(pairs) + 1):
+                        self.subsets.update(frozenset(subset) for subset in combinations(pairs, size))
+                if fuzzy_keys:
+                    self.fuzzy.add(tuple(_normalize_text(item.get(key, "")) for key in fuzzy_keys))
+
+    def matches(self, entry, fuzzy_keys) -> bool:
+        if isinstance(entry, str):
+            return entry in self.strings
+        if not isinstance(entry, dict):
+            return False
+        if str(entry) in self.strings:
+            return True
+        if frozenset((key, _canonical(value)) for key, value in entry.items()) in self.subsets:
+            return True
+        if any(entry.items() <= item.items() for item in self.wide_items):
+            return True
+        return bool(fuzzy_keys) and tuple(_normalize_text(entry.get(key, "")) for key in fuzzy_keys) in self.fuzzy
+
+class ProvenanceIndex:
+    """
+    Per-candidate index of the parsed source entries (e.g. {"CV": ..., "LinkedIn": ..., "Interview": ...}),
+    built once so attributing a synthesized Experience/Education entry or skill to its sources takes a few
+    hash lookups instead of comparing it with every source entry.
+
+    An entry matches a source when it equals one of the source's entries or is a subset of it, as before.
+    With `fuzzy`, Experience/Education entries also match when their normalized title/company
+    (degree/institution) are identical, e.g. "Data Scientist, TechCorp Inc." vs "data scientist, Techcorp inc".
+    """
+
+    def __init__(self, sources: Dict[str, Dict], normalize_skills: Optional[Callable[[List[str]], List[str]]] = None, fuzzy: bool = False):
+        self.sources = {name: entry if isinstance(entry, dict) else {} for name, entry in sources.items()}
+        self.normalize_skills = normalize_skills or (lambda skills: skills)
+        self.fuzzy = fuzzy
+        self._fields = {}
+        self._skills = None
+
+    def _field(self, field_name: str) -> Dict[str, _FieldIndex]:
+        if field_name not in self._fields:
+            fuzzy_keys = FUZZY_KEYS.get(field_name) if self.fuzzy else None
+            self._fields[field_name] = {
+                name: _FieldIndex(entry.get(field_name, []), fuzzy_keys) for name, entry in self.sources.items()
+            }
+        return self._fields[field_name]
+
+    def field_sources(self, entry, field_name: str) -> List[str]:
+        """
+        Names of the sources whose `field_name` contains the entry.
+        """
+        fuzzy_keys = FUZZY_KEYS.get(field_name) if self.fuzzy else None
+        return [name for name, index in self._field(field_name).items() if index.matches(entry, fuzzy_keys)]
+
+    def skill_sources(self, skill: str) -> List[str]:
+        """
+        Names of the sources listing the skill, compared after skill normalization.
+        """
+        if self._skills is None:
+            self._skills = {name: set(self.normalize_skills(self._skill_names(entry.get("Skills", []))))
+                            for name, entry in self.sources.items()}
+        normalized = self.normalize_skills([skill]) if isinstance(skill, str) else []
+        return [name for name, skills in self._skills.items() if normalized and normalized[0] in skills]
+
+    @staticmethod
+    def _skill_names(skills) -> List[str]:
+        if isinstance(skills, str):
+            return [skill for skill in skills.split(",") if skill.strip()]
+        if isinstance(skills, (list, dict)):
+            return [skill for skill in skills if isinstance(skill, str)]
+        return []
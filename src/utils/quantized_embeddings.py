@@ -0,0 +1,166 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from utils.similarity import SCORE_CHUNK_ROWS, SimilarityIndex, normalize_rows, top_k
+
+logger = logging.getLogger(__name__)
+
+# Compressed first-pass scoring of large embedding matrices: "" (off), "float16", "int8" or "pq",
+# used from QUANTIZE_FROM candidates on, optionally after PCA to EMBEDDING_PCA_DIM dimensions
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "")
+EMBEDDING_PCA_DIM = int(os.getenv("EMBEDDING_PCA_DIM", "0"))
+QUANTIZE_FROM = int(os.getenv("QUANTIZE_FROM", "1000000"))
+QUANTIZATION_MODES = ("float16", "int8", "pq")
+
+# Candidates the compressed first pass keeps for the exact float32 re-rank
+RERANK_CANDIDATES = 256
+# Vectors the PCA and the quantizers are trained on, sampled evenly across the matrix; about the
+# 39 points per centroid faiss asks for to train the 256 centroids of each product-quantizer sub-vector
+TRAIN_SAMPLE = 10_000
+# Dimensions per product-quantizer sub-vector; each sub-vector is stored as one byte
+PQ_DIMS_PER_CODE = 16
+
+def _factory_string(mode: str, dim: int, pca_dim: Optional[int]) -> str:
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode {mode!r}, expected one of {QUANTIZATION_MODES}")
+    coded_dim = pca_dim or dim
+    if mode == "float16":
+        codec = "SQfp16"
+    elif mode == "int8":
+        codec = "SQ8"
+    else:
+        if coded_dim % PQ_DIMS_PER_CODE:
+            raise ValueError(f"Product quantization needs a dimension divisible by {PQ_DIMS_PER_CODE}, got {coded_dim}")
+        codec = f"PQ{coded_dim // PQ_DIMS_PER_CODE}"
+    return f"PCA{pca_dim},{codec}" if pca_dim else codec
+
+def read_codes(path: str):
+    """
+    Codes written by `QuantizedIndex.save`, to pass as `codes`.
+    """
+    import faiss
+    return faiss.read_index(path)
+
+class QuantizedIndex:
+    """
+    Compressed copy of an embedding matrix for a fast approximate first pass, re-ranked exactly.
+
+    The rows are L2-normalized and encoded with faiss as float16, int8 scalar-quantized or product-quantized
+    codes, optionally after a PCA to `pca_dim` dimensions, and scored by inner product on the codes. Only the
+    best `rerank` candidates of that pass are read back from `vectors` (typically the memory-mapped
+    `EmbeddingStore.matrix`) in full precision and ranked by exact cosine similarity, so the full matrix never
+    has to be in RAM. `rows` maps candidates to matrix rows, as in SimilarityIndex.
+
+    Training and encoding are costly, so `codes` takes an index already built over the same candidates, e.g.
+    written by `save` and read back with `read_codes`; it is then only wrapped, never modified.
+    """
+
+    def __init__(self, ids: Sequence, vectors, rows: Optional[np.ndarray] = None, mode: str = "int8",
+                 pca_dim: Optional[int] = None, chunk_rows: int = SCORE_CHUNK_ROWS, codes=None):
+        self.ids = list(ids)
+        self.vectors = vectors
+        self.rows = np.arange(len(self.ids)) if rows is None else np.asarray(rows)
+        self.mode = mode
+        self.pca_dim = pca_dim or None
+        self.dim = vectors.shape[1]
+        if codes is not None:
+            if codes.ntotal != len(self.ids) or codes.d != self.dim:
+                raise ValueError(f"Quantized codes of {codes.ntotal} {codes.d}-dimensional vectors do not match {len(self.ids)} {self.dim}-dimensional embeddings")
+            self.index = codes
+            return
+        # Imported here, so modules that only may quantize do not load faiss
+        import faiss
+        start = time.perf_counter()
+        self.index = faiss.index_factory(self.dim, _factory_string(mode, self.dim, self.pca_dim), faiss.METRIC_INNER_PRODUCT)
+        if not self.index.is_trained:
+            sample = np.linspace(0, len(self.ids) - 1, min(len(self.ids), TRAIN_SAMPLE)).astype(np.int64)
+            self.index.train(self._read(sample))
+        for begin in range(0, len(self.ids), chunk_rows):
+            self.index.add(self._read(np.arange(begin, min(begin + chunk_rows, len(self.ids)))))
+        logger.info(f"Quantized {len(self.ids)} embeddings as {self.description} in {time.perf_counter() - start:.1f}s")
+
+    def _read(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Normalized full-precision vectors of the candidates at `positions`, read in row order.
+        """
+        rows = self.rows[positions]
+        order = np.argsort(rows, kind="stable")
+        vectors = np.empty((len(rows), self.dim), dtype=np.float32)
+        vectors[order] = normalize_rows(self.vectors[rows[order]])
+        return vectors
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def save(self, path: str) -> None:
+        """
+        Write the trained codes atomically, for `read_codes`.
+        """
+        import faiss
+        faiss.write_index(self.index, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    @property
+    def description(self) -> str:
+        return self.mode + (f" after PCA to {self.pca_dim} dimensions" if self.pca_dim else "")
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the codes (the PCA matrix and codebooks are negligible next to them).
+        """
+        return self.index.sa_code_size() * self.index.ntotal
+
+    @property
+    def full_nbytes(self) -> int:
+        """
+        Bytes of the same embeddings as a float32 matrix.
+        """
+        return len(self.ids) * self.dim * 4
+
+    def search(self, query_embedding, k: int, rerank: int = RERANK_CANDIDATES) -> List[Tuple[object, float]]:
+        """
+        The `k` most similar candidates as (candidate_id, similarity), best first.
+        """
+        return self.search_many(np.array(query_embedding, ndmin=2), k, rerank)[0]
+
+    def search_many(self, query_embeddings, k: int, rerank: int = RERANK_CANDIDATES) -> List[List[Tuple[object, float]]]:
+        """
+        `search` for each row of a (queries, dim) matrix, with one compressed first pass for all of them.
+        `rerank=0` returns the first-pass ranking and scores as they are.
+        """
+        queries = normalize_rows(query_embeddings)
+        if not self.ids:
+            return [[] for _ in queries]
+        _, positions = self.index.search(queries, min(max(k, rerank), len(self.ids)))
+        results = []
+        for query, shortlisted in zip(queries, positions):
+            shortlisted = shortlisted[shortlisted >= 0]
+            if rerank:
+                scores = self._read(shortlisted) @ query
+                best = top_k(scores, k)
+                results.append([(self.ids[shortlisted[i]], float(scores[i])) for i in best])
+            else:
+                results.append([(self.ids[position], None) for position in shortlisted[:k]])
+        return results
+
+    def evaluate(self, query_embeddings, k: int = 10, rerank: int = RERANK_CANDIDATES) -> Dict[str, float]:
+        """
+        Memory saved, and recall@k of the compressed first pass alone and re-ranked, against exact search
+        over the full-precision matrix.
+        """
+        exact = SimilarityIndex(self.ids, self.vectors, rows=self.rows)
+        expected = [{candidate_id for candidate_id, _ in exact.search(query, k)} for query in query_embeddings]
+
+        def recall(results):
+            return float(np.mean([len(want & {candidate_id for candidate_id, _ in got}) / k for got, want in zip(results, expected)]))
+
+        return {
+            "bytes": self.nbytes,
+            "full_bytes": self.full_nbytes,
+            "compression": self.full_nbytes / self.nbytes,
+            "recall_first_pass": recall(self.search_many(query_embeddings, k, rerank=0)),
+            "recall_reranked": recall(self.search_many(query_embeddings, k, rerank)),
+        }
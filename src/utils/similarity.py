@@ -0,0 +1,172 @@
+from collections.abc import Mapping
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+# Matrix rows scored per block; bounds the memory touched at once when the matrix is memory-mapped
+SCORE_CHUNK_ROWS = 65536
+# Queries scored together by search_many; with SCORE_CHUNK_ROWS it bounds the block of scores held at once
+QUERY_BLOCK = 256
+
+def normalize(vector) -> np.ndarray:
+    """
+    Flat float32 unit-length copy of a vector; an all-zero vector stays zero.
+    """
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def normalize_rows(matrix) -> np.ndarray:
+    """
+    float32 copy of the matrix with unit-length rows; all-zero rows stay zero.
+    """
+    matrix = np.array(matrix, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the `k` highest scores, best first, ties broken by index, selected with argpartition
+    instead of a full sort.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    # The partition boundary may split equal scores; take every index tied with the k-th best
+    threshold = scores[candidates].min()
+    candidates = np.flatnonzero(scores >= threshold)
+    return candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+
+class SimilarityIndex:
+    """
+    Cosine similarity of a query against every candidate embedding with one matrix-vector product.
+
+    In-memory matrices are copied once into a row-normalized float32 matrix. A memory-mapped matrix
+    (e.g. `EmbeddingStore.matrix`) is kept where it is, with its inverse row norms computed once, and scored
+    `chunk_rows` rows at a time so it never has to fit in RAM. `rows` maps candidates to matrix rows when
+    the matrix holds more rows than candidates.
+    """
+
+    def __init__(self, ids: Sequence, matrix, rows: Optional[np.ndarray] = None, chunk_rows: int = SCORE_CHUNK_ROWS):
+        self.ids = list(ids)
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+        if isinstance(matrix, np.memmap):
+            self.matrix = matrix
+            self.inverse_norms = np.empty(len(matrix), dtype=np.float32)
+            for start in range(0, len(matrix), chunk_rows):
+                norms = np.linalg.norm(matrix[start:start + chunk_rows], axis=1)
+                self.inverse_norms[start:start + chunk_rows] = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        else:
+            self.matrix = normalize_rows(matrix) if len(self.ids) else np.empty((0, 0), dtype=np.float32)
+            self.inverse_norms = None
+
+    @classmethod
+    def from_mapping(cls, embeddings: Mapping, **kwargs) -> "SimilarityIndex":
+        """
+        Index of a `{candidate_id: embedding}` mapping.
+        """
+        ids = list(embeddings)
+        return cls(ids, [embeddings[candidate_id] for candidate_id in ids], **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query_embedding) -> np.ndarray:
+        """
+        Cosine similarity of the query with every candidate, in `ids` order.
+        """
+        if not self.ids:
+            return np.empty(0, dtype=np.float32)
+        query = normalize(query_embedding)
+        if self.inverse_norms is None and len(self.matrix) <= self.chunk_rows:
+            scores = self.matrix @ query
+        else:
+            scores = np.empty(len(self.matrix), dtype=np.float32)
+            for start in range(0, len(self.matrix), self.chunk_rows):
+                scores[start:start + self.chunk_rows] = self.matrix[start:start + self.chunk_rows] @ query
+            if self.inverse_norms is not None:
+                scores *= self.inverse_norms
+        return scores if self.rows is None else scores[self.rows]
+
+    def search(self, query_embedding, k: int) -> List[Tuple[object, float]]:
+        """
+        The `k` most similar candidates as (candidate_id, similarity), best first.
+        """
+        scores = self.scores(query_embedding)
+        return [(self.ids[i], float(scores[i])) for i in top_k(scores, k)]
+
+    def _candidate_blocks(self):
+        """
+        (first position, vectors, inverse norms or None) of consecutive blocks of `chunk_rows` candidates.
+        """
+        for start in range(0, len(self.ids), self.chunk_rows):
+            positions = np.arange(start, min(start + self.chunk_rows, len(self.ids)))
+            if self.rows is None:
+                rows = slice(start, start + len(positions))
+            else:
+                # Read in row order, which is what a memory-mapped matrix is fastest at
+                positions = positions[np.argsort(self.rows[positions], kind="stable")]
+                rows = self.rows[positions]
+            yield positions, self.matrix[rows], None if self.inverse_norms is None else self.inverse_norms[rows]
+
+    def search_many(self, query_embeddings, k: int, query_block: int = QUERY_BLOCK) -> List[List[Tuple[object, float]]]:
+        """
+        `search` for each row of a (queries, dim) matrix. Blocks of `query_block` queries are scored against
+        blocks of `chunk_rows` candidates with one matrix product each, keeping a running top k per query,
+        so memory stays bounded by query_block x chunk_rows scores whatever the number of queries.
+        """
+        queries = normalize_rows(query_embeddings)
+        k = min(k, len(self.ids))
+        if k <= 0:
+            return [[] for _ in queries]
+        results = []
+        for begin in range(0, len(queries), query_block):
+            block = queries[begin:begin + query_block]
+            best_scores = np.empty((len(block), 0), dtype=np.float32)
+            best_positions = np.empty((len(block), 0), dtype=np.int64)
+            for positions, vectors, inverse_norms in self._candidate_blocks():
+                scores = block @ vectors.T
+                if inverse_norms is not None:
+                    scores *= inverse_norms
+                best_scores = np.concatenate([best_scores, scores], axis=1)
+                best_positions = np.concatenate([best_positions, np.broadcast_to(positions, scores.shape)], axis=1)
+                if best_scores.shape[1] > k:
+                    kept = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    # Where the partition boundary split equal scores, keep the first candidates among them, as top_k does
+                    kept_scores = np.take_along_axis(best_scores, kept, axis=1)
+                    threshold = kept_scores.min(axis=1, keepdims=True)
+                    split = (best_scores == threshold).sum(axis=1) > (kept_scores == threshold).sum(axis=1)
+                    for row in np.flatnonzero(split):
+                        kept[row] = np.lexsort((best_positions[row], -best_scores[row]))[:k]
+                    best_scores = np.take_along_axis(best_scores, kept, axis=1)
+                    best_positions = np.take_along_axis(best_positions, kept, axis=1)
+            for scores, positions in zip(best_scores, best_positions):
+                order = np.lexsort((positions, -scores))
+                results.append([(self.ids[positions[i]], float(scores[i])) for i in order])
+        return results
+
+def similarity_index(embeddings) -> SimilarityIndex:
+    """
+    SimilarityIndex of a `{candidate_id: embedding}` mapping, reusing the one a view such as
+    `CandidateEmbeddings` already holds.
+    """
+    index = getattr(embeddings, "index", None)
+    return index if isinstance(index, SimilarityIndex) else SimilarityIndex.from_mapping(embeddings)
+
+def search_embeddings(embeddings, query_embedding, k: int) -> List[Tuple[object, float]]:
+    """
+    The `k` candidates of a `{candidate_id: embedding}` mapping most similar to the query, best first.
+    Views with a `search` of their own, such as CandidateEmbeddings, answer it themselves.
+    """
+    if hasattr(embeddings, "search"):
+        return embeddings.search(query_embedding, k)
+    return similarity_index(embeddings).search(query_embedding, k)
+
+def search_embeddings_many(embeddings, query_embeddings, k: int) -> List[List[Tuple[object, float]]]:
+    """
+    `search_embeddings` for each row of a (queries, dim) matrix, scored together in blocks.
+    """
+    if hasattr(embeddings, "search_many"):
+        return embeddings.search_many(query_embeddings, k)
+    return similarity_index(embeddings).search_many(query_embeddings, k)
@@ -0,0 +1,283 @@
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from utils.embeddings_preprocessor import skill_names, total_years
+from src import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Index written at ingest time next to the profile store
+STRUCTURED_INDEX_PATH = os.getenv("STRUCTURED_INDEX_PATH", os.path.join(DATA_DIR, "profiles_structured_index.npz"))
+
+# Skill bitmaps kept unpacked from their postings; each takes candidates / 8 bytes
+BITMAP_CACHE_SIZE = 256
+# Indexes of pools other than the saved one kept in memory, most recently used last
+POOL_CACHE_SIZE = 4
+
+# Degree levels, lowest first, and the degree spellings of each (as in the CV rule parser)
+DEGREE_LEVELS = ("Associate", "Bachelors", "Masters", "PhD")
+DEGREE_PATTERNS = (
+    ("PhD", re.compile(r"\b(?:ph\.?\s?d|doctor|doctorate|dphil)\b", re.IGNORECASE)),
+    ("Masters", re.compile(r"\b(?:master'?s?|m\.?sc|m\.?s|m\.?a|m\.?eng|mba)\b", re.IGNORECASE)),
+    ("Bachelors", re.compile(r"\b(?:bachelor'?s?|b\.?sc|b\.?s|b\.?a|b\.?eng)\b", re.IGNORECASE)),
+    ("Associate", re.compile(r"\bassociate'?s?\b", re.IGNORECASE)),
+)
+
+def degree_level(degree) -> Optional[str]:
+    """
+    Level of a degree name (e.g. "MSc in Data Science" -> "Masters"), or None when it names no known degree.
+    """
+    if not isinstance(degree, str):
+        return None
+    for level, pattern in DEGREE_PATTERNS:
+        if pattern.search(degree):
+            return level
+    return None
+
+def _identity(skills: List[str]) -> List[str]:
+    return skills
+
+class StructuredIndex:
+    """
+    Inverted indexes over the structured fields of a candidate pool, for pre-filtering before vector search.
+
+    Candidates are numbered in the order they were indexed (`ids`). Each skill, keyed by its `normalize_skills`
+    name, has a sorted array of candidate positions, unpacked into a bitmap when queried; each degree level has
+    a bitmap; and total years of experience are kept sorted for range lookups. `filter` intersects the bitmaps
+    of all criteria and returns a boolean mask over `ids`.
+    """
+
+    def __init__(self, ids: List[str], skills: Dict[str, np.ndarray], degrees: Dict[str, np.ndarray], years: np.ndarray,
+                 normalize_skills: Optional[Callable[[List[str]], List[str]]] = None):
+        self.ids = ids
+        self.skills = skills
+        self.degrees = degrees
+        self.years = years
+        self.normalize_skills = normalize_skills or _identity
+        self._years_order = np.argsort(years, kind="stable")
+        self._sorted_years = years[self._years_order]
+        self._bitmaps = OrderedDict()
+        self._lock = threading.Lock()
+        self._positions = None
+
+    @classmethod
+    def build(cls, profiles: Mapping, normalize_skills: Optional[Callable[[List[str]], List[str]]] = None) -> "StructuredIndex":
+        """
+        Index `{candidate_id: profile}` in iteration order.
+        """
+        normalize_skills = normalize_skills or _identity
+        ids, postings, degree_postings, years = [], {}, {level: [] for level in DEGREE_LEVELS}, []
+        for position, (candidate_id, profile) in enumerate(profiles.items()):
+            ids.append(candidate_id)
+            for skill in set(normalize_skills(skill_names(profile.get("Skills")))):
+                postings.setdefault(skill.lower(), []).append(position)
+            education = profile.get("Education") if isinstance(profile.get("Education"), list) else []
+            levels = {degree_level(entry.get("degree")) for entry in education if isinstance(entry, dict)}
+            for level in levels - {None}:
+                degree_postings[level].append(position)
+            years.append(total_years(profile.get("Experience")))
+        index = cls(
+            ids,
+            {skill: np.asarray(positions, dtype=np.int32) for skill, positions in postings.items()},
+            {level: cls._pack(np.asarray(positions, dtype=np.int64), len(ids)) for level, positions in degree_postings.items()},
+            np.asarray(years, dtype=np.float32),
+            normalize_skills,
+        )
+        logger.info(f"Indexed {len(ids)} candidates: {len(postings)} skills, degree levels and years of experience")
+        return index
+
+    @staticmethod
+    def _pack(positions: np.ndarray, size: int) -> np.ndarray:
+        bits = np.zeros(size, dtype=bool)
+        bits[positions] = True
+        return np.packbits(bits, bitorder="little")
+
+    @classmethod
+    def assemble(cls, ids: List[str], parts: Iterable, normalize_skills: Optional[Callable[[List[str]], List[str]]] = None) -> "StructuredIndex":
+        """
+        Index of `ids` taken from other indexes without re-reading profiles: each part is
+        `(index, source positions, target positions)`, and together the targets must cover every position of `ids`.
+        """
+        postings, years = {}, np.zeros(len(ids), dtype=np.float32)
+        degrees = {level: np.zeros(len(ids), dtype=bool) for level in DEGREE_LEVELS}
+        for index, sources, targets in parts:
+            remap = np.full(len(index), -1, dtype=np.int64)
+            remap[sources] = targets
+            for skill, positions in index.skills.items():
+                mapped = remap[positions]
+                mapped = mapped[mapped >= 0]
+                if len(mapped):
+                    postings.setdefault(skill, []).append(mapped)
+            for level in DEGREE_LEVELS:
+                bits = np.unpackbits(index.degrees[level], count=len(index), bitorder="little").astype(bool)
+                degrees[level][targets] = bits[sources]
+            years[targets] = index.years[sources]
+        return cls(
+            ids,
+            {skill: np.sort(np.concatenate(chunks)).astype(np.int32) for skill, chunks in postings.items()},
+            {level: np.packbits(bits, bitorder="little") for level, bits in degrees.items()},
+            years,
+            normalize_skills,
+        )
+
+    def positions(self, candidate_ids: Iterable[str]) -> np.ndarray:
+        """
+        Position of each candidate in `ids`, or -1 for candidates not indexed.
+        """
+        if self._positions is None:
+            self._positions = {candidate_id: position for position, candidate_id in enumerate(self.ids)}
+        return np.fromiter((self._positions.get(candidate_id, -1) for candidate_id in candidate_ids), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _all(self) -> np.ndarray:
+        # Bits past the last candidate are never unpacked, so they may be set too
+        return np.full((len(self.ids) + 7) // 8, 0xFF, dtype=np.uint8)
+
+    def skill_bitmap(self, skill: str) -> np.ndarray:
+        """
+        Packed bitmap of the candidates with a skill, matched by its normalized name.
+        """
+        names = self.normalize_skills([skill.strip()])
+        key = names[0].lower() if names else ""
+        with self._lock:
+            bitmap = self._bitmaps.get(key)
+            if bitmap is not None:
+                self._bitmaps.move_to_end(key)
+                return bitmap
+        bitmap = self._pack(self.skills.get(key, np.empty(0, dtype=np.int32)), len(self.ids))
+        with self._lock:
+            self._bitmaps[key] = bitmap
+            if len(self._bitmaps) > BITMAP_CACHE_SIZE:
+                self._bitmaps.popitem(last=False)
+        return bitmap
+
+    def degree_bitmap(self, degree: str) -> np.ndarray:
+        """
+        Packed bitmap of the candidates holding a degree of the level `degree` names ("PhD", "MSc", ...).
+        """
+        level = degree_level(degree) or degree
+        return self.degrees.get(level, self._pack(np.empty(0, dtype=np.int64), len(self.ids)))
+
+    def years_bitmap(self, min_years: Optional[float] = None, max_years: Optional[float] = None,
+                     exclusive: bool = False) -> np.ndarray:
+        """
+        Packed bitmap of the candidates whose total years of experience are within [min_years, max_years],
+        or (min_years, max_years) with `exclusive`.
+        """
+        low = 0 if min_years is None else np.searchsorted(self._sorted_years, min_years, side="right" if exclusive else "left")
+        high = len(self.ids) if max_years is None else np.searchsorted(self._sorted_years, max_years, side="left" if exclusive else "right")
+        return self._pack(self._years_order[low:high], len(self.ids))
+
+    def filter(self, skills: Iterable[str] = (), degree: Optional[str] = None, min_years: Optional[float] = None,
+               max_years: Optional[float] = None, exclusive: bool = False) -> np.ndarray:
+        """
+        Boolean mask over `ids` of the candidates having every skill, a degree of the given level and total
+        years of experience in range; criteria left empty do not filter.
+        """
+        bitmap = self._all()
+        for skill in skills:
+            if skill and skill.strip():
+                np.bitwise_and(bitmap, self.skill_bitmap(skill), out=bitmap)
+        if degree:
+            np.bitwise_and(bitmap, self.degree_bitmap(degree), out=bitmap)
+        if min_years is not None or max_years is not None:
+            np.bitwise_and(bitmap, self.years_bitmap(min_years, max_years, exclusive), out=bitmap)
+        return np.unpackbits(bitmap, count=len(self.ids), bitorder="little").astype(bool)
+
+    def candidates(self, **criteria) -> List[str]:
+        """
+        Ids of the candidates matching `filter(**criteria)`, in index order.
+        """
+        return [self.ids[position] for position in np.flatnonzero(self.filter(**criteria))]
+
+    def save(self, path: str = STRUCTURED_INDEX_PATH) -> None:
+        """
+        Write the index to an `.npz` file, atomically.
+        """
+        skills = sorted(self.skills)
+        offsets = np.cumsum([0] + [len(self.skills[skill]) for skill in skills])
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "wb") as file:
+            np.savez(
+                file,
+                ids=np.asarray(self.ids, dtype=str),
+                skill_names=np.asarray(skills, dtype=str),
+                skill_offsets=offsets,
+                skill_postings=np.concatenate([self.skills[skill] for skill in skills]) if skills else np.empty(0, dtype=np.int32),
+                degree_levels=np.asarray(DEGREE_LEVELS, dtype=str),
+                degree_bitmaps=np.stack([self.degrees[level] for level in DEGREE_LEVELS]),
+                years=self.years,
+            )
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str = STRUCTURED_INDEX_PATH, normalize_skills: Optional[Callable[[List[str]], List[str]]] = None) -> "StructuredIndex":
+        with np.load(path) as data:
+            offsets, postings = data["skill_offsets"], data["skill_postings"]
+            skills = {str(skill): postings[offsets[i]:offsets[i + 1]] for i, skill in enumerate(data["skill_names"])}
+            degrees = {str(level): bitmap for level, bitmap in zip(data["degree_levels"], data["degree_bitmaps"])}
+            return cls(data["ids"].tolist(), skills, degrees, data["years"], normalize_skills)
+
+_lock = threading.Lock()
+# Saved index of each path, with the modification time it was loaded or saved at
+_indexes: Dict[str, Tuple[int, StructuredIndex]] = {}
+# Indexes of other pools, keyed by (path, saved index modification time, candidate ids)
+_pools: "OrderedDict[Tuple, StructuredIndex]" = OrderedDict()
+
+def _pool_index(saved: Optional[StructuredIndex], profiles: Mapping, candidate_ids: List[str],
+                normalize_skills: Optional[Callable[[List[str]], List[str]]]) -> StructuredIndex:
+    """
+    Index of a pool other than the saved one: its candidates in the saved index are taken from it, and
+    only the others are built from their profiles.
+    """
+    positions = saved.positions(candidate_ids) if saved is not None else np.full(len(candidate_ids), -1, dtype=np.int64)
+    known = np.flatnonzero(positions >= 0)
+    missing = np.flatnonzero(positions < 0)
+    parts = [(saved, positions[known], known)] if len(known) else []
+    if len(missing):
+        built = StructuredIndex.build({candidate_ids[i]: profiles[candidate_ids[i]] for i in missing}, normalize_skills)
+        parts.append((built, np.arange(len(missing)), missing))
+    logger.info(f"Indexed a pool of {len(candidate_ids)} candidates: {len(known)} from the saved index, {len(missing)} built")
+    return StructuredIndex.assemble(candidate_ids, parts, normalize_skills)
+
+def get_structured_index(profiles: Mapping, normalize_skills: Optional[Callable[[List[str]], List[str]]] = None,
+                         path: str = STRUCTURED_INDEX_PATH, rebuild: bool = False) -> StructuredIndex:
+    """
+    Structured index of `profiles`, numbered in their iteration order. With `rebuild`, at ingest time, it is
+    built from them and saved. Otherwise it is the saved one when that holds exactly these candidates in that
+    order; any other pool is indexed in memory from the saved index, building only the candidates it lacks,
+    and kept for the next searches of the same pool. The saved index is never overwritten by a search.
+    """
+    candidate_ids = list(profiles)
+    with _lock:
+        if rebuild:
+            index = StructuredIndex.build(profiles, normalize_skills)
+            index.save(path)
+            _indexes[path] = (os.stat(path).st_mtime_ns, index)
+            return index
+        saved, mtime = None, None
+        if os.path.exists(path):
+            mtime = os.stat(path).st_mtime_ns
+            if path not in _indexes or _indexes[path][0] != mtime:
+                _indexes[path] = (mtime, StructuredIndex.load(path, normalize_skills))
+            saved = _indexes[path][1]
+        if saved is not None and saved.ids == candidate_ids:
+            return saved
+        key = (path, mtime, tuple(candidate_ids))
+        index = _pools.get(key)
+        if index is not None:
+            _pools.move_to_end(key)
+            return index
+    index = _pool_index(saved, profiles, candidate_ids, normalize_skills)
+    with _lock:
+        _pools[key] = index
+        while len(_pools) > POOL_CACHE_SIZE:
+            _pools.popitem(last=False)
+    return index
@@ -0,0 +1,28 @@
+import math
+from typing import List, Tuple
+
+# Rough characters-per-token ratio of OpenAI tokenizers on English text and JSON
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap, tokenizer-free estimate of the number of tokens in a text.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def pack_by_token_budget(items: List[Tuple[str, str]], budget: int) -> List[List[Tuple[str, str]]]:
+    """
+    Greedily group (key, text) items, in order, into groups whose estimated total tokens stay within `budget`.
+    An item larger than the budget on its own gets a group of its own.
+    """
+    groups, current, current_tokens = [], [], 0
+    for key, text in items:
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > budget:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append((key, text))
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
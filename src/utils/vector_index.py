@@ -0,0 +1,341 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from typing import Callable, Collection, Dict, List, Mapping, Optional, Sequence, Tuple
+import faiss
+import numpy as np
+from utils.embeddings_preprocessor import profile_text_hash
+from utils.batch_embedder import embed_texts
+from utils.model_registry import DEFAULT_SENTENCE_TRANSFORMER, get_or_create, get_sentence_transformer
+from src import ROOT_DIR
+
+logger = logging.getLogger(__name__)
+
+# Root of the persisted vector indexes, one directory per (model, name, kind)
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(ROOT_DIR, ".cache", "vector_index"))
+# Index kind used when a caller does not choose one: "flat" (exact), "ivf" or "hnsw" (approximate)
+VECTOR_INDEX_KIND = os.getenv("VECTOR_INDEX_KIND", "flat")
+INDEX_KINDS = ("flat", "ivf", "hnsw")
+
+# IVF: inverted lists trained per index (4 * sqrt(n) when 0) and lists probed per query
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+# Points faiss wants per inverted list to train the coarse quantizer
+IVF_POINTS_PER_LIST = 39
+# Retrain the IVF quantizer once the index grew this many times past the size it was trained on
+IVF_RETRAIN_GROWTH = 4
+
+# HNSW: neighbours per node, and candidate list sizes while building and searching
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+# HNSW graphs cannot drop nodes: removed vectors stay as tombstones until they make up this share of the index
+HNSW_REBUILD_DEAD_RATIO = 0.25
+
+INDEX_FILE = "index.faiss"
+HEADER_FILE = "index.json"
+
+def _normalized(vectors) -> np.ndarray:
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+class VectorIndex:
+    """
+    Persistent faiss index of candidate embeddings, kept in step with the profiles by candidate id.
+
+    Vectors are L2-normalized and searched by inner product, so scores are cosine similarities. "flat"
+    searches exactly; "ivf" and "hnsw" trade some recall for latency on large pools. Every candidate gets a
+    faiss label, and `index.json` next to `index.faiss` maps labels back to candidate ids and records the
+    hash of the text each vector was embedded from, so `sync` only embeds what changed since the last save.
+    `sync` belongs to ingestion; searches only `refresh` the index when another process saved it.
+    """
+
+    def __init__(self, path: str, kind: str = VECTOR_INDEX_KIND, model: Optional[str] = None, dim: Optional[int] = None):
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown vector index kind {kind!r}, expected one of {INDEX_KINDS}")
+        self.path = path
+        self.kind = kind
+        self.model = model
+        self.dim = dim
+        self.nprobe = IVF_NPROBE
+        self.ef_search = HNSW_EF_SEARCH
+        self._lock = threading.RLock()
+        self._index = None
+        self._labels: Dict[str, int] = {}
+        self._ids: Dict[int, str] = {}
+        self._hashes: Dict[str, str] = {}
+        self._dead: set = set()
+        self._next_label = 0
+        self._trained_on = 0
+        # Modification time of the header this instance last loaded or saved
+        self._mtime = None
+        if os.path.exists(os.path.join(path, HEADER_FILE)):
+            self._load()
+
+    def _load(self) -> None:
+        header_path = os.path.join(self.path, HEADER_FILE)
+        self._mtime = os.stat(header_path).st_mtime_ns
+        with open(header_path, "r") as file:
+            header = json.load(file)
+        if self.model and header["model"] != self.model:
+            raise ValueError(f"Vector index {self.path} holds {header['model']} embeddings, not {self.model}")
+        if header["kind"] != self.kind:
+            raise ValueError(f"Vector index {self.path} was built as {header['kind']!r}, not {self.kind!r}")
+        index = faiss.read_index(os.path.join(self.path, INDEX_FILE))
+        if index.ntotal != header["ntotal"]:
+            # Interrupted between writing the index and its header: start over, the next sync rebuilds it
+            logger.warning(f"Vector index {self.path} does not match its header, rebuilding it")
+            return
+        self._index = index
+        self.model, self.dim = header["model"], header["dim"]
+        self._labels = header["labels"]
+        self._ids = {label: candidate_id for candidate_id, label in self._labels.items()}
+        self._hashes = header["hashes"]
+        self._dead = set(header["dead"])
+        self._next_label = header["next_label"]
+        self._trained_on = header["trained_on"]
+
+    def refresh(self) -> bool:
+        """
+        Reload the index if another process saved it since this one loaded or saved it; returns whether it did.
+        """
+        try:
+            mtime = os.stat(os.path.join(self.path, HEADER_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            self._load()
+            return True
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __contains__(self, candidate_id) -> bool:
+        return candidate_id in self._labels
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._labels)
+
+    def _create(self, vectors: np.ndarray):
+        if self.kind == "flat":
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dim))
+        if self.kind == "hnsw":
+            hnsw = faiss.IndexHNSWFlat(self.dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            return faiss.IndexIDMap2(hnsw)
+        nlist = IVF_NLIST or int(4 * math.sqrt(len(vectors)))
+        nlist = max(1, min(nlist, len(vectors) // IVF_POINTS_PER_LIST))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(self.dim), self.dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        # Keeps label -> vector lookups possible, for removal and retraining
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        self._trained_on = len(vectors)
+        return index
+
+    def _vectors(self, labels: Sequence[int]) -> np.ndarray:
+        vectors = np.empty((len(labels), self.dim), dtype=np.float32)
+        for row, label in enumerate(labels):
+            vectors[row] = self._index.reconstruct(int(label))
+        return vectors
+
+    def rebuild(self) -> None:
+        """
+        Rebuild the index from its live vectors, dropping tombstones and retraining an IVF quantizer.
+        """
+        with self._lock:
+            labels = list(self._ids)
+            vectors = self._vectors(labels) if labels else np.empty((0, self.dim or 0), dtype=np.float32)
+            self._index, self._dead = None, set()
+            if labels:
+                self._index = self._create(vectors)
+                self._index.add_with_ids(vectors, np.asarray(labels, dtype=np.int64))
+            logger.info(f"Rebuilt {self.kind} vector index {self.path} with {len(labels)} vectors")
+
+    def upsert(self, candidate_ids: Sequence[str], vectors, hashes: Optional[Sequence[str]] = None) -> None:
+        """
+        Add the vectors of new candidates and replace those of known ones.
+        """
+        vectors = _normalized(vectors).reshape(len(candidate_ids), -1)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+            self._remove([candidate_id for candidate_id in candidate_ids if candidate_id in self._labels])
+            if self._index is None:
+                self._index = self._create(vectors)
+            labels = np.arange(self._next_label, self._next_label + len(candidate_ids), dtype=np.int64)
+            self._next_label += len(candidate_ids)
+            self._index.add_with_ids(vectors, labels)
+            for i, (candidate_id, label) in enumerate(zip(candidate_ids, labels.tolist())):
+                self._labels[candidate_id] = label
+                self._ids[label] = candidate_id
+                if hashes is not None:
+                    self._hashes[candidate_id] = hashes[i]
+            if self.kind == "ivf" and len(self._labels) > IVF_RETRAIN_GROWTH * self._trained_on:
+                self.rebuild()
+
+    def delete(self, candidate_ids: Sequence[str]) -> None:
+        """
+        Remove the given candidates; unknown ids are ignored.
+        """
+        with self._lock:
+            self._remove([candidate_id for candidate_id in candidate_ids if candidate_id in self._labels])
+
+    def _remove(self, candidate_ids: List[str]) -> None:
+        if not candidate_ids:
+            return
+        labels = [self._labels.pop(candidate_id) for candidate_id in candidate_ids]
+        for candidate_id, label in zip(candidate_ids, labels):
+            del self._ids[label]
+            self._hashes.pop(candidate_id, None)
+        if self.kind != "hnsw":
+            self._index.remove_ids(np.asarray(labels, dtype=np.int64))
+            return
+        self._dead.update(labels)
+        if len(self._dead) > HNSW_REBUILD_DEAD_RATIO * self._index.ntotal:
+            self.rebuild()
+
+    def sync(self, texts: Mapping[str, str], embed: Callable[[List[str]], np.ndarray]) -> int:
+        """
+        Make the index hold exactly the candidates of `{candidate_id: text}`: candidates that are new or whose
+        text changed are embedded with `embed(texts)`, the others keep their vectors, candidates no longer
+        present are removed. Saves the index when anything changed; returns the number of embedded texts.
+        """
+        hashes = {candidate_id: profile_text_hash(text) for candidate_id, text in texts.items()}
+        with self._lock:
+            gone = [candidate_id for candidate_id in self._labels if candidate_id not in hashes]
+            pending = [candidate_id for candidate_id, text_hash in hashes.items() if self._hashes.get(candidate_id) != text_hash]
+            self._remove(gone)
+            if pending:
+                self.upsert(pending, embed([texts[candidate_id] for candidate_id in pending]), [hashes[candidate_id] for candidate_id in pending])
+            if gone or pending:
+                self.save()
+                logger.info(f"Vector index {self.path}: {len(pending)} embedded, {len(gone)} removed, {len(self)} indexed")
+            return len(pending)
+
+    def save(self) -> None:
+        """
+        Write the index and then its header, each atomically.
+        """
+        with self._lock:
+            if self._index is None:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            index_path = os.path.join(self.path, INDEX_FILE)
+            faiss.write_index(self._index, index_path + ".tmp")
+            os.replace(index_path + ".tmp", index_path)
+            header_path = os.path.join(self.path, HEADER_FILE)
+            with open(header_path + ".tmp", "w") as file:
+                json.dump({
+                    "model": self.model, "kind": self.kind, "dim": self.dim, "ntotal": self._index.ntotal,
+                    "labels": self._labels, "hashes": self._hashes, "dead": sorted(self._dead),
+                    "next_label": self._next_label, "trained_on": self._trained_on,
+                }, file)
+            os.replace(header_path + ".tmp", header_path)
+            self._mtime = os.stat(header_path).st_mtime_ns
+
+    def search(self, query_embedding, k: int, candidate_ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+        """
+        The `k` nearest candidates as (candidate_id, cosine similarity), best first, among `candidate_ids`
+        when given.
+        """
+        return self.search_many(np.array(query_embedding, ndmin=2), k, candidate_ids)[0]
+
+    def search_many(self, query_embeddings, k: int, candidate_ids: Optional[Collection[str]] = None) -> List[List[Tuple[str, float]]]:
+        """
+        `search` for each row of a (queries, dim) matrix, in one faiss call.
+        """
+        queries = _normalized(query_embeddings)
+        with self._lock:
+            if self._index is None or not self._labels:
+                return [[] for _ in queries]
+            self._set_search_parameters()
+            # Tombstones and candidates outside `candidate_ids` can take up result slots, so fetch enough to
+            # still return k of the others
+            outside = 0
+            if candidate_ids is not None:
+                outside = len(self._labels) - sum(candidate_id in self._labels for candidate_id in candidate_ids)
+            fetch = min(k + len(self._dead) + outside, self._index.ntotal)
+            scores, labels = self._index.search(queries, fetch)
+            return [
+                [
+                    (self._ids[label], float(score)) for score, label in zip(row_scores, row_labels)
+                    if label in self._ids and (candidate_ids is None or self._ids[label] in candidate_ids)
+                ][:k]
+                for row_scores, row_labels in zip(scores, labels.tolist())
+            ]
+
+    def _set_search_parameters(self) -> None:
+        if self.kind == "ivf":
+            self._index.nprobe = self.nprobe
+        elif self.kind == "hnsw":
+            faiss.downcast_index(self._index.index).hnsw.efSearch = self.ef_search
+
+def get_vector_index(model: str = DEFAULT_SENTENCE_TRANSFORMER, name: str = "profiles", kind: str = VECTOR_INDEX_KIND) -> VectorIndex:
+    """
+    Process-wide vector index `name` of a model's embeddings, persisted under VECTOR_INDEX_DIR.
+    """
+    path = os.path.join(VECTOR_INDEX_DIR, re.sub(r"[^A-Za-z0-9_.-]+", "_", model), f"{name}-{kind}")
+    return get_or_create(("vector_index", model, name, kind), lambda: VectorIndex(path, kind=kind, model=model))
+
+def summary_texts(profiles: Mapping) -> Dict[str, str]:
+    """
+    `{candidate_id: Summary}` of the profiles that have one; error profiles (`{"error": ...}`) have none.
+    """
+    return {
+        candidate_id: profile["Summary"] for candidate_id, profile in profiles.items()
+        if isinstance(profile, dict) and isinstance(profile.get("Summary"), str)
+    }
+
+def sync_summary_index(profiles: Mapping, model: str = DEFAULT_SENTENCE_TRANSFORMER, kind: str = VECTOR_INDEX_KIND) -> VectorIndex:
+    """
+    Ingestion-time sync of the "summaries" index with `profiles`, the whole pool: embeds the new and changed
+    Summaries, removes the candidates that are gone or have no Summary, and saves the index.
+    """
+    index = get_vector_index(model, name="summaries", kind=kind)
+    index.sync(summary_texts(profiles), lambda texts: embed_texts(get_sentence_transformer(model), texts))
+    return index
+
+class PoolSearch:
+    """
+    Search of a pool through a persisted index, plus the candidates it lacks embedded for this search only:
+    those are scored exactly next to it and never added to the index or saved.
+    """
+
+    def __init__(self, index: VectorIndex, extra_ids: List[str], extra_vectors):
+        self.index = index
+        self.extra_ids = extra_ids
+        self.extra_vectors = _normalized(extra_vectors) if extra_ids else np.empty((0, index.dim or 0), dtype=np.float32)
+
+    def search(self, query_embedding, k: int, candidate_ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+        """
+        The `k` nearest candidates as (candidate_id, cosine similarity), best first, as `VectorIndex.search`.
+        """
+        results = self.index.search(query_embedding, k, candidate_ids)
+        if self.extra_ids:
+            scores = self.extra_vectors @ _normalized(query_embedding)[0]
+            results += [(candidate_id, float(score)) for candidate_id, score in zip(self.extra_ids, scores)]
+        return sorted(results, key=lambda result: -result[1])[:k]
+
+def open_summary_index(profiles: Mapping, model: str = DEFAULT_SENTENCE_TRANSFORMER, kind: str = VECTOR_INDEX_KIND):
+    """
+    Search over the Summaries of `profiles` through the "summaries" index as last synced at ingestion, which
+    is never pruned or saved here. Candidates the index lacks (a pool ingestion never synced, or candidates
+    added since) are embedded in memory for this search only.
+    """
+    index = get_vector_index(model, name="summaries", kind=kind)
+    index.refresh()
+    missing = {candidate_id: profiles[candidate_id] for candidate_id in profiles if candidate_id not in index}
+    if not missing:
+        return index
+    texts = summary_texts(missing)
+    logger.info(f"Vector index {index.path} lacks {len(missing)} of {len(profiles)} candidates, embedding {len(texts)} Summaries for this search")
+    return PoolSearch(index, list(texts), embed_texts(get_sentence_transformer(model), list(texts.values())))
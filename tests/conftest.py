@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+# Modules are imported as the runners import them: from src/ (`utils.x`) and from the project root (`src`)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
+
+# Keep the caches and checkpoints of the test run out of the project's .cache
+_cache_dir = tempfile.mkdtemp(prefix="tests-cache-")
+os.environ["LLM_CACHE_PATH"] = os.path.join(_cache_dir, "llm_cache.sqlite")
+os.environ["DOCUMENT_CHECKPOINT_PATH"] = os.path.join(_cache_dir, "document_checkpoints.sqlite")
+os.environ["GRAPH_CHECKPOINT_PATH"] = os.path.join(_cache_dir, "graph_checkpoints.sqlite")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["VECTOR_INDEX_DIR"] = os.path.join(_cache_dir, "vector_index")
+os.environ["EMBEDDING_CACHE_DIR"] = os.path.join(_cache_dir, "embeddings")
+os.environ["STRUCTURED_INDEX_PATH"] = os.path.join(_cache_dir, "profiles_structured_index.npz")
+os.environ["PROFILE_STORE_PATH"] = os.path.join(_cache_dir, "profiles_candidates.sqlite")
+os.environ["PROFILES_SEED_PATH"] = os.path.join(_cache_dir, "profiles_candidates.json")
@@ -0,0 +1,71 @@
+import contextvars
+import threading
+import time
+import numpy as np
+from utils import batch_embedder
+from utils.batch_embedder import embed_mapping, embed_texts
+
+def vector(text):
+    return [len(text), sum(map(ord, text)) % 97, ord(text[0]) if text else 0]
+
+class FakeEncoder:
+    """
+    Local encoder recording the texts of every forward pass.
+    """
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, show_progress_bar=False):
+        for start in range(0, len(texts), batch_size):
+            self.batches.append(list(texts[start:start + batch_size]))
+        return np.array([vector(text) for text in texts], dtype=np.float32)
+
+TEXTS = ["bb", "a", "dddd", "ccc", "eeeee", "a", "ffffff", "gg", "hhhhhhh", "iii"]
+
+def test_local_encoder_gets_length_sorted_batches_and_results_keep_input_order(monkeypatch):
+    monkeypatch.setattr(batch_embedder, "LOCAL_ENCODE_CHUNK", 4)
+    encoder = FakeEncoder()
+    vectors = embed_texts(encoder, TEXTS, batch_size=3)
+    assert vectors.dtype == np.float32
+    np.testing.assert_array_equal(vectors, np.array([vector(text) for text in TEXTS]))
+    sent = [text for batch in encoder.batches for text in batch]
+    assert [len(text) for text in sent] == sorted(map(len, TEXTS), reverse=True)
+    assert max(map(len, encoder.batches)) == 3
+
+CURRENT_REQUEST = contextvars.ContextVar("current_request", default=None)
+
+class FakeRemoteEmbeddings:
+    """
+    LangChain-style embedder answering slowly and recording the concurrency and the caller's context.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+        self.contexts = []
+
+    def embed_documents(self, texts):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.contexts.append(CURRENT_REQUEST.get())
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight -= 1
+        return [vector(text) for text in texts]
+
+def test_remote_embedder_gets_bounded_concurrent_chunks_in_the_callers_context():
+    embedder = FakeRemoteEmbeddings()
+    CURRENT_REQUEST.set("bulk")
+    try:
+        vectors = embed_texts(embedder, TEXTS * 3, batch_size=4, max_concurrency=2)
+    finally:
+        CURRENT_REQUEST.set(None)
+    np.testing.assert_array_equal(vectors, np.array([vector(text) for text in TEXTS * 3]))
+    assert embedder.max_in_flight == 2
+    assert embedder.contexts == ["bulk"] * 8
+
+def test_embed_mapping_and_empty_input():
+    mapping = embed_mapping(FakeEncoder(), {"candidate_2": "bb", "candidate_1": "a"}, batch_size=8)
+    assert list(mapping) == ["candidate_2", "candidate_1"]
+    np.testing.assert_array_equal(mapping["candidate_1"], vector("a"))
+    assert embed_texts(FakeEncoder(), []).shape == (0, 0)
@@ -0,0 +1,52 @@
+import json
+from utils.compact_profiles import CompactProfiles, Source
+
+LONG_SUMMARY = "Backend developer building payment services in Python and Go. " * 4
+
+PROFILES = {
+    "candidate_1": {
+        "name": "A",
+        "Summary": LONG_SUMMARY,
+        "Experience": [
+            {"title": "Dev", "company": "Acme", "duration_years": 3, "description": LONG_SUMMARY, "source": ["CV", "LinkedIn"]},
+            {"title": "Intern", "source": ["LinkedIn", "CV"]},
+            "Freelance consulting",
+        ],
+        "Education": [{"degree": "BSc", "institution": "Uni", "year": 2015, "source": ["Interview", "Unknown"]}],
+        "Skills": [{"skill": "Python", "source": ["CV"]}, {"skill": "Go", "source": ["CV", "Interview"]}],
+    },
+    "candidate_2": {"Skills": ["Python", "SQL"], "name": "B", "Experience": [], "Education": []},
+    "candidate_3": {"name": "C", "Skills": [{"skill": "Java"}, "SQL"]},
+    "candidate_4": {"error": "Failed to combine the 3 sources on synthesize_profiles"},
+}
+
+def test_profiles_read_back_unchanged():
+    pool = CompactProfiles(PROFILES)
+    assert pool.to_dict() == PROFILES
+    for candidate_id, profile in PROFILES.items():
+        # Key order too, so prompts built with json.dumps are unchanged
+        assert json.dumps(pool[candidate_id]) == json.dumps(profile)
+    # Java is only in a Skills list kept as is
+    assert pool.skills.strings == ["Python", "Go", "SQL"]
+    assert isinstance(pool.compact("candidate_1").values[1], bytes)
+
+def test_field_accessors_match_the_expanded_profiles():
+    pool = CompactProfiles(PROFILES)
+    for candidate_id, profile in PROFILES.items():
+        for key in ("name", "Summary", "Experience", "Education", "Skills"):
+            assert pool.field(candidate_id, key, "missing") == profile.get(key, "missing")
+    assert dict(pool.fields("Summary")) == {candidate_id: profile.get("Summary") for candidate_id, profile in PROFILES.items()}
+    assert pool.skill_names("candidate_1") == ["Python", "Go"]
+    assert pool.skill_names("candidate_2") == ["Python", "SQL"]
+    assert pool.skill_names("candidate_3") == ["Java", "SQL"]
+    assert pool.skill_names("candidate_4") == []
+    assert pool.skill_sources("candidate_1") == {"Python": Source.CV, "Go": Source.CV | Source.INTERVIEW}
+
+def test_add_and_discard():
+    pool = CompactProfiles(PROFILES)
+    pool.add("candidate_2", {"name": "B2", "Skills": ["Rust"]})
+    pool.discard("candidate_3")
+    pool.discard("candidate_9")
+    assert list(pool) == ["candidate_1", "candidate_2", "candidate_4"]
+    assert pool["candidate_2"] == {"name": "B2", "Skills": ["Rust"]}
+    assert "candidate_3" not in pool
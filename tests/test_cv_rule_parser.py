@@ -0,0 +1,22 @@
+from langgraph_agents.nodes import CV_FAST_PATH_MIN_CONFIDENCE
+from utils.cv_rule_parser import parse_cv_rules
+
+def test_line_listing_several_entries_falls_back_to_the_llm():
+    parsed, confidence = parse_cv_rules(
+        "Jane Doe\nExperience: 3 years as lead, 2 years at Acme\nEducation: BSc in Computer Science\nSkills: Python"
+    )
+    assert parsed["Experience"] == []
+    assert confidence < CV_FAST_PATH_MIN_CONFIDENCE
+
+def test_one_malformed_line_keeps_a_long_cv_off_the_fast_path():
+    entries = "".join(f"- Engineer at Company{i} (2 years)\n" for i in range(20))
+    cv = f"Jane Doe\nExperience:\n{entries}- Analyst at Beta; 2 years at Gamma\nEducation: BSc in Computer Science\nSkills: Python"
+    assert parse_cv_rules(cv)[1] < CV_FAST_PATH_MIN_CONFIDENCE
+    assert parse_cv_rules(cv.replace("- Analyst at Beta; 2 years at Gamma\n", ""))[1] == 1.0
+
+def test_well_formed_entries_are_parsed():
+    parsed, confidence = parse_cv_rules(
+        "Experience: 3 years as Data Analyst at Acme\nEducation: MSc in Data Science, University of Data, 2018\nSkills: Python, SQL"
+    )
+    assert parsed["Experience"] == [{"title": "Data Analyst", "company": "Acme", "duration_years": 3, "description": ""}]
+    assert confidence == 1.0
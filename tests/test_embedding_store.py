@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from utils import embedding_store
+from utils.embedding_store import EmbeddingStore
+
+def vectors(ids, dim=3):
+    return np.array([[int(candidate_id.split("_")[1]) + j / 10 for j in range(dim)] for candidate_id in ids], dtype=np.float32)
+
+def assert_holds(store, ids):
+    assert sorted(store) == sorted(ids)
+    assert len(store) == len(ids)
+    np.testing.assert_array_equal(store.matrix, vectors(store.ids))
+    for candidate_id in ids:
+        np.testing.assert_array_equal(store[candidate_id], vectors([candidate_id])[0])
+
+def test_capacity_doubles_as_rows_are_appended(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_store, "INITIAL_CAPACITY", 4)
+    store = EmbeddingStore(str(tmp_path), model="fake")
+    ids = [f"candidate_{i}" for i in range(11)]
+    capacities = []
+    for i in range(0, len(ids), 3):
+        store.upsert(ids[i:i + 3], vectors(ids[i:i + 3]))
+        capacities.append(store._vectors.shape[0])
+    assert capacities == [4, 8, 16, 16]
+    assert_holds(store, ids)
+    assert_holds(EmbeddingStore(str(tmp_path), model="fake"), ids)
+
+def test_upsert_updates_rows_in_place(tmp_path):
+    store = EmbeddingStore(str(tmp_path), model="fake")
+    store.upsert(["candidate_1", "candidate_2"], np.zeros((2, 3)))
+    store.upsert(["candidate_2", "candidate_3"], vectors(["candidate_2", "candidate_3"]))
+    store.upsert(["candidate_1"], vectors(["candidate_1"]))
+    assert store.ids == ["candidate_1", "candidate_2", "candidate_3"]
+    assert_holds(store, ["candidate_1", "candidate_2", "candidate_3"])
+    with pytest.raises(ValueError):
+        store.upsert(["candidate_4"], np.zeros((1, 4)))
+
+def test_delete_moves_the_last_row_into_the_freed_one(tmp_path):
+    store = EmbeddingStore(str(tmp_path), model="fake")
+    ids = [f"candidate_{i}" for i in range(6)]
+    store.upsert(ids, vectors(ids))
+    store.delete(["candidate_1", "candidate_9", "candidate_5"])
+    assert store.ids == ["candidate_0", "candidate_4", "candidate_2", "candidate_3"]
+    assert list(store.rows(["candidate_4", "candidate_3"])) == [1, 3]
+    assert_holds(store, ["candidate_0", "candidate_2", "candidate_3", "candidate_4"])
+    store.retain(["candidate_2", "candidate_0"])
+    assert_holds(EmbeddingStore(str(tmp_path)), ["candidate_0", "candidate_2"])
+    with pytest.raises(KeyError):
+        store.rows(["candidate_1"])
+
+def test_readonly_store_reads_but_refuses_writes(tmp_path):
+    EmbeddingStore(str(tmp_path), model="fake").upsert(["candidate_1"], vectors(["candidate_1"]))
+    store = EmbeddingStore(str(tmp_path), readonly=True)
+    assert_holds(store, ["candidate_1"])
+    assert not store.matrix.flags.writeable
+    with pytest.raises(PermissionError):
+        store.upsert(["candidate_2"], vectors(["candidate_2"]))
+    with pytest.raises(PermissionError):
+        store.delete(["candidate_1"])
+    with pytest.raises(ValueError):
+        EmbeddingStore(str(tmp_path), model="other")
@@ -0,0 +1,59 @@
+import os
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langgraph_agents import embeddings_agent
+from langgraph_agents.embeddings_agent import EmbeddingsAgent
+from utils import embeddings_cache
+from utils.embeddings_preprocessor import render_profile_text
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    embedded: list = []
+
+    def embed_documents(self, texts):
+        CountingEmbedding.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    fake = CountingEmbedding(size=16)
+    CountingEmbedding.embedded = []
+    monkeypatch.setattr(embeddings_agent, "get_openai_embeddings", lambda model: fake)
+    monkeypatch.setattr(embeddings_cache, "get_openai_embeddings", lambda model: fake)
+    # A cache of its own, so what other tests cached is not reused
+    monkeypatch.setattr(embeddings_agent, "EMBEDDING_MODEL", "fake-embeddings")
+    return fake
+
+def profile(skill):
+    return {"name": skill, "Summary": f"{skill} developer", "Skills": [skill]}
+
+def test_searches_read_the_synced_store_and_embed_new_profiles_in_memory(fake_embeddings, tmp_path):
+    path = str(tmp_path / "vectorstore")
+    profiles = {"candidate_1": profile("Python"), "candidate_2": profile("Java"), "candidate_3": profile("Go")}
+    EmbeddingsAgent(path).sync(profiles)
+    written = os.stat(os.path.join(path, "index.faiss")).st_mtime_ns
+
+    agent = EmbeddingsAgent(path)
+    pool = {"candidate_2": profiles["candidate_2"], "candidate_4": profile("Rust")}
+    CountingEmbedding.embedded = []
+    # A query equal to a profile text has distance 0 to it
+    best = agent.find_best_match(pool, render_profile_text(profile("Rust")), top_k=5)
+    assert [match["candidate_id"] for match in best][0] == "candidate_4"
+    assert {match["candidate_id"] for match in best} == {"candidate_2", "candidate_4"}
+    assert best[0]["similarity"] == pytest.approx(0.0, abs=1e-5)
+    assert CountingEmbedding.embedded == [render_profile_text(profile("Rust"))]
+
+    assert agent.find_best_match(pool, render_profile_text(profile("Java")))[0]["candidate_id"] == "candidate_2"
+    # The store was neither changed nor saved by the searches
+    assert os.stat(os.path.join(path, "index.faiss")).st_mtime_ns == written
+    assert sorted(agent.vectorstore.index_to_docstore_id.values()) == ["candidate_1", "candidate_2", "candidate_3"]
+
+def test_searches_reload_the_store_after_ingestion_syncs_it(fake_embeddings, tmp_path):
+    path = str(tmp_path / "vectorstore")
+    profiles = {"candidate_1": profile("Python")}
+    EmbeddingsAgent(path).sync(profiles)
+    agent = EmbeddingsAgent(path)
+    assert agent.vectorstore.index.ntotal == 1
+
+    profiles["candidate_2"] = profile("Java")
+    EmbeddingsAgent(path).sync(profiles)
+    assert agent.vectorstore.index.ntotal == 2
@@ -0,0 +1,83 @@
+import os
+import numpy as np
+from utils.embeddings_cache import ProfileEmbeddingCache
+from utils.embeddings_preprocessor import render_profile_text
+
+class CountingEncoder:
+    """
+    Local encoder embedding a text as [length, character sum], counting the texts it embedded.
+    """
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, show_progress_bar=False):
+        self.encoded.extend(texts)
+        return np.array([[len(text), sum(map(ord, text))] for text in texts], dtype=np.float32)
+
+def profile(name, summary, sources=("CV",)):
+    return {"name": name, "Summary": summary, "Skills": [{"skill": "Python", "source": list(sources)}]}
+
+PROFILES = {
+    "candidate_1": profile("A", "Backend developer"),
+    "candidate_2": profile("B", "Data scientist"),
+    # Renders to the same text as candidate_1
+    "candidate_3": profile("A", "Backend developer", sources=("LinkedIn",)),
+}
+
+def cache(tmp_path, encoder, renderer=render_profile_text, version=1):
+    return ProfileEmbeddingCache(encoder, "fake-model", cache_dir=str(tmp_path), renderer=renderer, version=version)
+
+def test_embed_only_embeds_texts_not_cached_yet(tmp_path):
+    encoder = CountingEncoder()
+    embeddings = cache(tmp_path, encoder).embed(PROFILES)
+    assert len(encoder.encoded) == 2
+    assert list(embeddings) == list(PROFILES)
+    np.testing.assert_array_equal(embeddings["candidate_1"], embeddings["candidate_3"])
+
+    # Another process opening the cache embeds nothing; a provenance-only edit neither
+    encoder.encoded.clear()
+    edited = {**PROFILES, "candidate_2": profile("B", "Data scientist", sources=("CV", "Interview"))}
+    cache(tmp_path, encoder).embed(edited)
+    assert encoder.encoded == []
+
+    changed = {**PROFILES, "candidate_2": profile("B", "Machine learning engineer")}
+    embeddings = cache(tmp_path, encoder).embed(changed)
+    assert encoder.encoded == [render_profile_text(changed["candidate_2"])]
+    np.testing.assert_array_equal(embeddings["candidate_2"], [len(encoder.encoded[0]), sum(map(ord, encoder.encoded[0]))])
+    # The query path never deletes: the old text is still cached
+    assert len(cache(tmp_path, encoder).store) == 3
+
+    encoder.encoded.clear()
+    cache(tmp_path, encoder).embed(PROFILES, refresh=True)
+    assert len(encoder.encoded) == 2
+
+def test_sync_records_hashes_so_embed_does_not_render_synced_candidates(tmp_path):
+    rendered = []
+    def renderer(profile):
+        rendered.append(profile["name"])
+        return render_profile_text(profile)
+
+    cache(tmp_path, CountingEncoder(), renderer).sync(PROFILES)
+    rendered.clear()
+    encoder = CountingEncoder()
+    reader = cache(tmp_path, encoder, renderer)
+    embeddings = reader.embed(PROFILES)
+    assert rendered == [] and encoder.encoded == []
+    assert sorted(embeddings) == sorted(PROFILES)
+
+    # Candidates the sync did not record are rendered and embedded
+    reader.embed({**PROFILES, "candidate_4": profile("D", "Designer")})
+    assert rendered == ["D"] and len(encoder.encoded) == 1
+
+def test_sync_drops_stale_texts_and_older_renderer_versions(tmp_path):
+    encoder = CountingEncoder()
+    old = cache(tmp_path, encoder, version=1)
+    old.sync(PROFILES)
+    assert os.path.isdir(old.store.path)
+
+    current = cache(tmp_path, encoder, version=2)
+    current.embed({**PROFILES, "candidate_4": profile("D", "Designer")})
+    assert len(current.store) == 3
+    current.sync({"candidate_1": PROFILES["candidate_1"], "candidate_2": profile("B", "Machine learning engineer")})
+    assert len(current.store) == 2
+    assert not os.path.exists(old.store.path)
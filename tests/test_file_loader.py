@@ -0,0 +1,87 @@
+import json
+import os
+from utils import file_loader
+from utils.file_loader import NDJSONProfileWriter, NDJSONProfiles, load_ndjson_index, load_ndjson_profiles, NDJSON_INDEX_SUFFIX
+
+def profile(name, padding=0):
+    return {"name": name, "Summary": "x" * padding}
+
+def test_index_tracks_updates_deletes_and_appends(tmp_path):
+    path = str(tmp_path / "profiles.ndjson")
+    with NDJSONProfileWriter(path) as writer:
+        writer.write("candidate_1", profile("A"))
+        writer.write("candidate_2", profile("B"))
+        writer.write("candidate_1", profile("A2"))
+        writer.write("candidate_3", profile("C"))
+        writer.delete("candidate_3")
+        writer.delete("unknown")
+    expected = {"candidate_1": profile("A2"), "candidate_2": profile("B")}
+    assert load_ndjson_profiles(path) == expected
+    with NDJSONProfiles(path) as profiles:
+        assert profiles.to_dict() == expected
+        assert list(profiles) == ["candidate_2", "candidate_1"]
+
+    # Records appended by another writer are indexed from where the saved index stopped
+    with open(path, "a") as file:
+        file.write(json.dumps({"candidate_id": "candidate_4", "profile": profile("D")}) + "\n")
+        file.write('{"candidate_id": "candidate_5", "prof')
+    index = load_ndjson_index(path)
+    assert set(index["offsets"]) == {"candidate_1", "candidate_2", "candidate_4"}
+    with NDJSONProfiles(path) as profiles:
+        assert profiles["candidate_4"] == profile("D") and "candidate_5" not in profiles
+
+    # The writer drops the partial record before appending
+    with NDJSONProfileWriter(path) as writer:
+        writer.write("candidate_5", profile("E"))
+    assert load_ndjson_profiles(path)["candidate_5"] == profile("E")
+
+def test_index_is_rebuilt_when_the_file_is_rewritten(tmp_path):
+    path = str(tmp_path / "profiles.ndjson")
+    with NDJSONProfileWriter(path) as writer:
+        for i in range(5):
+            writer.write(f"candidate_{i}", profile(str(i)))
+    with open(path, "w") as file:
+        file.write(json.dumps({"candidate_id": "other", "profile": profile("O", 500)}) + "\n")
+    with NDJSONProfiles(path) as profiles:
+        assert dict(profiles) == {"other": profile("O", 500)}
+    assert list(load_ndjson_index(path)["offsets"]) == ["other"]
+
+def test_profiles_mapping_keeps_the_last_decoded_profiles(tmp_path):
+    path = str(tmp_path / "profiles.ndjson")
+    with NDJSONProfileWriter(path) as writer:
+        for i in range(4):
+            writer.write(f"candidate_{i}", profile(str(i)))
+    with NDJSONProfiles(path, cache_size=2) as profiles:
+        first = profiles["candidate_0"]
+        profiles["candidate_1"]
+        assert profiles["candidate_0"] is first
+        profiles["candidate_2"]
+        assert list(profiles._cache) == ["candidate_0", "candidate_2"]
+        assert profiles["candidate_1"] == profile("1") and list(profiles._cache) == ["candidate_2", "candidate_1"]
+
+def test_writer_compacts_while_writing(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_loader, "COMPACTION_MIN_BYTES", 4096)
+    path = str(tmp_path / "profiles.ndjson")
+    writer = NDJSONProfileWriter(path)
+    for i in range(10):
+        writer.write(f"candidate_{i}", profile(str(i), 100))
+    reader = NDJSONProfiles(path)
+    sizes = []
+    for version in range(20):
+        for i in range(3):
+            writer.write(f"candidate_{i}", profile(f"{i}.{version}", 100))
+        sizes.append(os.path.getsize(path))
+    writer.delete("candidate_9")
+    # Without a flush, the file never grew much past twice its live records
+    assert max(sizes) < 2 * 4096 and sizes != sorted(sizes)
+
+    expected = {f"candidate_{i}": profile(f"{i}.19" if i < 3 else str(i), 100) for i in range(9)}
+    assert load_ndjson_profiles(path) == expected
+    # A reader opened before a compaction keeps its file until it refreshes
+    assert reader["candidate_5"] == profile("5", 100)
+    writer.close()
+    reader.refresh()
+    assert reader.to_dict() == expected
+    reader.close()
+    index = json.load(open(path + NDJSON_INDEX_SUFFIX))
+    assert index["size"] == os.path.getsize(path) and set(index["offsets"]) == set(expected)
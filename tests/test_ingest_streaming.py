@@ -0,0 +1,51 @@
+import asyncio
+import json
+import runner_candidates_consolidator as consolidator
+from utils.file_loader import NDJSONProfiles
+from utils.ingestion_manifest import IngestionManifest
+from utils.profile_store import ProfileStore
+
+def write_sources(data_dir):
+    (data_dir / "cvs").mkdir()
+    (data_dir / "interviews").mkdir()
+    for i in (1, 2, 3):
+        (data_dir / "cvs" / f"cv_{i}.txt").write_text(f"CV {i}")
+    (data_dir / "interviews" / "interview_1.txt").write_text("Interview 1")
+    (data_dir / "linkedin_profiles.json").write_text(json.dumps([{"name": "A"}, {"name": "B"}]))
+
+async def fake_parse(candidate_id, cv_text, linkedin_profile=None, interview_text=None):
+    if cv_text == "CV 3":
+        return {"error": "Failed to parse on cv_parser_node"}, {}, {}
+    return {"cv": cv_text}, linkedin_profile or {}, {"interview": interview_text} if interview_text else {}
+
+async def fake_synthesize(candidate_id, cv_entry, linkedin_entry, interview_entry):
+    return {"name": candidate_id, "Summary": cv_entry.get("cv", ""), "Experience": [], "Education": [], "Skills": []}
+
+def test_streamed_profiles_reach_the_store_and_the_manifest(tmp_path, monkeypatch):
+    write_sources(tmp_path)
+    manifest_path = str(tmp_path / "ingestion_manifest.json")
+    store_path = str(tmp_path / "profiles.sqlite")
+    ProfileStore(store_path).upsert("candidate_9", {"name": "Gone"})
+    monkeypatch.setattr(consolidator, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(consolidator, "MANIFEST_PATH", manifest_path)
+    monkeypatch.setattr(consolidator, "aparse_candidate", fake_parse)
+    monkeypatch.setattr(consolidator, "asynthesize_profile", fake_synthesize)
+    monkeypatch.setattr(consolidator, "open_profile_store", lambda json_path=None: ProfileStore(store_path))
+
+    output_path = str(tmp_path / "profiles.ndjson")
+    assert asyncio.run(consolidator.ingest_streaming(output_path, max_in_flight=2)) == 3
+
+    streamed = dict(NDJSONProfiles(output_path).items())
+    assert ProfileStore(store_path).to_dict() == streamed
+    assert sorted(streamed) == ["candidate_1", "candidate_2", "candidate_3"]
+
+    # An incremental run finds nothing to redo but the candidate whose CV failed to parse
+    manifest = IngestionManifest(manifest_path)
+    assert manifest.documents["interview/interview_1.txt"]["parsed"] == {"interview": "Interview 1"}
+    assert manifest.documents["cv/cv_3.txt"]["hash"] is None
+    changed = manifest.scan_text_files(str(tmp_path / "cvs"), "cv")
+    manifest.scan_text_files(str(tmp_path / "interviews"), "interview")
+    manifest.scan_linkedin(str(tmp_path / "linkedin_profiles.json"))
+    assert list(changed) == ["cv_3.txt"]
+    assert manifest.affected_candidates() == {"candidate_3"}
+    assert manifest.parsed_sources("linkedin", ["candidate_2"]) == {"candidate_2": {"name": "B"}}
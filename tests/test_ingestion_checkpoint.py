@@ -0,0 +1,88 @@
+import json
+import threading
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph_agents import nodes
+from langgraph_agents.graph_builder import create_profile_graph
+from utils.ingestion_checkpoint import get_document_checkpoints, get_graph_checkpointer, ingestion_thread_id, run_resumable
+
+EXTRACTION = {"name": "", "Experience": [], "Education": [], "Skills": ["Python"]}
+SYNTHESIS = {**EXTRACTION, "Summary": "Python developer"}
+
+class FakeChatModel:
+    """
+    Chat model answering every request with a valid extraction (or synthesis), which fails
+    like a killed process once it has answered `fail_after` requests.
+    """
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.answered = []
+        self._lock = threading.Lock()
+
+    def invoke(self, messages, config=None):
+        with self._lock:
+            if self.fail_after is not None and len(self.answered) >= self.fail_after:
+                raise RuntimeError("killed")
+            self.answered.append((messages[0].content, messages[-1].content))
+        answer = SYNTHESIS if messages[0].content == nodes.SYNTHESIS_PROMPT else EXTRACTION
+        return AIMessage(content=json.dumps(answer))
+
+    def batch(self, inputs, config=None):
+        return [self.invoke(messages) for messages in inputs]
+
+def _inputs(size=5):
+    return {
+        "cv_data": {f"cv_{i}.txt": f"Candidate {i} has been writing Python for a while." for i in range(size)},
+        "linkedin_data": [{"name": f"Candidate {i}", "Endorsements": ["Python"]} for i in range(size)],
+        "interview_data": {f"interview_{i}.txt": f"Candidate {i} talked about Python." for i in range(size)},
+    }
+
+@pytest.fixture
+def graph(tmp_path):
+    return create_profile_graph().compile(checkpointer=get_graph_checkpointer(str(tmp_path / "graph.sqlite")))
+
+def _run(graph, inputs, model, monkeypatch):
+    monkeypatch.setattr(nodes, "_model", lambda: model)
+    return run_resumable(graph, inputs)
+
+def test_killed_run_resumes_without_re_requesting_finished_documents(graph, monkeypatch):
+    inputs = _inputs()
+    killed = FakeChatModel(fail_after=8)
+    with pytest.raises(RuntimeError, match="killed"):
+        _run(graph, inputs, killed, monkeypatch)
+    assert len(killed.answered) == 8
+
+    resumed = FakeChatModel()
+    state = _run(graph, inputs, resumed, monkeypatch)
+
+    assert not set(killed.answered) & set(resumed.answered)
+    parser_requests = [request for request in resumed.answered if request[0] != nodes.SYNTHESIS_PROMPT]
+    assert len(parser_requests) == 15 - 8
+    assert sorted(state["profiles"]) == [f"candidate_{i}" for i in range(5)]
+
+def test_finished_run_clears_its_checkpoints(graph, monkeypatch):
+    inputs = _inputs(2)
+    _run(graph, inputs, FakeChatModel(), monkeypatch)
+
+    thread_id = ingestion_thread_id(inputs)
+    assert not graph.get_state({"configurable": {"thread_id": thread_id}}).values
+    store = get_document_checkpoints()
+    assert store._conn.execute("SELECT COUNT(*) FROM document_checkpoints WHERE thread_id = ?", (thread_id,)).fetchone()[0] == 0
+
+    # Nothing is left to resume: the same inputs are ingested from scratch
+    rerun = FakeChatModel()
+    _run(graph, inputs, rerun, monkeypatch)
+    assert len(rerun.answered) == 2 * 3 + 2
+
+def test_other_inputs_do_not_resume_an_unfinished_run(graph, monkeypatch):
+    inputs = _inputs()
+    with pytest.raises(RuntimeError):
+        _run(graph, inputs, FakeChatModel(fail_after=4), monkeypatch)
+
+    other_inputs = _inputs(3)
+    assert ingestion_thread_id(other_inputs) != ingestion_thread_id(inputs)
+    fresh = FakeChatModel()
+    state = _run(graph, other_inputs, fresh, monkeypatch)
+    assert len(fresh.answered) == 3 * 3 + 3
+    assert sorted(state["profiles"]) == [f"candidate_{i}" for i in range(3)]
@@ -0,0 +1,43 @@
+import json
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph_agents import nodes
+from utils.interview_chunks import merge_extractions
+
+def _partial(duration):
+    return {"name": "Jane Doe", "Experience": [{"title": "Lead", "company": "Acme", "duration_years": duration}], "Education": [], "Skills": []}
+
+def test_decimal_durations_conflict_instead_of_merging():
+    _, conflicts = merge_extractions([_partial("3.5"), _partial("35")])
+    assert conflicts
+    merged, conflicts = merge_extractions([_partial("3.5 years"), _partial("3.5 years.")])
+    assert not conflicts and merged["Experience"][0]["duration_years"] == "3.5 years"
+
+class FlakyBatchModel:
+    """
+    Chat model whose batch fails for the documents in `failing`, returning the exceptions as `return_exceptions` asks.
+    """
+
+    def __init__(self, failing):
+        self.failing = failing
+        self.invoked = []
+
+    def _answer(self, messages):
+        return AIMessage(content=json.dumps({"name": messages[-1].content, "Experience": [], "Education": [], "Skills": []}))
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        assert return_exceptions
+        return [RuntimeError("rate limited") if messages[-1].content in self.failing else self._answer(messages) for messages in inputs]
+
+    def invoke(self, messages, config=None):
+        self.invoked.append(messages[-1].content)
+        return self._answer(messages)
+
+def test_failed_parallel_chunk_is_retried_without_losing_the_others(monkeypatch):
+    model = FlakyBatchModel(failing={"chunk 1"})
+    monkeypatch.setattr(nodes, "_model", lambda: model)
+    requests = [(f"candidate_1#chunk{i}", [SystemMessage(content=nodes.INTERVIEW_PROMPT), HumanMessage(content=f"chunk {i}")]) for i in range(3)]
+
+    results = nodes._run_requests("interview_summarizer", requests, nodes._decode_interview, parallel=True)
+
+    assert model.invoked == ["chunk 1"]
+    assert [results[key]["name"] for key, _ in requests] == ["chunk 0", "chunk 1", "chunk 2"]
@@ -0,0 +1,15 @@
+from utils.json_repair import EXTRACTION_SCHEMA, decode_json, repair_json
+
+def test_string_cut_off_mid_way_is_dropped_not_closed():
+    value, repairs = repair_json('{"name": "Jane", "Skills": ["Python", "Py')
+    assert value == {"name": "Jane", "Skills": ["Python"]}
+    assert repairs == ["truncated"]
+
+def test_fields_a_truncated_answer_may_have_lost_are_re_prompted():
+    value, invalid = decode_json("test", '{"name": "Jane", "Skills": ["Python", "Py', EXTRACTION_SCHEMA)
+    assert value["name"] == "Jane"
+    assert set(invalid) == {"Skills", "Experience", "Education"}
+
+def test_complete_answer_with_prose_is_repaired_locally():
+    value, invalid = decode_json("test", 'Here you go: {"name": "Jane", "Experience": [], "Education": [], "Skills": ["Python"]} Done.', EXTRACTION_SCHEMA)
+    assert value["Skills"] == ["Python"] and not invalid
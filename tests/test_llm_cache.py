@@ -0,0 +1,77 @@
+from langchain_core.load import dumps
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.outputs import Generation
+from utils.llm_cache import LLMResponseCache
+
+LLM = "gpt-4o-mini temperature=0"
+
+def prompt(system, text):
+    return dumps([SystemMessage(content=system), HumanMessage(content=text)])
+
+def answer(text):
+    return [Generation(text=text)]
+
+def sizes(cache):
+    total = cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+    return cache._size(), total
+
+def test_hits_and_misses(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    assert cache.lookup(prompt("Parse CVs", "cv 1"), LLM) is None
+    cache.update(prompt("Parse CVs", "cv 1"), LLM, answer("{}"))
+    assert cache.lookup(prompt("Parse CVs", "cv 1"), LLM)[0].text == "{}"
+    # Another input, system prompt or model is a different entry
+    assert cache.lookup(prompt("Parse CVs", "cv 2"), LLM) is None
+    assert cache.lookup(prompt("Parse resumes", "cv 1"), LLM) is None
+    assert cache.lookup(prompt("Parse CVs", "cv 1"), "gpt-4o temperature=0") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 4
+
+    reopened = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    assert reopened.lookup(prompt("Parse CVs", "cv 1"), LLM)[0].text == "{}"
+
+def test_size_is_kept_by_triggers_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first, second = LLMResponseCache(path), LLMResponseCache(path)
+    first.update(prompt("s", "a"), LLM, answer("x" * 100))
+    second.update(prompt("s", "b"), LLM, answer("y" * 200))
+    # Overwriting an entry replaces its size instead of adding to it
+    first.update(prompt("s", "a"), LLM, answer("x" * 50))
+    assert sizes(first)[0] == sizes(first)[1] == sizes(second)[0]
+    first.clear()
+    assert sizes(second) == (0, 0)
+
+def used_at(cache, text, when):
+    cache._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (when, cache._key(prompt("s", text), LLM)))
+    cache._conn.commit()
+
+def test_least_recently_used_entries_are_evicted_down_to_90_percent(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.update(prompt("s", "input 0"), LLM, answer("x" * 1000))
+    entry_size = cache._size()
+    cache.max_bytes = int(10.5 * entry_size)
+    for i in range(1, 10):
+        cache.update(prompt("s", f"input {i}"), LLM, answer("x" * 1000))
+    for i in range(10):
+        used_at(cache, f"input {i}", i)
+    assert cache.stats()["entries"] == 10
+    # Input 0 was read last, so inputs 1 and 2 are now the least recently used
+    used_at(cache, "input 0", 100)
+
+    cache.update(prompt("s", "input 10"), LLM, answer("x" * 1000))
+    size, total = sizes(cache)
+    assert size == total == 9 * entry_size <= 0.9 * cache.max_bytes
+    assert [cache.lookup(prompt("s", f"input {i}"), LLM) is not None for i in range(11)] == [True, False, False] + [True] * 8
+
+def test_register_prompts_invalidates_only_changed_prompts(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.register_prompts({"cv": "Parse CVs", "linkedin": "Parse LinkedIn"})
+    cache.update(prompt("Parse CVs", "cv 1"), LLM, answer("cv"))
+    cache.update(prompt("Parse LinkedIn", "profile 1"), LLM, answer("linkedin"))
+
+    cache.register_prompts({"cv": "Parse CVs", "linkedin": "Parse LinkedIn"})
+    assert cache.lookup(prompt("Parse CVs", "cv 1"), LLM) is not None
+
+    cache.register_prompts({"cv": "Parse CVs, v2", "linkedin": "Parse LinkedIn"})
+    assert cache._conn.execute("SELECT COUNT(*) FROM llm_cache WHERE system_hash IS NOT NULL").fetchone()[0] == 1
+    assert cache.lookup(prompt("Parse LinkedIn", "profile 1"), LLM) is not None
+    assert sizes(cache)[0] == sizes(cache)[1]
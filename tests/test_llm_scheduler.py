@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+import httpx
+import openai
+import pytest
+from utils.llm_scheduler import LLMScheduler, Priority
+
+def _rate_limit_error(retry_after="0"):
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=httpx.Request("POST", "https://api.test/v1/chat"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+def test_queued_interactive_calls_are_granted_before_bulk_ones():
+    # One request per 100ms, so queued calls are granted one at a time, in queue order
+    scheduler = LLMScheduler(requests_per_minute=600, burst_seconds=0.1)
+    scheduler.acquire(1)
+    order = []
+
+    def call(priority):
+        scheduler.acquire(1, priority)
+        order.append(priority)
+
+    threads = [_start(call, Priority.BULK) for _ in range(3)]
+    time.sleep(0.02)
+    threads += [_start(call, Priority.INTERACTIVE) for _ in range(3)]
+    for thread in threads:
+        thread.join(5)
+
+    assert order == [Priority.INTERACTIVE] * 3 + [Priority.BULK] * 3
+    assert scheduler.stats()["granted"] == {"INTERACTIVE": 3, "BULK": 4}
+
+def test_grants_keep_up_with_the_refill_rate():
+    # A thousand requests per second, granted one by one as the bucket refills
+    scheduler = LLMScheduler(requests_per_minute=60_000, burst_seconds=0.001)
+    started = time.monotonic()
+    threads = [_start(scheduler.acquire, 10) for _ in range(200)]
+    for thread in threads:
+        thread.join(10)
+    assert time.monotonic() - started < 1.0
+    assert scheduler.stats()["granted"]["BULK"] == 200
+
+def test_async_callers_are_woken_when_the_buckets_refill():
+    # Twenty requests per second after an initial burst of one
+    scheduler = LLMScheduler(requests_per_minute=1200, burst_seconds=0.05)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(scheduler.aacquire(1) for _ in range(5)))
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+    assert 0.15 < elapsed < 0.5
+
+def test_rate_limited_call_backs_off_and_pauses_the_queue():
+    scheduler = LLMScheduler(backoff_base=0.01)
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise _rate_limit_error(retry_after="0.2")
+        return "ok"
+
+    assert scheduler.call(flaky) == "ok"
+    assert len(attempts) == 3
+    # Retry-After is honoured between attempts
+    assert all(later - earlier >= 0.2 for earlier, later in zip(attempts, attempts[1:]))
+    stats = scheduler.stats()
+    assert stats["retries"] == 2 and stats["rate_limited"] == 2
+
+def test_rate_limit_pauses_every_queued_call():
+    scheduler = LLMScheduler(backoff_base=0.01)
+    rate_limited = threading.Event()
+
+    def first_call_rate_limited():
+        if not rate_limited.is_set():
+            rate_limited.set()
+            raise _rate_limit_error(retry_after="0.3")
+        return "ok"
+
+    caller = _start(scheduler.call, first_call_rate_limited)
+    rate_limited.wait(1)
+    time.sleep(0.02)
+    started = time.monotonic()
+    scheduler.acquire(1, Priority.INTERACTIVE)
+    assert time.monotonic() - started >= 0.2
+    caller.join(5)
+
+def test_errors_that_are_not_worth_retrying_fail_at_once():
+    scheduler = LLMScheduler()
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.call(broken)
+    assert len(calls) == 1
+    assert scheduler.stats()["failures"] == 1
@@ -0,0 +1,57 @@
+import numpy as np
+from langgraph_agents.matching_engine import find_best_matches, find_best_matches_many, match_queries
+
+class Encoder:
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, show_progress_bar=False):
+        return np.stack([np.eye(4, dtype=np.float32)[int(text[-1])] for text in texts])
+
+EMBEDDINGS = {f"candidate_{i}": np.eye(4, dtype=np.float32)[i] + 0.1 for i in range(4)}
+
+def test_batched_matches_return_scores_only_and_agree_with_single_queries():
+    queries = np.random.default_rng(0).standard_normal((5, 4))
+    profiles = {candidate_id: {"name": candidate_id} for candidate_id in EMBEDDINGS}
+    many = find_best_matches_many(queries, EMBEDDINGS, top_k=2)
+    assert len(many) == 5
+    for query, matches in zip(queries, many):
+        top_profiles, single = find_best_matches(query, EMBEDDINGS, profiles, top_k=2)
+        assert [candidate_id for candidate_id, _ in matches] == [candidate_id for candidate_id, _ in single]
+        assert list(top_profiles) == [candidate_id for candidate_id, _ in single]
+
+def test_match_queries_embeds_in_order():
+    matches = match_queries(["query 2", "query 0", "query 3"], Encoder(), EMBEDDINGS)
+    assert [match[0][0] for match in matches] == ["candidate_2", "candidate_0", "candidate_3"]
+
+class TextEncoder:
+    """
+    Local encoder of the profile texts and queries: a letter histogram.
+    """
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, show_progress_bar=False):
+        return np.array([[text.lower().count(letter) for letter in "aeioust"] for text in texts], dtype=np.float32)
+
+PROFILES = {f"candidate_{i}": {"name": name, "Summary": summary} for i, (name, summary) in enumerate([
+    ("Ann", "Data scientist"), ("Bob", "Backend developer"), ("Cid", "Data scientist"), ("Dee", "Designer"), ("Eve", "Tester"),
+])}
+
+def test_batched_matches_over_the_embedding_cache_agree_with_brute_force(tmp_path):
+    from utils.embeddings_cache import ProfileEmbeddingCache
+    embeddings = ProfileEmbeddingCache(TextEncoder(), "fake-model", cache_dir=str(tmp_path)).embed(PROFILES)
+    queries = ["data scientist", "backend", "designer tester"]
+    matches = match_queries(queries, TextEncoder(), embeddings, top_k=10)
+
+    ids = list(embeddings)
+    matrix = np.stack([embeddings[candidate_id] for candidate_id in ids])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    for query, query_matches in zip(TextEncoder().encode(queries), matches):
+        scores = matrix @ (query / np.linalg.norm(query))
+        expected = [ids[i] for i in np.lexsort((np.arange(len(ids)), -scores))]
+        assert [candidate_id for candidate_id, _ in query_matches] == expected
+        np.testing.assert_allclose([score for _, score in query_matches], np.sort(scores)[::-1], rtol=1e-5)
+
+def test_screen_requisitions_shortlists_ids_and_scores(monkeypatch):
+    import runner_bulk_screening
+    monkeypatch.setattr(runner_bulk_screening, "generate_and_cache_embeddings", lambda profiles: EMBEDDINGS)
+    monkeypatch.setattr(runner_bulk_screening, "get_openai_embeddings", Encoder)
+    results = runner_bulk_screening.screen_requisitions({"req_a": "query 1", "req_b": "query 3"}, {}, top_k=2)
+    assert list(results) == ["req_a", "req_b"]
+    assert [match["candidate_id"] for match in results["req_a"]] == ["candidate_1", "candidate_0"]
+    assert set(results["req_b"][0]) == {"candidate_id", "similarity"}
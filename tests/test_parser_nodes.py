@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import Any, List, Optional
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph_agents import nodes
+from utils import model_registry
+from utils.llm_scheduler import Priority
+
+# Requests currently being answered by the fake model, and the most seen at once
+IN_FLIGHT = {"now": 0, "max": 0}
+
+class FakeParserChatModel(BaseChatModel):
+    """
+    Answers each document with an extraction named after it, after a short delay; documents containing FAIL raise.
+    """
+    latency: float = 0.02
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-parser"
+
+    def _answer(self, messages: List[BaseMessage]) -> ChatResult:
+        document = json.loads(messages[-1].content)
+        if "FAIL" in json.dumps(document):
+            raise RuntimeError("request failed")
+        name = document if isinstance(document, str) else document.get("name", "")
+        content = json.dumps({"name": name, "Experience": [], "Education": [], "Skills": ["Python"]})
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return self._answer(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        IN_FLIGHT["now"] += 1
+        IN_FLIGHT["max"] = max(IN_FLIGHT["max"], IN_FLIGHT["now"])
+        try:
+            await asyncio.sleep(self.latency)
+            return self._answer(messages)
+        finally:
+            IN_FLIGHT["now"] -= 1
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    key = model_registry._chat_key(model_registry.DEFAULT_CHAT_MODEL, 0, Priority.BULK)
+    monkeypatch.setitem(model_registry._instances, key, FakeParserChatModel())
+    IN_FLIGHT.update(now=0, max=0)
+
+# The rule-based fast path is off so every CV goes to the model
+CONFIG = {"max_concurrency": 3, "configurable": {"cv_fast_path": False}}
+
+def cv_state():
+    return {"cv_data": {f"cv_{i}.txt": f"Candidate {i}" for i in (3, 1, 4, 2, 5, 9, 6)} | {"cv_7.txt": "FAIL"}}
+
+def test_async_cv_parser_matches_the_sync_node_in_request_order():
+    parsed = asyncio.run(nodes.acv_parser_node(cv_state(), CONFIG))["cv_data"]
+    assert list(parsed) == ["candidate_3", "candidate_1", "candidate_4", "candidate_2", "candidate_5", "candidate_9", "candidate_6", "candidate_7"]
+    assert parsed["candidate_4"] == {"name": "Candidate 4", "Experience": [], "Education": [], "Skills": ["Python"]}
+    # Only the failed request yields the error placeholder
+    assert parsed["candidate_7"] == {"error": "Failed to parse on cv_parser_node"}
+    expected = nodes.cv_parser_node({"cv_data": {key: text for key, text in cv_state()["cv_data"].items() if text != "FAIL"}}, CONFIG)["cv_data"]
+    assert {key: result for key, result in parsed.items() if key != "candidate_7"} == expected
+
+def test_async_nodes_keep_at_most_max_concurrency_requests_in_flight():
+    asyncio.run(nodes.acv_parser_node(cv_state(), CONFIG))
+    assert IN_FLIGHT["max"] == 3
+    IN_FLIGHT.update(max=0)
+    asyncio.run(nodes.acv_parser_node(cv_state(), {**CONFIG, "max_concurrency": 1}))
+    assert IN_FLIGHT["max"] == 1
+
+def test_async_linkedin_and_interview_nodes():
+    linkedin = [{"name": "Ann"}, {"name": "FAIL"}]
+    parsed = asyncio.run(nodes.alinkedin_parser_node({"linkedin_data": linkedin}, CONFIG))["linkedin_data"]
+    assert parsed["candidate_1"]["name"] == "Ann"
+    assert parsed["candidate_2"] == {"error on linkedin_parser_node": "Failed to parse"}
+
+    interviews = {"interview_1.txt": "Talked about Python", "interview_2.txt": "FAIL"}
+    summarized = asyncio.run(nodes.ainterview_summarizer_node({"interview_data": interviews}, CONFIG))["interview_data"]
+    assert summarized["candidate_1"]["Skills"] == ["Python"]
+    assert summarized["candidate_2"] == {"error on interview_summarizer_node": "Failed to parse"}
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+from langgraph_agents import graph_builder
+from langgraph_agents.types import merge_dicts
+
+def test_merge_dicts_merges_keyed_updates():
+    assert merge_dicts({}, {"candidate_1": {"name": "A"}}) == {"candidate_1": {"name": "A"}}
+    assert merge_dicts(None, None) == {}
+    assert merge_dicts({"candidate_1": {"name": "A"}}, {}) == {"candidate_1": {"name": "A"}}
+    merged = merge_dicts({"candidate_1": {"name": "A"}, "candidate_2": {"name": "B"}}, {"candidate_2": {"name": "B2"}})
+    assert merged == {"candidate_1": {"name": "A"}, "candidate_2": {"name": "B2"}}
+
+def parser(key, barrier):
+    # Each parser waits for the other two, so the graph only finishes when the branches run in parallel
+    def node(state, config=None):
+        barrier.wait()
+        return {key: {"candidate_1": f"parsed {state[key]}"}}
+    return node
+
+def async_parser(key, barrier):
+    async def node(state, config=None):
+        await barrier.wait()
+        return {key: {"candidate_1": f"parsed {state[key]}"}}
+    return node
+
+def synthesis(state, config=None):
+    return {"profiles": {"candidate_1": {key: state[key]["candidate_1"] for key in ("cv_data", "linkedin_data", "interview_data")}}}
+
+RAW = {"cv_data": "cv", "linkedin_data": "linkedin", "interview_data": "interview", "profiles": {"candidate_0": {"name": "Kept"}}}
+EXPECTED = {
+    "candidate_0": {"name": "Kept"},
+    "candidate_1": {"cv_data": "parsed cv", "linkedin_data": "parsed linkedin", "interview_data": "parsed interview"},
+}
+
+def patch_nodes(monkeypatch, make_parser, barrier, prefix=""):
+    for name, key in (("cv_parser_node", "cv_data"), ("linkedin_parser_node", "linkedin_data"), ("interview_summarizer_node", "interview_data")):
+        monkeypatch.setattr(graph_builder, prefix + name, make_parser(key, barrier))
+    monkeypatch.setattr(graph_builder, "synthesis_node", synthesis)
+
+def test_parsers_fan_out_and_join_at_synthesis(monkeypatch):
+    patch_nodes(monkeypatch, parser, threading.Barrier(3, timeout=5))
+    state = graph_builder.create_profile_graph().compile().invoke(dict(RAW))
+    assert state["profiles"] == EXPECTED
+
+def test_async_parsers_fan_out_and_join_at_synthesis(monkeypatch):
+    async def run():
+        patch_nodes(monkeypatch, async_parser, asyncio.Barrier(3), prefix="a")
+        graph = graph_builder.create_profile_graph(use_async=True).compile()
+        return await asyncio.wait_for(graph.ainvoke(dict(RAW)), timeout=5)
+    assert asyncio.run(run())["profiles"] == EXPECTED
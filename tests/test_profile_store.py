@@ -0,0 +1,60 @@
+import sqlite3
+from utils.profile_store import ProfileStore
+from utils.structured_index import StructuredIndex
+
+PROFILES = {
+    "candidate_1": {"name": "A", "Experience": [{"title": "Lead", "duration_years": "4"}, {"title": "Dev", "duration_years": 2.5}]},
+    "candidate_2": {"name": "B", "Experience": [{"title": "Dev", "duration_years": "unknown"}, {"title": "Intern", "duration_years": "nan"}]},
+    "candidate_3": {"name": "C", "Experience": [{"title": "Dev", "duration_years": 3}]},
+}
+
+def test_store_and_structured_index_agree_on_total_years(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.sqlite"))
+    store.upsert_many(PROFILES)
+    index = StructuredIndex.build(PROFILES)
+    for low, high in ((None, None), (0, 0), (3, 3), (5, 7), (6.5, 6.5)):
+        assert store.candidates_by_years(low, high) == index.candidates(min_years=low, max_years=high)
+    assert store.candidates_by_years(6.5, 6.5) == ["candidate_1"]
+
+def test_stores_written_before_numeric_strings_counted_are_recomputed(tmp_path):
+    path = str(tmp_path / "profiles.sqlite")
+    store = ProfileStore(path)
+    store.upsert_many(PROFILES)
+    store._conn.execute("UPDATE candidates SET total_years = 2.5 WHERE candidate_id = 'candidate_1'")
+    store._conn.execute("PRAGMA user_version = 0")
+    store._conn.commit()
+    store.close()
+
+    assert ProfileStore(path).candidates_by_years(6.5, 6.5) == ["candidate_1"]
+    assert sqlite3.connect(path).execute("PRAGMA user_version").fetchone()[0] == 1
+
+ROUND_TRIP = {
+    "candidate_1": {
+        "name": "A", "Summary": "Backend developer", "email": "a@example.com",
+        "Experience": [
+            {"title": "Dev", "company": None, "duration_years": 2, "source": ["cv"], "team": "Core"},
+            "Freelance consulting",
+        ],
+        "Education": [{"degree": "BSc", "institution": "Uni", "year": 2015, "honours": True}],
+        "Skills": ["Python", {"skill": "SQL", "source": ["linkedin"]}],
+    },
+    "candidate_2": {"error": "Could not parse the CV", "raw": "..."},
+    "candidate_3": {"name": "C", "Summary": None, "Experience": [], "Skills": "Java, SQL"},
+    "candidate_4": {"name": "D", "Skills": [{"skill": "Go"}], "Education": [{"degree": ["BSc", "MSc"]}]},
+}
+
+def test_profiles_read_back_unchanged(tmp_path):
+    path = str(tmp_path / "profiles.sqlite")
+    ProfileStore(path).upsert_many(ROUND_TRIP)
+    store = ProfileStore(path)
+    assert store.to_dict() == ROUND_TRIP
+    assert dict(store.items()) == ROUND_TRIP
+
+def test_plain_string_entries_stay_searchable(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.sqlite"))
+    store.upsert_many(ROUND_TRIP)
+    assert store._conn.execute(
+        "SELECT description FROM experience WHERE candidate_id = 'candidate_1' AND position = 1"
+    ).fetchone() == ("Freelance consulting",)
+    assert store.candidates_with_skill("sql") == ["candidate_1"]
+    assert store.candidates_with_degree("BSc") == ["candidate_1"]
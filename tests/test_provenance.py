@@ -0,0 +1,63 @@
+import random
+from langgraph_agents.nodes import normalize_skills
+from utils.provenance import MAX_INDEXED_KEYS, ProvenanceIndex
+
+SOURCES = ("CV", "LinkedIn", "Interview")
+
+def linear_field_sources(sources, entry, field_name):
+    """
+    The matching add_source_to_field did before the index: compare the entry with every source entry.
+    """
+    names = []
+    for name in SOURCES:
+        items = sources[name].get(field_name, [])
+        for item in items if isinstance(items, list) else []:
+            if (isinstance(item, dict) and isinstance(entry, dict) and entry.items() <= item.items()) \
+                    or (isinstance(item, str) and isinstance(entry, dict) and str(entry) == item) \
+                    or (isinstance(item, str) and isinstance(entry, str) and entry == item):
+                names.append(name)
+    # A source is now listed once per entry
+    return list(dict.fromkeys(names))
+
+def random_entry(rng, wide=False):
+    keys = [f"key_{i}" for i in range(MAX_INDEXED_KEYS + 3 if wide else 4)]
+    values = ["a", "b", 1, 2.5, None, ["x", "y"], {"nested": "z"}]
+    return {key: rng.choice(values) for key in rng.sample(keys, rng.randint(1, len(keys)))}
+
+def test_field_sources_match_the_linear_matching():
+    rng = random.Random(0)
+    for _ in range(200):
+        sources = {
+            name: {"Experience": [random_entry(rng, wide=rng.random() < 0.2) for _ in range(rng.randint(0, 4))] + ["Freelance"]}
+            for name in SOURCES
+        }
+        sources["Interview"]["Experience"].append(str(sources["CV"]["Experience"][0]) if len(sources["CV"]["Experience"]) > 1 else "Other")
+        index = ProvenanceIndex(sources)
+        candidates = [item for name in SOURCES for item in sources[name]["Experience"]]
+        # Source entries, subsets of them and unrelated entries
+        entries = candidates + [
+            dict(rng.sample(sorted(item.items(), key=str), rng.randint(0, len(item)))) for item in candidates if isinstance(item, dict)
+        ] + [random_entry(rng) for _ in range(5)]
+        for entry in entries:
+            assert index.field_sources(entry, "Experience") == linear_field_sources(sources, entry, "Experience")
+
+def test_non_list_fields_and_sources_match_nothing():
+    index = ProvenanceIndex({"CV": {"Experience": "Dev at Acme"}, "LinkedIn": None, "Interview": {}})
+    assert index.field_sources({"title": "Dev"}, "Experience") == []
+    assert index.field_sources("Dev at Acme", "Experience") == []
+
+def test_skills_match_after_normalization():
+    index = ProvenanceIndex(
+        {"CV": {"Skills": ["TensorFlow", "Python"]}, "LinkedIn": {"Skills": "python, SQL"}, "Interview": {"Skills": [{"skill": "Go"}]}},
+        normalize_skills=normalize_skills
+    )
+    assert index.skill_sources("Tensorflow") == ["CV"]
+    assert index.skill_sources("Python") == ["CV", "LinkedIn"]
+    assert index.skill_sources("SQL") == ["LinkedIn"]
+    assert index.skill_sources("Go") == []
+
+def test_fuzzy_matching_compares_normalized_titles_and_companies():
+    sources = {"CV": {"Experience": [{"title": "Data Scientist", "company": "TechCorp Inc."}]}, "LinkedIn": {}, "Interview": {}}
+    entry = {"title": "data scientist", "company": "Techcorp inc", "duration_years": 2}
+    assert ProvenanceIndex(sources).field_sources(entry, "Experience") == []
+    assert ProvenanceIndex(sources, fuzzy=True).field_sources(entry, "Experience") == ["CV"]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from utils.quantized_embeddings import QuantizedIndex, read_codes
+from utils.similarity import SimilarityIndex
+
+def matrix(rows=300, dim=32):
+    return np.random.default_rng(0).standard_normal((rows, dim)).astype(np.float32)
+
+@pytest.mark.parametrize("mode,pca_dim", [("float16", None), ("int8", None), ("pq", None), ("int8", 16)])
+def test_reranked_results_equal_exact_search(mode, pca_dim):
+    vectors = matrix()
+    ids = [f"c{i}" for i in range(len(vectors))]
+    quantized = QuantizedIndex(ids, vectors, mode=mode, pca_dim=pca_dim)
+    exact = SimilarityIndex(ids, vectors)
+    queries = vectors[:5] + 0.1 * matrix(5)
+    # A re-rank over every candidate is exact whatever the compression
+    for query in queries:
+        got = quantized.search(query, 5, rerank=len(ids))
+        assert [candidate_id for candidate_id, _ in got] == [candidate_id for candidate_id, _ in exact.search(query, 5)]
+        assert [score for _, score in got] == pytest.approx([score for _, score in exact.search(query, 5)], abs=1e-5)
+
+def test_codes_round_trip_through_save_and_read_codes(tmp_path):
+    vectors = matrix()
+    ids = [f"c{i}" for i in range(len(vectors))]
+    rows = np.arange(len(ids))[::-1].copy()
+    built = QuantizedIndex(ids, vectors, rows, mode="int8")
+    built.save(str(tmp_path / "codes.faiss"))
+
+    loaded = QuantizedIndex(ids, vectors, rows, mode="int8", codes=read_codes(str(tmp_path / "codes.faiss")))
+    queries = vectors[:10]
+    assert loaded.search_many(queries, 5) == built.search_many(queries, 5)
+    assert loaded.search_many(queries, 5, rerank=0) == built.search_many(queries, 5, rerank=0)
+    # Candidate c{i} is stored at row len - 1 - i
+    assert loaded.search(vectors[len(ids) - 1], 1)[0][0] == "c0"
+
+def test_codes_of_other_embeddings_are_rejected(tmp_path):
+    vectors = matrix()
+    QuantizedIndex(list(range(len(vectors))), vectors, mode="int8").save(str(tmp_path / "codes.faiss"))
+    with pytest.raises(ValueError):
+        QuantizedIndex(list(range(10)), vectors[:10], mode="int8", codes=read_codes(str(tmp_path / "codes.faiss")))
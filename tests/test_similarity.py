@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from utils.similarity import SimilarityIndex, normalize_rows, top_k
+
+def brute_force_top_k(scores, k):
+    # Best first, ties by index
+    return list(np.lexsort((np.arange(len(scores)), -scores))[:k])
+
+def test_top_k_breaks_ties_by_index():
+    scores = np.array([1, 3, 3, 2, 3], dtype=np.float32)
+    assert list(top_k(scores, 2)) == [1, 2]
+    assert list(top_k(scores, 4)) == [1, 2, 4, 3]
+    assert list(top_k(scores, 10)) == [1, 2, 4, 3, 0]
+    assert list(top_k(scores, 0)) == []
+
+def test_top_k_agrees_with_a_full_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        scores = rng.integers(0, 5, size=rng.integers(1, 40)).astype(np.float32)
+        k = int(rng.integers(1, 45))
+        assert list(top_k(scores, k)) == brute_force_top_k(scores, k)
+
+def brute_force_search(ids, matrix, queries, k):
+    scores = normalize_rows(queries) @ normalize_rows(matrix).T
+    return [[(ids[i], float(row[i])) for i in brute_force_top_k(row, k)] for row in scores]
+
+def assert_same_results(results, expected):
+    assert [[candidate_id for candidate_id, _ in matches] for matches in results] == \
+        [[candidate_id for candidate_id, _ in matches] for matches in expected]
+    for matches, expected_matches in zip(results, expected):
+        np.testing.assert_allclose([score for _, score in matches], [score for _, score in expected_matches], rtol=1e-5, atol=1e-6)
+
+@pytest.mark.parametrize("k", [1, 3, 7, 50])
+def test_search_many_agrees_with_brute_force(k):
+    rng = np.random.default_rng(k)
+    # Small integer vectors, so many candidates tie
+    matrix = rng.integers(0, 3, size=(40, 4)).astype(np.float32)
+    queries = rng.integers(0, 3, size=(9, 4)).astype(np.float32)
+    ids = [f"candidate_{i}" for i in range(len(matrix))]
+    expected = brute_force_search(ids, matrix, queries, k)
+    index = SimilarityIndex(ids, matrix, chunk_rows=7)
+    assert_same_results(index.search_many(queries, k, query_block=4), expected)
+    assert_same_results([index.search(query, k) for query in queries], expected)
+
+def test_search_many_on_a_memory_mapped_matrix_with_rows(tmp_path):
+    rng = np.random.default_rng(1)
+    stored = rng.integers(0, 3, size=(30, 4)).astype(np.float32)
+    path = str(tmp_path / "vectors.npy")
+    np.save(path, stored)
+    mapped = np.load(path, mmap_mode="r")
+    rows = rng.permutation(30)[:20]
+    ids = [f"candidate_{i}" for i in range(len(rows))]
+    queries = rng.integers(0, 3, size=(5, 4)).astype(np.float32)
+    expected = brute_force_search(ids, stored[rows], queries, 6)
+    index = SimilarityIndex(ids, mapped, rows=rows, chunk_rows=8)
+    assert_same_results(index.search_many(queries, 6, query_block=2), expected)
+    assert_same_results([index.search(query, 6) for query in queries], expected)
@@ -0,0 +1,100 @@
+import sys
+import types
+import numpy as np
+import pytest
+from utils import structured_index
+from utils.structured_index import StructuredIndex, degree_level, get_structured_index
+
+PROFILES = {
+    "candidate_1": {"Skills": ["Python", "SQL"], "Education": [{"degree": "PhD in Physics"}], "Experience": [{"duration_years": 5}]},
+    "candidate_2": {"Skills": ["python"], "Education": [{"degree": "MSc in Data Science"}], "Experience": [{"duration_years": 3}]},
+    "candidate_3": {"Skills": [{"skill": "Java"}, {"skill": "SQL"}], "Education": [{"degree": "B.Sc. Computer Science"}], "Experience": [{"duration_years": 2}, {"duration_years": 1}]},
+    "candidate_4": {"error": "synthesis failed"},
+}
+
+def candidates(mask):
+    return [candidate_id for candidate_id, allowed in zip(PROFILES, mask) if allowed]
+
+def test_degree_levels():
+    assert degree_level("PhD in Physics") == degree_level("Doctorate") == "PhD"
+    assert degree_level("MSc in Data Science") == degree_level("MBA") == "Masters"
+    assert degree_level("B.Sc. Computer Science") == degree_level("Bachelor's") == "Bachelors"
+    assert degree_level("Associate degree") == "Associate"
+    assert degree_level("High school") is None and degree_level(None) is None
+
+def test_filter_intersects_the_criteria():
+    index = StructuredIndex.build(PROFILES)
+    assert candidates(index.filter()) == list(PROFILES)
+    assert candidates(index.filter(skills=["Python"])) == ["candidate_1", "candidate_2"]
+    assert candidates(index.filter(skills=["python", "sql"])) == ["candidate_1"]
+    assert candidates(index.filter(skills=["SQL"], degree="BSc")) == ["candidate_3"]
+    assert candidates(index.filter(degree="Masters")) == ["candidate_2"]
+    assert candidates(index.filter(skills=["Rust"])) == []
+
+def test_year_bounds_inclusive_and_exclusive():
+    index = StructuredIndex.build(PROFILES)
+    assert index.candidates(min_years=3) == ["candidate_1", "candidate_2", "candidate_3"]
+    assert index.candidates(min_years=3, exclusive=True) == ["candidate_1"]
+    assert index.candidates(max_years=3, exclusive=True) == ["candidate_4"]
+    assert index.candidates(min_years=3, max_years=3) == ["candidate_2", "candidate_3"]
+    assert index.candidates(min_years=2, max_years=5, exclusive=True) == ["candidate_2", "candidate_3"]
+
+def test_save_load_round_trip(tmp_path):
+    index = StructuredIndex.build(PROFILES)
+    index.save(str(tmp_path / "index.npz"))
+    loaded = StructuredIndex.load(str(tmp_path / "index.npz"))
+    assert loaded.ids == index.ids
+    for criteria in ({"skills": ["sql"]}, {"degree": "PhD"}, {"min_years": 3, "max_years": 5}, {"skills": ["python"], "degree": "Masters"}):
+        assert np.array_equal(loaded.filter(**criteria), index.filter(**criteria))
+
+def test_other_pools_reuse_the_saved_index_and_never_overwrite_it(tmp_path):
+    path = str(tmp_path / "index.npz")
+    saved = get_structured_index(PROFILES, path=path, rebuild=True)
+    written = open(path, "rb").read()
+    assert get_structured_index(dict(PROFILES), path=path) is saved
+
+    pool = {
+        "candidate_5": {"Skills": ["Python"], "Education": [{"degree": "PhD"}], "Experience": [{"duration_years": 9}]},
+        "candidate_3": PROFILES["candidate_3"],
+        "candidate_1": PROFILES["candidate_1"],
+    }
+    index = get_structured_index(pool, path=path)
+    assert index.ids == list(pool)
+    expected = StructuredIndex.build(pool)
+    for criteria in ({"skills": ["Python"]}, {"skills": ["sql"]}, {"degree": "PhD"}, {"degree": "Bachelors"}, {"min_years": 4}):
+        assert np.array_equal(index.filter(**criteria), expected.filter(**criteria))
+    assert get_structured_index(dict(pool), path=path) is index
+    assert open(path, "rb").read() == written
+
+@pytest.fixture
+def runner(monkeypatch):
+    # The runner imports normalize_skills from the agent nodes, which need the whole agent stack
+    monkeypatch.setitem(sys.modules, "langgraph_agents.nodes", types.SimpleNamespace(normalize_skills=lambda skills: skills))
+    import embeddings_runner
+    get_structured_index(PROFILES, path=structured_index.STRUCTURED_INDEX_PATH, rebuild=True)
+    return embeddings_runner
+
+def test_structured_filter_ignores_only_the_criteria_nobody_left_meets(runner, caplog):
+    query = {"skills": ["SQL", "Rust"], "education": "PhD", "years_of_experience": 4, "experience_condition": "less_than"}
+    # SQL keeps candidates 1 and 3, nobody has Rust, the PhD keeps candidate 1, who has more than 4 years
+    assert candidates(runner.structured_filter(query, PROFILES)) == ["candidate_1"]
+    assert "skill 'Rust'" in caplog.text and "experience less_than 4 years" in caplog.text
+    assert "degree" not in caplog.text
+
+    assert candidates(runner.structured_filter({"skills": ["Python"], "years_of_experience": 3, "experience_condition": "exact"}, PROFILES)) == ["candidate_2"]
+    assert candidates(runner.structured_filter({"skills": []}, PROFILES)) == list(PROFILES)
+
+def test_only_candidates_passing_the_filter_are_embedded_and_scored(runner, monkeypatch):
+    encoded = []
+
+    class Encoder:
+        def encode(self, texts, batch_size=None, convert_to_numpy=True, show_progress_bar=False):
+            texts = [texts] if isinstance(texts, str) else texts
+            encoded.extend(texts)
+            return np.ones((len(texts), 8), dtype=np.float32)
+
+    monkeypatch.setattr(runner, "get_sentence_transformer", lambda model: Encoder())
+    results = runner.compute_candidate_scores("Find candidates with a PhD", PROFILES)
+    assert [candidate_id for candidate_id, _ in results] == ["candidate_1"]
+    # The query, then the one profile meeting the criteria
+    assert len(encoded) == 2
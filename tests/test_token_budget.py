@@ -0,0 +1,37 @@
+import json
+from langchain_core.messages import AIMessage
+from langgraph_agents.nodes import _split_packed
+from utils.token_budget import estimate_tokens, pack_by_token_budget
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+def test_pack_by_token_budget_keeps_order_within_the_budget():
+    items = [(f"doc_{i}", "x" * chars) for i, chars in enumerate([16, 16, 8, 40, 100, 4, 4])]
+    groups = pack_by_token_budget(items, budget=10)
+    assert [key for group in groups for key, _ in group] == [key for key, _ in items]
+    assert [[key for key, _ in group] for group in groups] == [["doc_0", "doc_1", "doc_2"], ["doc_3"], ["doc_4"], ["doc_5", "doc_6"]]
+    # Only an item over the budget on its own exceeds it
+    for group in groups:
+        assert sum(estimate_tokens(text) for _, text in group) <= 10 or len(group) == 1
+    assert pack_by_token_budget([], budget=10) == []
+
+GROUP = [("candidate_1", None), ("candidate_2", None), ("candidate_3", None)]
+
+def split(content):
+    return {key: json.loads(message.content) for key, message in _split_packed("cv_parser", GROUP, AIMessage(content=content)).items()}
+
+def test_split_packed_returns_one_answer_per_document():
+    answers = {"candidate_1": {"name": "A"}, "candidate_2": {"name": "B"}, "candidate_3": {"name": "C"}}
+    assert split(json.dumps(answers)) == answers
+
+def test_split_packed_leaves_out_omitted_and_garbled_documents():
+    assert split(json.dumps({"candidate_1": {"name": "A"}, "candidate_3": "not an object"})) == {"candidate_1": {"name": "A"}}
+    assert split("Sorry, I cannot help with that.") == {}
+    assert split(json.dumps([{"name": "A"}])) == {}
+
+def test_split_packed_drops_the_document_cut_off_by_truncation():
+    truncated = '{"candidate_1": {"name": "A"}, "candidate_2": {"name": "B", "Skills": ["Py'
+    assert split(truncated) == {"candidate_1": {"name": "A"}}
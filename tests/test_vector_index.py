@@ -0,0 +1,112 @@
+import zlib
+import numpy as np
+import pytest
+from utils import vector_index
+from utils.vector_index import VectorIndex, get_vector_index, sync_summary_index
+
+DIM = 16
+
+class FakeEncoder:
+    """
+    Sentence-transformers stand-in: a fixed random vector per text, counting the texts it encodes.
+    """
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, show_progress_bar=False):
+        self.encoded.extend(texts)
+        return np.stack([np.random.default_rng(zlib.crc32(text.encode())).standard_normal(DIM) for text in texts]).astype(np.float32)
+
+def embed(texts):
+    return FakeEncoder().encode(texts)
+
+@pytest.fixture
+def encoder(monkeypatch):
+    fake = FakeEncoder()
+    monkeypatch.setattr(vector_index, "get_sentence_transformer", lambda model: fake)
+    return fake
+
+def test_sync_summary_index_skips_error_profiles(encoder, request):
+    profiles = {
+        "candidate_1": {"name": "A", "Summary": "Python developer"},
+        "candidate_2": {"error": "synthesis failed"},
+        "candidate_3": {"name": "C", "Summary": None},
+    }
+    index = sync_summary_index(profiles, model=request.node.name)
+    assert index.ids == ["candidate_1"]
+    assert encoder.encoded == ["Python developer"]
+
+    # A candidate whose synthesis failed after it was indexed is removed
+    profiles["candidate_1"] = {"error": "synthesis failed"}
+    assert sync_summary_index(profiles, model=request.node.name).ids == []
+
+def test_search_of_a_pool_never_synced_embeds_it_in_memory(encoder, request):
+    model = request.node.name
+    sync_summary_index({"candidate_1": {"Summary": "Java developer"}}, model=model)
+    profiles = {
+        "candidate_1": {"Summary": "Java developer"},
+        "candidate_2": {"Summary": "Python developer"},
+        "candidate_3": {"error": "synthesis failed"},
+    }
+    encoder.encoded.clear()
+    search = vector_index.open_summary_index(profiles, model=model)
+    assert encoder.encoded == ["Python developer"]
+    assert search.search(embed(["Python developer"])[0], 1, candidate_ids=profiles)[0][0] == "candidate_2"
+    assert {candidate_id for candidate_id, _ in search.search(embed(["Java developer"])[0], 5, candidate_ids=profiles)} == {"candidate_1", "candidate_2"}
+    # Nothing was added to the persisted index
+    assert get_vector_index(model, name="summaries").ids == ["candidate_1"]
+    assert VectorIndex(get_vector_index(model, name="summaries").path).ids == ["candidate_1"]
+
+def counting(calls):
+    def embed_counted(texts):
+        calls.extend(texts)
+        return embed(texts)
+    return embed_counted
+
+def test_sync_embeds_only_new_and_changed_texts_and_removes_the_others(tmp_path):
+    index, calls = VectorIndex(str(tmp_path), kind="flat", model="m"), []
+    assert index.sync({"a": "alpha", "b": "beta"}, counting(calls)) == 2
+    assert index.sync({"a": "alpha", "b": "beta"}, counting(calls)) == 0
+    assert index.sync({"a": "alpha", "b": "gamma", "c": "delta"}, counting(calls)) == 2
+    assert calls == ["alpha", "beta", "gamma", "delta"]
+    index.sync({"b": "gamma", "c": "delta"}, counting(calls))
+    assert sorted(index.ids) == ["b", "c"]
+    assert index.search(embed(["gamma"])[0], 1) == [("b", pytest.approx(1.0))]
+
+    reopened = VectorIndex(str(tmp_path), kind="flat", model="m")
+    assert sorted(reopened.ids) == ["b", "c"]
+    assert reopened.sync({"b": "gamma", "c": "delta"}, counting(calls)) == 0
+
+def test_hnsw_removals_are_tombstones_until_rebuilt(tmp_path, monkeypatch):
+    texts = {f"c{i}": f"text {i}" for i in range(20)}
+    index = VectorIndex(str(tmp_path), kind="hnsw", model="m")
+    index.sync(texts, embed)
+    index.delete(["c0", "c1"])
+    assert index._index.ntotal == 20 and len(index) == 18
+    # Tombstones never come back from a search, which still returns k live candidates
+    results = index.search(embed(["text 0"])[0], 18)
+    assert len(results) == 18 and {"c0", "c1"}.isdisjoint(candidate_id for candidate_id, _ in results)
+
+    # Past the dead ratio, the graph is rebuilt without them
+    index.delete([f"c{i}" for i in range(2, 8)])
+    assert index._index.ntotal == len(index) == 12
+    assert index.search(embed(["text 9"])[0], 1)[0][0] == "c9"
+
+def test_refresh_reloads_an_index_another_process_saved(tmp_path):
+    writer = VectorIndex(str(tmp_path), kind="flat", model="m")
+    writer.sync({"a": "alpha"}, embed)
+    reader = VectorIndex(str(tmp_path), kind="flat", model="m")
+    assert not reader.refresh()
+
+    writer.sync({"a": "alpha", "b": "beta"}, embed)
+    assert reader.refresh()
+    assert sorted(reader.ids) == ["a", "b"]
+    assert reader.search(embed(["beta"])[0], 1)[0][0] == "b"
+    assert not reader.refresh()
+
+def test_search_restricted_to_a_pool(tmp_path):
+    index = VectorIndex(str(tmp_path), kind="flat", model="m")
+    index.sync({f"c{i}": f"text {i}" for i in range(30)}, embed)
+    results = index.search(embed(["text 0"])[0], 3, candidate_ids={"c5", "c6"})
+    assert sorted(candidate_id for candidate_id, _ in results) == ["c5", "c6"]